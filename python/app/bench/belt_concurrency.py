@@ -0,0 +1,101 @@
+"""
+Benchmark: event-loop responsiveness while belt frames are analysed.
+
+Runs the app in-process (ASGI transport) and keeps a GET loop on
+/dashboard/Sorting going while frames are posted to /analysis/analyze-image,
+first with the CV work inline on the event loop (how the endpoint used to
+run) and then on the bounded CV pool. Reports how late each GET starts
+(event-loop stall), GET latency, frames/s and how many frames were turned
+away with 503, then prints the per-stage latency histograms from
+/analysis/status.
+
+Run from the `python/` directory:
+    python -m app.bench.belt_concurrency [frames] [concurrency]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from unittest import mock
+
+os.environ.setdefault("DATADOG_LOG_SAMPLE_RATES", "dashboard.fetch=0")
+os.environ.setdefault("BELT_CHANGE_THRESHOLD", "0")   # the same frame is posted over and over
+
+import httpx
+
+from app.bench.frames import frames
+from app.main import app
+from app.routers import sortingBeltAnalyser
+from app.services import cv_pool
+
+
+async def _inline_run(stage, fn, *args):
+    return fn(*args)
+
+
+async def _run(raw: bytes, total: int, concurrency: int) -> dict:
+    latencies = []
+    stalls = []
+    codes = []
+    done = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def probe() -> None:
+            while not done.is_set():
+                due = time.perf_counter() + 0.002
+                await asyncio.sleep(0.002)
+                started = time.perf_counter()
+                stalls.append(started - due)
+                await client.get("/dashboard/Sorting")
+                latencies.append(time.perf_counter() - started)
+
+        async def poster(n: int) -> None:
+            for _ in range(n):
+                response = await client.post(
+                    "/analysis/analyze-image", files={"file": ("frame.jpg", raw, "image/jpeg")}
+                )
+                codes.append(response.status_code)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(poster(total // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    latencies.sort()
+    stalls.sort()
+    return {
+        "stall_p99_ms": stalls[int(len(stalls) * 0.99)] * 1000,
+        "stall_max_ms": stalls[-1] * 1000,
+        "frames_per_s": codes.count(200) / elapsed,
+        "rejected": sum(1 for c in codes if c == 503),
+        "get_p50_ms": latencies[len(latencies) // 2] * 1000,
+        "get_max_ms": latencies[-1] * 1000,
+    }
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    raw = frames(1)[0]
+    sortingBeltAnalyser.print = lambda *a, **k: None    # the endpoint prints every result
+
+    print(f"cores: {os.cpu_count()}, pool workers: {cv_pool.CV_WORKERS}, "
+          f"max pending frames: {cv_pool.MAX_PENDING_FRAMES}")
+    with mock.patch.object(cv_pool, "run", _inline_run):
+        inline = asyncio.run(_run(raw, total, concurrency))
+    pooled = asyncio.run(_run(raw, total, concurrency))
+    for name, r in (("inline on event loop", inline), ("CV pool", pooled)):
+        print(f"{name:>22}: {r['frames_per_s']:5.1f} frames/s, {r['rejected']} rejected, "
+              f"loop stall p99 {r['stall_p99_ms']:6.1f} ms, max {r['stall_max_ms']:6.1f} ms, "
+              f"GET p50 {r['get_p50_ms']:5.1f} ms, max {r['get_max_ms']:5.1f} ms")
+
+    for stage, stats in sortingBeltAnalyser.analysis_status()["latency"].items():
+        print(f"{stage:>16}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: `crop_belts` with per-request full-frame mask work (legacy) vs.
+the precomputed `BELT_GEOMETRY` (ROI slice + small mask).
+
+Reports images/s for the whole function (decode + crop + PNG encode) and for
+the masking/cropping step alone, and checks both produce identical crops.
+
+Run from the `python/` directory:
+    python -m app.bench.belt_crop
+"""
+from __future__ import annotations
+
+import time
+from typing import Dict
+
+import cv2
+import numpy as np
+
+from app.bench.frames import frames
+from app.utils.imageFunctions.beltCropper import crop_belts
+from app.utils.imageFunctions.maskLoader import BELT_GEOMETRY, FRAME_SIZE, REGION_MASKS
+
+ROUNDS = 3
+
+
+def _legacy_crops(img: np.ndarray) -> Dict[str, np.ndarray]:
+    crops = {}
+    for belt_id, bool_mask in REGION_MASKS.items():
+        m = bool_mask.astype(np.uint8)[:, :, None]
+        masked = cv2.bitwise_and(img, img, mask=m[:, :, 0])
+        ys, xs = np.where(bool_mask)
+        if len(xs) == 0 or len(ys) == 0:
+            continue
+        x0, x1, y0, y1 = xs.min(), xs.max(), ys.min(), ys.max()
+        crops[belt_id] = masked[y0:y1+1, x0:x1+1]
+    return crops
+
+
+def _legacy_crop_belts(raw_img_bytes: bytes) -> Dict[str, bytes]:
+    img = cv2.imdecode(np.frombuffer(raw_img_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img.shape[:2][::-1] != FRAME_SIZE:
+        raise ValueError("size mismatch")
+    return {belt_id: cv2.imencode(".png", crop)[1].tobytes() for belt_id, crop in _legacy_crops(img).items()}
+
+
+def _geometry_crops(img: np.ndarray) -> Dict[str, np.ndarray]:
+    crops = {}
+    for belt_id, segment in BELT_GEOMETRY.segments.items():
+        roi = img[segment.roi]
+        crops[belt_id] = cv2.bitwise_and(roi, roi, mask=segment.mask)
+    return crops
+
+
+def _rate(fn, items) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for item in items:
+            fn(item)
+    return ROUNDS * len(items) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    encoded = frames(8)
+    decoded = [cv2.imdecode(np.frombuffer(b, np.uint8), cv2.IMREAD_COLOR) for b in encoded]
+
+    for img, raw in zip(decoded, encoded):
+        legacy, fast = _legacy_crops(img), _geometry_crops(img)
+        assert legacy.keys() == fast.keys()
+        assert all(np.array_equal(legacy[k], fast[k]) for k in legacy)
+        assert _legacy_crop_belts(raw) == crop_belts(raw)
+    print("crops identical: yes")
+
+    rows = [
+        ("mask+crop only, legacy", _rate(_legacy_crops, decoded)),
+        ("mask+crop only, geometry", _rate(_geometry_crops, decoded)),
+        ("crop_belts, legacy", _rate(_legacy_crop_belts, encoded)),
+        ("crop_belts, geometry", _rate(crop_belts, encoded)),
+    ]
+    for name, rate in rows:
+        print(f"{name:>26}: {rate:8.1f} images/s")
+
+
+if __name__ == "__main__":
+    main()
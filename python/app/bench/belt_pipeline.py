@@ -0,0 +1,117 @@
+"""
+Regression check + benchmark: the belt analyser's ndarray pipeline
+(`crop_belt_arrays` -> `count_belt_labels`) vs. the previous PNG round-trip
+(`crop_belts` -> imdecode -> BGR2RGB -> upscale -> segment -> count).
+
+Stored frames are the label crops checked into the repo (app/test.png,
+app/test2.png, app/app/step0.png) plus seeded synthetic full frames from
+`app.bench.frames`. For each one the label masks must be pixel-identical
+and the counts equal; the script exits non-zero otherwise. It then reports
+frames/s for both pipelines.
+
+Run from the `python/` directory:
+    python -m app.bench.belt_pipeline
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from app.bench.frames import frames
+from app.routers.sortingBeltAnalyser import (
+    BELT_ORDER_LEFT_TO_RIGHT,
+    count_belt_labels,
+    remove_small_regions,
+    segment_white_labels,
+)
+from app.utils.imageFunctions.beltCropper import crop_belt_arrays, crop_belts, decode_frame
+
+STORED_CROPS = ("test.png", "test2.png", "app/step0.png")
+ROUNDS = 3
+
+
+def _clamp(count: int) -> int:
+    return 0 if count > 30 or count < 3 else count
+
+
+def _legacy_mask(png_bytes: bytes):
+    rgb = cv2.imdecode(np.frombuffer(png_bytes, np.uint8), cv2.IMREAD_COLOR)
+    rgb = cv2.cvtColor(rgb, cv2.COLOR_BGR2RGB)
+    rgb = cv2.resize(rgb, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
+    label_mask = segment_white_labels(rgb)
+    _, count, _ = remove_small_regions(label_mask, min_area=50, draw_on=rgb.copy())
+    return label_mask, count
+
+
+def _array_mask(crop: np.ndarray):
+    upscaled = cv2.resize(crop, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
+    label_mask = segment_white_labels(upscaled, color_code=cv2.COLOR_BGR2GRAY)
+    _, count, _ = remove_small_regions(label_mask, min_area=50)
+    return label_mask, count
+
+
+def legacy_counts(raw: bytes) -> Dict[str, int]:
+    crops = crop_belts(raw)
+    return {b: _clamp(_legacy_mask(crops[b])[1]) for b in BELT_ORDER_LEFT_TO_RIGHT if b in crops}
+
+
+def array_counts(raw: bytes) -> Dict[str, int]:
+    crops = crop_belt_arrays(decode_frame(raw))
+    return {b: count_belt_labels(crops[b]) for b in BELT_ORDER_LEFT_TO_RIGHT if b in crops}
+
+
+def _check(name: str, png_crops: Dict[str, bytes], array_crops: Dict[str, np.ndarray]) -> List[str]:
+    failures = []
+    for belt_id, png in png_crops.items():
+        legacy_mask, legacy_count = _legacy_mask(png)
+        mask, count = _array_mask(array_crops[belt_id])
+        if not np.array_equal(legacy_mask, mask) or legacy_count != count:
+            failures.append(f"{name}/{belt_id}: legacy {legacy_count} vs array {count}")
+        elif _clamp(legacy_count) != count_belt_labels(array_crops[belt_id]):
+            failures.append(f"{name}/{belt_id}: clamped count differs")
+    return failures
+
+
+def _rate(fn, items) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for item in items:
+            fn(item)
+    return ROUNDS * len(items) / (time.perf_counter() - started)
+
+
+def main() -> None:
+    app_dir = Path(__file__).resolve().parents[1]
+    failures: List[str] = []
+    checked = 0
+
+    for rel in STORED_CROPS:
+        png = (app_dir / rel).read_bytes()
+        crop = cv2.imdecode(np.frombuffer(png, np.uint8), cv2.IMREAD_COLOR)
+        failures += _check(rel, {"crop": png}, {"crop": crop})
+        checked += 1
+
+    jpg_frames = frames(6) + frames(2, speckles=20000)
+    png_frames = frames(2, ext=".png")
+    for n, raw in enumerate(jpg_frames + png_frames):
+        failures += _check(f"frame{n}", crop_belts(raw), crop_belt_arrays(decode_frame(raw)))
+        if legacy_counts(raw) != array_counts(raw):
+            failures.append(f"frame{n}: per-frame counts differ")
+        checked += 1
+
+    if failures:
+        print("\n".join(failures))
+        sys.exit(1)
+    print(f"identical masks and counts on {checked} stored/synthetic frames")
+
+    for name, fn in (("PNG round-trip", legacy_counts), ("ndarray", array_counts)):
+        print(f"{name:>16}: {_rate(fn, jpg_frames[:6]):6.1f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: skipping unchanged belts with `ChangeDetector` fingerprints.
+
+Replays a camera-like sequence through `count_frame`: a static scene
+re-captured with fresh sensor noise and JPEG re-encoding, interleaved with
+frames where the labels on one or two belts have moved. Compares the
+detector at its configured threshold against recounting every belt
+(threshold 0): frames/s, frame and segment skip ratios, how many frames'
+counts differ from a full recount, and how often the counts flicker
+between static frames (a full recount reacts to sensor noise; a skipped
+belt keeps its count).
+
+Run from the `python/` directory:
+    python -m app.bench.change_detection [frames] [moving_every]
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.bench.frames import encode, frame
+from app.routers import sortingBeltAnalyser
+from app.utils.imageFunctions.changeDetector import ChangeDetector
+from app.utils.imageFunctions.maskLoader import BELT_GEOMETRY, DEFAULT_CAMERA
+
+# Candidate threshold to evaluate (production skipping is off unless configured)
+THRESHOLD = float(os.getenv("BELT_CHANGE_THRESHOLD", "12"))
+
+
+def sequence(count: int, moving_every: int, seed: int = 3) -> List[bytes]:
+    rng = random.Random(seed)
+    nprng = np.random.default_rng(seed)
+    scene = frame(1)
+    belts = list(BELT_GEOMETRY.segments)
+    out = []
+    for n in range(count):
+        if n and n % moving_every == 0:
+            # labels moved on one or two belts: take those belts from another capture
+            other = frame(100 + n)
+            for belt_id in rng.sample(belts, rng.randint(1, 2)):
+                segment = BELT_GEOMETRY.segments[belt_id]
+                on_belt = segment.mask.astype(bool)
+                scene[segment.roi][on_belt] = other[segment.roi][on_belt]
+        noise = nprng.normal(0, 3, scene.shape)
+        out.append(encode((scene + noise).clip(0, 255).astype(np.uint8)))
+    return out
+
+
+async def _replay(raws: List[bytes], threshold: float) -> Dict:
+    detector = sortingBeltAnalyser._change_detectors[DEFAULT_CAMERA] = ChangeDetector(BELT_GEOMETRY, threshold)
+    results = []
+    started = time.perf_counter()
+    for raw in raws:
+        counts, _ = await sortingBeltAnalyser.count_frame(raw)
+        results.append(counts)
+    elapsed = time.perf_counter() - started
+    return {"fps": len(raws) / elapsed, "results": results, "stats": detector.stats()}
+
+
+def _flicker(results: List[Dict], moving_every: int) -> int:
+    return sum(results[n] != results[n - 1] for n in range(1, len(results)) if n % moving_every)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    moving_every = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    raws = sequence(count, moving_every)
+
+    full = asyncio.run(_replay(raws, 0))
+    skipping = asyncio.run(_replay(raws, THRESHOLD))
+    wrong = sum(a != b for a, b in zip(full["results"], skipping["results"]))
+
+    print(f"{count} frames, belts move every {moving_every} frames")
+    print(f"{'recount every belt':>26}: {full['fps']:6.1f} frames/s, "
+          f"{_flicker(full['results'], moving_every)} count changes on static frames")
+    stats = skipping["stats"]
+    print(f"{f'skip unchanged (<= {THRESHOLD:g})':>26}: {skipping['fps']:6.1f} frames/s, "
+          f"{_flicker(skipping['results'], moving_every)} count changes on static frames, "
+          f"frame skip ratio {stats['frame_skip_ratio']:.2f}, "
+          f"segment skip ratio {stats['segment_skip_ratio']:.2f}, "
+          f"{wrong} frames differ from a full recount")
+
+
+if __name__ == "__main__":
+    main()
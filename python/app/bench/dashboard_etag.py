@@ -0,0 +1,74 @@
+"""
+Benchmark: cost of serving a dashboard poll at handler level.
+
+Compares the old path (deepcopy of the live Dashboard + JSON encode) with
+the snapshot/ETag path, both for a full 200 response and for a 304
+revalidation. Logging is silenced so only the handler work is timed.
+
+Run from the `python/` directory:
+    python -m app.bench.dashboard_etag
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from copy import deepcopy
+
+from starlette.requests import Request
+
+from app.data.store import get_db
+from app.routers.dashboard import _build_dashboard_response
+from app.utils.jobExtractors.UpdateJobsStoreMetrics import update_jobs_store_metric
+from datadog_logger import DATADOG_LOGGER_NAME
+
+REQUESTS = 5000
+STORE_KEY = "returns"
+
+
+def _request(headers: dict) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+async def _seed() -> None:
+    for i in range(3000):
+        await update_jobs_store_metric({
+            "HEADER_ID": i,
+            "EMPLOYEE_CODE": f"op-{i % 8}",
+            "HIGH_OVER_PROCESS": "Returns",
+            "NUMBER_OF_LINES": 2,
+        })
+
+
+async def _time(fn) -> float:
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        await fn()
+    return (time.perf_counter() - started) / REQUESTS
+
+
+async def main() -> None:
+    logging.getLogger(DATADOG_LOGGER_NAME).setLevel(logging.CRITICAL)
+    await _seed()
+
+    async def legacy():
+        deepcopy(get_db()[STORE_KEY]).model_dump_json()
+
+    first = await _build_dashboard_response(STORE_KEY, _request({}))
+    etag = first.headers["etag"]
+
+    async def full():
+        await _build_dashboard_response(STORE_KEY, _request({}))
+
+    async def revalidate():
+        response = await _build_dashboard_response(STORE_KEY, _request({"If-None-Match": etag}))
+        assert response.status_code in (200, 304)
+
+    print(f"legacy deepcopy+encode : {await _time(legacy) * 1e6:8.1f} µs/request")
+    print(f"snapshot 200           : {await _time(full) * 1e6:8.1f} µs/request")
+    print(f"snapshot 304           : {await _time(revalidate) * 1e6:8.1f} µs/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
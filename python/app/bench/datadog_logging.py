@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: caller-side cost of `log_datadog_event` in synchronous mode
+vs. the queue-backed writer, with and without sampling of a hot event type.
+
+The logger is pointed at a stream that sleeps briefly on every flush, the
+way a congested stdout pipe behaves. In sync mode that stall lands on the
+caller; in queue mode only the writer thread waits.
+
+Run from the `python/` directory:
+    python -m app.bench.datadog_logging
+"""
+from __future__ import annotations
+
+import io
+import logging
+import statistics
+import time
+
+from datadog_logger import (
+    DATADOG_LOGGER_NAME,
+    get_log_stats,
+    log_datadog_event,
+    set_sample_rate,
+    start_log_writer,
+    stop_log_writer,
+)
+
+CALLS = 5000
+FLUSH_STALL_SECONDS = 0.0002
+
+
+class _SlowStream(io.StringIO):
+    def flush(self) -> None:
+        time.sleep(FLUSH_STALL_SECONDS)
+
+
+def _measure() -> list[float]:
+    timings = []
+    for i in range(CALLS):
+        started = time.perf_counter()
+        log_datadog_event(
+            status="ok",
+            message="Dashboard returned",
+            event_type="dashboard.fetch",
+            function_name="bench",
+            extra={"store_key": "default", "i": i, "people": 10},
+        )
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1e6
+    p99 = timings[int(len(timings) * 0.99)] * 1e6
+    print(f"{name:>22}: p50 {p50:7.1f}µs  p99 {p99:7.1f}µs")
+
+
+def main() -> None:
+    logger = logging.getLogger(DATADOG_LOGGER_NAME)
+    logger.handlers = [logging.StreamHandler(stream=_SlowStream())]
+    logger.propagate = False
+
+    _report("sync", _measure())
+
+    start_log_writer()
+    _report("queue", _measure())
+    stats = get_log_stats()
+    stop_log_writer()
+    print(f"{'':>22}  enqueued {stats['enqueued']}, dropped {stats['dropped']}")
+
+    set_sample_rate("dashboard.fetch", 0.01)
+    start_log_writer()
+    _report("queue + 1% sampling", _measure())
+    stop_log_writer()
+    print(f"{'':>22}  sampled out {get_log_stats()['sampled_out']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark: decoding Geek putaway / pick-order push envelopes into job_data,
+the previous way (base64 -> str -> `json.loads`, whole body kept as RAW_GEEK)
+vs. the shared `EnvelopeDecoder` (single bytes pass, orjson when installed,
+only the dashboard fields kept).
+
+Envelopes are read from a JSON-lines file of recorded pushes
+(`{"topic": "geek-putaway"|"geek-pickorder", "envelope": {...}}` per line)
+when one is given, otherwise generated by `app.bench.envelopes` (half of the
+putaways carry a CloudEvents `data.ipg_list`). job_data (minus RAW_GEEK) and
+the KPI quantity must match the previous path; the script exits non-zero
+otherwise. Reports µs per message per decoder and the memory retained by
+the decoded job_data.
+
+Run from the `python/` directory:
+    python -m app.bench.envelope_decode [recorded.jsonl]
+"""
+from __future__ import annotations
+
+import base64
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.bench.envelopes import _wrap, geek_pickorder, geek_putaway
+from app.services.batch_ingest import FEEDS
+from app.utils.jobExtractors import EnvelopeDecoder
+from app.utils.jobExtractors.UpdateJobsStoreMetrics import kpi_quantity
+
+MESSAGES = 3000
+ROUNDS = 3
+JOB_TYPES = {"geek-putaway": "GeekInbound", "geek-pickorder": "GeekPicking"}
+
+
+def _synthetic(count: int) -> List[Tuple[str, Dict[str, Any]]]:
+    rng = random.Random(11)
+    items = []
+    for i in range(count):
+        if i % 2:
+            items.append(("geek-pickorder", geek_pickorder(i, rng)))
+            continue
+        envelope = geek_putaway(i, rng)
+        if i % 4 == 0:
+            payload = json.loads(base64.b64decode(envelope["message"]["data"]))
+            payload["data"] = {"ipg_list": [{"base_lv_quantity": rng.randint(1, 9)} for _ in range(rng.randint(1, 6))]}
+            envelope = _wrap(payload, i)
+        items.append(("geek-putaway", envelope))
+    return items
+
+
+def _recorded(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    with open(path, encoding="utf-8") as fh:
+        rows = [json.loads(line) for line in fh if line.strip()]
+    return [(row["topic"], row["envelope"]) for row in rows if row["topic"] in JOB_TYPES]
+
+
+def _legacy(topic: str, envelope: Dict[str, Any]) -> Dict[str, Any]:
+    """Previous path: str round-trip, stdlib json, whole body retained."""
+    body = json.loads(base64.b64decode(envelope["message"]["data"]).decode("utf-8"))
+    job_data = FEEDS[topic].build(body)
+    job_data.pop("IPG_QUANTITY", None)
+    job_data["RAW_GEEK"] = body
+    return job_data
+
+
+def _shared(topic: str, envelope: Dict[str, Any]) -> Dict[str, Any]:
+    feed = FEEDS[topic]
+    return feed.build(feed.parse(envelope))
+
+
+def _legacy_kpi(job_data: Dict[str, Any]) -> int:
+    if job_data["job_type"] == "GeekPicking":
+        return int(job_data["NUMBER_OF_LINES"])
+    ipg_list = job_data.get("RAW_GEEK", {}).get("data", {}).get("ipg_list", [])
+    return sum(int(item.get("base_lv_quantity", 1)) for item in ipg_list) if ipg_list else 1
+
+
+def _check(items) -> List[str]:
+    failures = []
+    for topic, envelope in items:
+        old, new = _legacy(topic, envelope), _shared(topic, envelope)
+        old["job_type"] = new["job_type"] = JOB_TYPES[topic]
+        kpi_old, kpi_new = _legacy_kpi(old), kpi_quantity(new)
+        old.pop("RAW_GEEK")
+        new.pop("IPG_QUANTITY", None)
+        if old != new or kpi_old != kpi_new:
+            failures.append(f"{topic} {envelope['message'].get('messageId')}: job_data or KPI differs "
+                            f"({kpi_old} vs {kpi_new})")
+    return failures
+
+
+def _us_per_message(decode: Callable, items) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for topic, envelope in items:
+            decode(topic, envelope)
+    return (time.perf_counter() - started) / (ROUNDS * len(items)) * 1e6
+
+
+def _retained_bytes(decode: Callable, items) -> int:
+    tracemalloc.start()
+    kept = [decode(topic, envelope) for topic, envelope in items]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return retained
+
+
+def _report(label: str, decode: Callable, items) -> None:
+    print(f"{label:>32}: {_us_per_message(decode, items):7.1f} µs/msg, "
+          f"{_retained_bytes(decode, items) / len(items) / 1024:6.2f} KiB retained/msg")
+
+
+def main() -> None:
+    items = _recorded(sys.argv[1]) if len(sys.argv) > 1 else _synthetic(MESSAGES)
+    failures = _check(items)
+    if failures:
+        print("\n".join(failures[:20]))
+        sys.exit(1)
+    source = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    print(f"identical job_data and KPI quantity on {len(items)} envelopes ({source})")
+
+    _report("previous (json, RAW_GEEK kept)", _legacy, items)
+    backends = {"json": json.loads}
+    if EnvelopeDecoder.orjson is not None:
+        backends["orjson"] = EnvelopeDecoder.orjson.loads
+    configured = EnvelopeDecoder.loads
+    try:
+        for name, loads in backends.items():
+            EnvelopeDecoder.loads = loads
+            _report(f"shared decoder ({name})", _shared, items)
+    finally:
+        EnvelopeDecoder.loads = configured
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Synthetic but realistically shaped Pub/Sub push envelopes for the benchmarks.
+
+The Geek payloads follow the structure the routers parse (order_list /
+container_list / sku_list for pick orders, receipt_list / sku_list for
+putaways) and carry a realistic amount of unused fields.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import random
+from typing import Any, Dict, List, Tuple
+
+JOB_TYPES = ("Pick", "Replenishment", "Inbound", "Returns", "Error lane")
+
+
+def _wrap(payload: Dict[str, Any], message_id: int) -> Dict[str, Any]:
+    data = base64.b64encode(json.dumps(payload).encode()).decode()
+    return {"message": {"data": data, "messageId": str(message_id)}, "subscription": "bench"}
+
+
+def jobs_action(i: int, rng: random.Random) -> Dict[str, Any]:
+    return _wrap({
+        "HEADER_ID": 100000 + i,
+        "EMPLOYEE_CODE": f"EMP{rng.randrange(40):03d}",
+        "HIGH_OVER_PROCESS": rng.choice(JOB_TYPES),
+        "NUMBER_OF_LINES": rng.randint(1, 12),
+        "PICKBATCH_CONFIRMED": 1,
+        "LINE_COUNT": rng.randint(1, 12),
+        "DURATION_SECONDS": rng.randint(20, 600),
+        "HANDLING_UNIT_COUNT": rng.randint(1, 3),
+        "NET_WEIGHT_DURATION": rng.random() * 10,
+        "VOLUME_DURATION": rng.random(),
+        "comment": "",
+    }, i)
+
+
+def _sku(rng: random.Random, amount_key: str) -> Dict[str, Any]:
+    return {
+        "sku_code": f"SKU{rng.randrange(10**8):08d}",
+        "sku_name": "Gold plated necklace " + "x" * rng.randint(10, 60),
+        amount_key: rng.randint(0, 3),
+        "owner_code": "MJ",
+        "batch_property": {f"property{n}": "" for n in range(1, 12)},
+        "sn_list": [],
+        "packing_spec": "",
+    }
+
+
+def geek_pickorder(i: int, rng: random.Random) -> Dict[str, Any]:
+    skus = [_sku(rng, "pickup_amount") for _ in range(rng.randint(1, 25))]
+    return _wrap({
+        "header": {"warehouse_code": "NL01", "interface_code": "feedback_outbound_order", "user_id": "geek"},
+        "body": {
+            "order_amount": 1,
+            "order_list": [{
+                "out_order_code": f"SO{i:09d}",
+                "warehouse_code": "NL01",
+                "finish_date": 1760000000000 + i,
+                "status": 3,
+                "sku_list": skus,
+                "container_list": [{
+                    "container_code": f"CT{rng.randrange(10**6):06d}",
+                    "picker": f"picker{rng.randrange(30)}",
+                    "sku_list": skus,
+                }],
+                "extra": "y" * 200,
+            }],
+        },
+    }, i)
+
+
+def geek_putaway(i: int, rng: random.Random) -> Dict[str, Any]:
+    return _wrap({
+        "header": {"warehouse_code": "NL01", "interface_code": "feedback_receipt_order"},
+        "body": {
+            "receipt_list": [{
+                "receipt_code": f"RC{i:09d}",
+                "pallet_code": f"PL{i:07d}",
+                "sku_list": [_sku(rng, "amount") for _ in range(rng.randint(1, 40))],
+            }],
+        },
+    }, i)
+
+
+BUILDERS = {
+    "jobs-action": jobs_action,
+    "geek-pickorder": geek_pickorder,
+    "geek-putaway": geek_putaway,
+}
+
+
+def mixed(count: int, seed: int = 7) -> List[Tuple[str, Dict[str, Any]]]:
+    """`count` (topic, envelope) pairs, roughly half jobs-action and half Geek."""
+    rng = random.Random(seed)
+    topics = ("jobs-action", "jobs-action", "geek-pickorder", "geek-putaway")
+    out = []
+    for i in range(count):
+        topic = topics[i % len(topics)]
+        out.append((topic, BUILDERS[topic](i, rng)))
+    return out
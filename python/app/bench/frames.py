@@ -0,0 +1,52 @@
+"""
+Synthetic full camera frames for the belt-analysis benchmarks.
+
+Frames match the mask's resolution: a dark, slightly noisy belt background
+with white label-like rectangles placed inside each segment, optional white
+speckle noise (thousands of tiny regions; 2px speckles survive the
+segmentation's morphological opening), and JPEG encoding like the
+uploader's camera. Generation is seeded, so runs are reproducible.
+"""
+from __future__ import annotations
+
+import random
+from typing import List
+
+import cv2
+import numpy as np
+
+from app.utils.imageFunctions.maskLoader import FRAME_SIZE, REGION_MASKS
+
+
+def frame(seed: int = 1, labels_per_segment: int = 12, speckles: int = 0, speckle_size: int = 1) -> np.ndarray:
+    """BGR frame with labels in every segment (and `speckles` noise blobs of `speckle_size` px)."""
+    rng = random.Random(seed)
+    nprng = np.random.default_rng(seed)
+    width, height = FRAME_SIZE
+    img = nprng.normal(45, 12, (height, width, 3)).clip(0, 255).astype(np.uint8)
+
+    for mask in REGION_MASKS.values():
+        ys, xs = np.nonzero(mask)
+        for _ in range(labels_per_segment):
+            i = rng.randrange(len(xs))
+            w, h = rng.randint(7, 14), rng.randint(6, 12)
+            box = cv2.boxPoints(((float(xs[i]), float(ys[i])), (w, h), rng.uniform(0, 90)))
+            cv2.fillPoly(img, [box.astype(np.int32)], (235, 238, 240))
+
+    if speckles:
+        sy = nprng.integers(0, height, speckles)
+        sx = nprng.integers(0, width, speckles)
+        for dy in range(speckle_size):
+            for dx in range(speckle_size):
+                img[np.minimum(sy + dy, height - 1), np.minimum(sx + dx, width - 1)] = 255
+    return img
+
+
+def encode(img: np.ndarray, ext: str = ".jpg") -> bytes:
+    ok, buf = cv2.imencode(ext, img, [cv2.IMWRITE_JPEG_QUALITY, 90] if ext == ".jpg" else [])
+    assert ok
+    return buf.tobytes()
+
+
+def frames(count: int, speckles: int = 0, ext: str = ".jpg", speckle_size: int = 1) -> List[bytes]:
+    return [encode(frame(seed, speckles=speckles, speckle_size=speckle_size), ext) for seed in range(1, count + 1)]
@@ -0,0 +1,183 @@
+"""
+Benchmark: per-message metric extraction for jobs-action messages, the
+previous hand-written `async` extractors (copied below as the reference) vs.
+the current sync extractors (`JOB_TYPE_TO_EXTRACTOR`).
+
+Payloads are decoded `app.bench.envelopes.jobs_action` messages plus edge
+cases (missing fields, None / string values, zero lines, "Return receipts"
+comments). Metrics must be identical for every job type; the script exits
+non-zero otherwise. Timings are µs per message (best of several rounds,
+loop overhead subtracted), called from a coroutine like the push handler.
+
+Run from the `python/` directory:
+    python -m app.bench.job_metrics
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.bench.envelopes import JOB_TYPES, jobs_action
+from app.utils.jobExtractors.JobMetricExtractor import JOB_TYPE_TO_EXTRACTOR
+
+MESSAGES = 20000
+ROUNDS = 15
+
+
+# ── Previous extractors (reference) ─────────────────────────────────────────
+async def _fma(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "comment": job_data.get("comment", ""),
+        "category": job_data.get("category", ""),
+        "employee_code": job_data.get("EMPLOYEE_CODE", ""),
+        "total_cartons": job_data.get("LINE_COUNT", 0),
+        "total_handling_units": job_data.get("HANDLING_UNIT_COUNT", 0),
+        "net_weight": job_data.get("NET_WEIGHT_DURATION", 0),
+        "gross_weight": job_data.get("GROSS_WEIGHT_DURATION", 0),
+        "volume": job_data.get("VOLUME_DURATION", 0),
+        "duration_seconds": job_data.get("DURATION_SECONDS", 0),
+    }
+
+
+async def _monopicking(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    duration_seconds = job_data.get("DURATION_SECONDS", 0)
+    line_count = job_data.get("NUMBER_OF_LINES", 1)
+    if duration_seconds is None or not isinstance(duration_seconds, (int, float)):
+        duration_seconds = 0
+    if line_count is None or not isinstance(line_count, (int, float)):
+        line_count = 1
+    picking_speed = duration_seconds / line_count if line_count != 0 else 0
+    return {
+        "comment": job_data.get("comment", ""),
+        "category": job_data.get("category", ""),
+        "employee_code": job_data.get("EMPLOYEE_CODE", ""),
+        "total_items_processed": job_data.get("NUMBER_OF_LINES", 0),
+        "pick_duration": duration_seconds,
+        "picking_speed": picking_speed,
+        "total_cartons_picked": job_data.get("CARTON_COUNT", 0),
+        "total_handling_units": job_data.get("HANDLING_UNIT_COUNT", 0),
+    }
+
+
+async def _inbound(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "comment": job_data.get("comment", ""),
+        "category": job_data.get("category", ""),
+        "employee_code": job_data.get("EMPLOYEE_CODE", ""),
+        "total_units_processed": job_data.get("LINE_COUNT", 0),
+        "inbound_duration": job_data.get("DURATION_SECONDS", 0),
+        "bulk_processing_time": job_data.get("QTY_LEVEL_1_DURATION", 0),
+        "volume": job_data.get("VOLUME_DURATION", 0),
+        "weight": job_data.get("NET_WEIGHT_DURATION", 0),
+    }
+
+
+async def _returns(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "comment": job_data.get("comment", ""),
+        "category": job_data.get("category", ""),
+        "employee_code": job_data.get("EMPLOYEE_CODE", ""),
+        "total_returns": job_data.get("LINE_COUNT", 0),
+        "return_duration": job_data.get("DURATION_SECONDS", 0),
+        "return_weight": job_data.get("NET_WEIGHT_DURATION", 0),
+        "return_volume": job_data.get("VOLUME_DURATION", 0),
+        "return_receipts": job_data.get("comment", "").lower() == "return receipts",
+    }
+
+
+async def _errorlanes(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "comment": job_data.get("comment", ""),
+        "category": job_data.get("category", ""),
+        "employee_code": job_data.get("EMPLOYEE_CODE", ""),
+        "error_actions": job_data.get("LINE_COUNT", 0),
+        "error_duration": job_data.get("DURATION_SECONDS", 0),
+        "error_weight": job_data.get("NET_WEIGHT_DURATION", 0),
+        "error_volume": job_data.get("VOLUME_DURATION", 0),
+        "error_handling_units": job_data.get("HANDLING_UNIT_COUNT", 0),
+    }
+
+
+LEGACY = {"Replenishment": _fma, "Pick": _monopicking, "Inbound": _inbound,
+          "Returns": _returns, "Error lane": _errorlanes}
+
+
+def _payloads(count: int) -> List[Dict[str, Any]]:
+    rng = random.Random(5)
+    out = [json.loads(base64.b64decode(jobs_action(i, rng)["message"]["data"])) for i in range(count)]
+    edge_cases = [
+        {},
+        {"DURATION_SECONDS": None, "NUMBER_OF_LINES": None},
+        {"DURATION_SECONDS": "12", "NUMBER_OF_LINES": "3", "LINE_COUNT": "7"},
+        {"DURATION_SECONDS": 90, "NUMBER_OF_LINES": 0},
+        {"DURATION_SECONDS": 90.5, "NUMBER_OF_LINES": 4, "CARTON_COUNT": 2, "category": "bulk"},
+        {"comment": "Return Receipts"},
+        {"comment": "return receipts ", "EMPLOYEE_CODE": None},
+    ]
+    for payload in edge_cases:
+        for job_type in JOB_TYPES:
+            out.append({**payload, "HIGH_OVER_PROCESS": job_type})
+    return out
+
+
+async def _check(payloads) -> List[str]:
+    failures = []
+    for payload in payloads:
+        job_type = payload["HIGH_OVER_PROCESS"]
+        expected = await LEGACY[job_type](payload)
+        actual = JOB_TYPE_TO_EXTRACTOR[job_type](payload)
+        if expected != actual or list(expected) != list(actual):
+            failures.append(f"{job_type} {payload}: {expected} != {actual}")
+    return failures
+
+
+async def _loop(extract, payloads, awaited: bool) -> float:
+    started = time.perf_counter()
+    if extract is None:
+        for payload in payloads:
+            pass
+    elif awaited:
+        for payload in payloads:
+            await extract(payload)
+    else:
+        for payload in payloads:
+            extract(payload)
+    return time.perf_counter() - started
+
+
+def _us_per_message(legacy, current, payloads) -> Tuple[float, float]:
+    """
+    Best of ROUNDS for both extractors, minus the cost of the bare loop. The
+    three loops are interleaved per round so drift on a noisy box hits all alike.
+    """
+    timings: List[List[float]] = [[], [], []]
+    for _ in range(ROUNDS):
+        timings[0].append(asyncio.run(_loop(legacy, payloads, True)))
+        timings[1].append(asyncio.run(_loop(current, payloads, False)))
+        timings[2].append(asyncio.run(_loop(None, payloads, False)))
+    baseline = min(timings[2])
+    return tuple(max(min(t) - baseline, 0.0) / len(payloads) * 1e6 for t in timings[:2])
+
+
+def main() -> None:
+    payloads = _payloads(MESSAGES)
+    failures = asyncio.run(_check(payloads))
+    if failures:
+        print("\n".join(failures[:20]))
+        sys.exit(1)
+    print(f"identical metrics on {len(payloads)} payloads")
+
+    for job_type in JOB_TYPES:
+        subset = [p for p in payloads if p["HIGH_OVER_PROCESS"] == job_type]
+        legacy, current = _us_per_message(LEGACY[job_type], JOB_TYPE_TO_EXTRACTOR[job_type], subset)
+        print(f"{job_type:>14}: previous {legacy:5.2f} µs/msg, current {current:5.2f} µs/msg "
+              f"({legacy / current:3.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: label counting with `count_label_regions` (connected components,
+NumPy pre-filter, contours only for survivors) vs. `remove_small_regions`
+(Python loop over every contour).
+
+Fixture set: the stored crops (app/test.png, app/test2.png,
+app/app/step0.png), every belt of seeded synthetic frames, the same frames
+with two levels of speckle noise, and random binary images. Counts (and, in debug mode,
+the cleaned masks) must be identical; the script exits non-zero otherwise.
+Timings are per label mask, on clean and noisy frames.
+
+Run from the `python/` directory:
+    python -m app.bench.label_counting
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from app.bench.frames import frame
+from app.routers.sortingBeltAnalyser import count_label_regions, remove_small_regions, segment_white_labels
+from app.utils.imageFunctions.beltCropper import crop_belt_arrays
+
+STORED_CROPS = ("test.png", "test2.png", "app/step0.png")
+MIN_AREA = 50
+ROUNDS = 5
+
+
+def _label_mask(crop_bgr: np.ndarray) -> np.ndarray:
+    upscaled = cv2.resize(crop_bgr, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC)
+    return segment_white_labels(upscaled, color_code=cv2.COLOR_BGR2GRAY)
+
+
+def _frame_masks(speckles: int, speckle_size: int = 1, seeds=range(1, 5)) -> List[np.ndarray]:
+    return [
+        _label_mask(crop)
+        for seed in seeds
+        for crop in crop_belt_arrays(frame(seed, speckles=speckles, speckle_size=speckle_size)).values()
+    ]
+
+
+def _random_masks(count: int) -> List[np.ndarray]:
+    rng = np.random.default_rng(7)
+    masks = []
+    for _ in range(count):
+        h, w = rng.integers(20, 120, 2)
+        img = (rng.random((h, w)) < rng.uniform(0.1, 0.7)).astype(np.uint8) * 255
+        img = cv2.morphologyEx(img, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+        masks.append(cv2.resize(img, None, fx=4, fy=4, interpolation=cv2.INTER_NEAREST))
+    return masks
+
+
+def _check(name: str, mask: np.ndarray) -> Tuple[int, List[str]]:
+    legacy_mask, legacy, _ = remove_small_regions(mask, min_area=MIN_AREA)
+    _, fast, _ = count_label_regions(mask, min_area=MIN_AREA)
+    debug_mask, debug, _ = count_label_regions(mask, min_area=MIN_AREA, draw_on=np.zeros((*mask.shape, 3), np.uint8))
+    failures = []
+    if not legacy == fast == debug:
+        failures.append(f"{name}: contours {legacy}, components {fast} (debug {debug})")
+    elif not np.array_equal(legacy_mask, debug_mask):
+        failures.append(f"{name}: cleaned masks differ")
+    return legacy, failures
+
+
+def _ms_per_mask(fn, masks) -> float:
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for mask in masks:
+            fn(mask, min_area=MIN_AREA)
+    return (time.perf_counter() - started) / (ROUNDS * len(masks)) * 1000
+
+
+def main() -> None:
+    app_dir = Path(__file__).resolve().parents[1]
+    fixtures = [
+        (rel, _label_mask(cv2.imread(str(app_dir / rel), cv2.IMREAD_COLOR))) for rel in STORED_CROPS
+    ]
+    clean, noisy, speckled = _frame_masks(0), _frame_masks(150_000, 2), _frame_masks(600_000)
+    fixtures += [(f"clean{n}", m) for n, m in enumerate(clean)]
+    fixtures += [(f"noisy{n}", m) for n, m in enumerate(noisy)]
+    fixtures += [(f"speckled{n}", m) for n, m in enumerate(speckled)]
+    fixtures += [(f"random{n}", m) for n, m in enumerate(_random_masks(300))]
+
+    failures: List[str] = []
+    labels = 0
+    for name, mask in fixtures:
+        count, failed = _check(name, mask)
+        labels += count
+        failures += failed
+    if failures:
+        print("\n".join(failures))
+        sys.exit(1)
+    print(f"identical counts on {len(fixtures)} masks ({labels} labels)")
+
+    stored = [mask for _, mask in fixtures[:len(STORED_CROPS)]]
+    for name, masks in (("stored crops", stored), ("clean frames", clean), ("noisy frames", noisy),
+                        ("speckled frames", speckled)):
+        contours = sum(len(cv2.findContours(m, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]) for m in masks)
+        legacy, fast = _ms_per_mask(remove_small_regions, masks), _ms_per_mask(count_label_regions, masks)
+        print(f"{name:>15} ({contours // len(masks):5d} regions/mask): "
+              f"contours {legacy:6.3f} ms, components {fast:6.3f} ms ({legacy / fast:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Manual-finish client against a local stub upstream.
+
+Starts a keep-alive HTTP stub (stdlib, threaded) that answers like the
+pick-binding service with configurable latency and an on/off outage switch,
+then walks through:
+
+  1. on-demand fetch (no refresher): concurrent readers wait on the upstream
+  2. background refresher: readers hit the cache; one pooled connection
+  3. outage: circuit opens, backoff grows, stale data keeps being served
+  4. recovery: circuit closes on the next successful probe
+
+Run from the `python/` directory:
+    python -m app.bench.manual_finish
+    python -m app.bench.manual_finish --serve 8099    # stub only
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services import manual_finish
+from datadog_logger import DATADOG_LOGGER_NAME
+
+UPSTREAM_LATENCY_SECONDS = 0.15
+READERS = 50
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = UPSTREAM_LATENCY_SECONDS) -> None:
+        super().__init__(("127.0.0.1", port), _StubHandler)
+        self.latency = latency
+        self.down = False
+        self.connections = 0
+        self.requests = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/manual-finish"
+
+    def get_request(self):
+        self.connections += 1
+        return super().get_request()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    server: StubServer
+
+    def do_GET(self) -> None:
+        self.server.requests += 1
+        time.sleep(self.server.latency)
+        if self.server.down:
+            body, status = b'{"detail":"unavailable"}', 503
+        else:
+            n = self.server.requests
+            body, status = json.dumps({"geek": n, "fma": 2 * n, "total": 3 * n}).encode(), 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+async def _read_latencies(readers: int) -> list[float]:
+    async def one() -> float:
+        started = time.perf_counter()
+        try:
+            await manual_finish.get_manual_finish_metrics()
+        except RuntimeError:
+            pass
+        return time.perf_counter() - started
+
+    return list(await asyncio.gather(*(one() for _ in range(readers))))
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    latencies = sorted(latencies)
+    print(f"{name:>26}: p50 {statistics.median(latencies) * 1e3:8.3f}ms  max {latencies[-1] * 1e3:8.3f}ms")
+
+
+async def _scenario(stub: StubServer) -> None:
+    manual_finish.CACHE_TTL_SECONDS = 0.2
+    manual_finish._breaker = manual_finish.CircuitBreaker(threshold=2, base=0.2, cap=1.6)
+
+    _report("on-demand, cache expired", await _read_latencies(READERS))
+    await asyncio.sleep(0.25)
+    _report("on-demand, cache expired", await _read_latencies(READERS))
+    await manual_finish.close_client()
+
+    connections_before = stub.connections
+    task = asyncio.create_task(manual_finish.run_refresher(interval=0.2))
+    await asyncio.sleep(0.5)
+    samples = []
+    for _ in range(10):
+        samples += await _read_latencies(READERS)
+        await asyncio.sleep(0.1)
+    _report("refresher, cache warm", samples)
+    print(f"{'':>26}  new upstream connections: {stub.connections - connections_before}")
+
+    stub.down = True
+    for _ in range(8):
+        await asyncio.sleep(0.5)
+        stats = manual_finish.manual_finish_stats()
+        served = await _read_latencies(1)
+        print(
+            f"{'outage':>26}: age {stats['cache_age_seconds']:5.2f}s  "
+            f"failures {stats['consecutive_failures']}  open {stats['circuit_open']!s:5}  "
+            f"retry in {stats['retry_in_seconds']:4.2f}s  read {served[0] * 1e3:.3f}ms"
+        )
+
+    stub.down = False
+    await asyncio.sleep(2.0)
+    stats = manual_finish.manual_finish_stats()
+    print(
+        f"{'recovered':>26}: age {stats['cache_age_seconds']:5.2f}s  open {stats['circuit_open']}  "
+        f"refreshes {stats['refreshes']}  failures {stats['failures']}"
+    )
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def main() -> None:
+    if len(sys.argv) > 2 and sys.argv[1] == "--serve":
+        stub = StubServer(int(sys.argv[2]))
+        print(f"stub listening on {stub.url} (Ctrl+C to stop)")
+        stub.serve_forever()
+        return
+
+    logging.getLogger(DATADOG_LOGGER_NAME).setLevel(logging.CRITICAL)
+    stub = StubServer()
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    os.environ["MANUAL_FINISH_URL"] = stub.url
+    try:
+        asyncio.run(_scenario(stub))
+    finally:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark: cost of the in-process metrics behind /metrics.
+
+Micro costs are ns per `Histogram.observe`, a timed span (two
+`perf_counter` calls + observe, as the hot paths do), `with
+histogram.time()`, `Counter.inc` and a labelled registry lookup.
+
+The per-event cost replays exactly the instrument calls one jobs-action
+message makes (request wrapper + decode/extract/update phases: four
+observations, seven clock reads); it must stay under BUDGET_US or the script
+exits non-zero. As a cross-check the real ingest path (decode `message.data`
++ `update_jobs_store_metric` under `timed`) is run with the instruments live
+and swapped for no-ops, rounds interleaved; on a busy machine that
+difference is noisier than the replay. Finally the time to render the
+exposition text for the registry as populated.
+
+Run from the `python/` directory:
+    python -m app.bench.metrics_overhead
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import logging
+import random
+import sys
+import time
+
+from app.bench.envelopes import jobs_action
+from app.services.metrics import FAST_BUCKETS, counter, histogram, render_prometheus, timed
+from app.utils.jobExtractors import EnvelopeDecoder, UpdateJobsStoreMetrics
+from app.utils.jobExtractors.EnvelopeDecoder import decode_message_data
+from app.utils.jobExtractors.UpdateJobsStoreMetrics import update_jobs_store_metric
+from datadog_logger import DATADOG_LOGGER_NAME
+
+CALLS = 200000
+EVENTS = 10000
+ROUNDS = 7
+BUDGET_US = 5.0
+
+
+class _NoOp:
+    """Stands in for a Histogram: same calls, nothing recorded."""
+
+    def observe(self, seconds: float) -> None:
+        pass
+
+
+def _ns_per_call(fn, calls: int = CALLS) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / calls * 1e9
+
+
+def _micro() -> None:
+    h = histogram("bench.observe", FAST_BUCKETS)
+    c = counter("bench.counter")
+
+    def span():
+        started = time.perf_counter()
+        h.observe(time.perf_counter() - started)
+
+    def timed_block():
+        with h.time():
+            pass
+
+    rows = (
+        ("empty call", lambda: None),
+        ("Histogram.observe", lambda: h.observe(0.00042)),
+        ("timed span", span),
+        ("with histogram.time()", timed_block),
+        ("Counter.inc", c.inc),
+        ("histogram(name, **labels)", lambda: histogram("bench.lookup", FAST_BUCKETS, topic="jobs-action")),
+    )
+    for label, fn in rows:
+        print(f"{label:>26}: {_ns_per_call(fn):7.0f} ns")
+
+
+def _replayed_event_us() -> float:
+    request = histogram("bench.request")
+    decode, extract, update = (histogram("bench.phase", FAST_BUCKETS, phase=p) for p in ("decode", "extract", "update"))
+    clock = time.perf_counter
+
+    def event():
+        t0 = clock()                 # timed() wrapper
+        t1 = clock()                 # decode_message_data
+        decode.observe(clock() - t1)
+        t2 = clock()                 # update_jobs_store_metric
+        t3 = clock()
+        t4 = clock()
+        extract.observe(t3 - t2)
+        update.observe(t4 - t3)
+        request.observe(clock() - t0)
+
+    return (_ns_per_call(event) - _ns_per_call(lambda: None)) / 1000
+
+
+async def _handle(message):
+    return await update_jobs_store_metric(decode_message_data(message))
+
+
+async def _ingest(handle, messages) -> float:
+    started = time.perf_counter()
+    for message in messages:
+        await handle(message)
+    return time.perf_counter() - started
+
+
+def _ingest_us(messages):
+    """Best µs/event with the instruments swapped for no-ops, and live."""
+    live = (EnvelopeDecoder._decode_time, UpdateJobsStoreMetrics._phase)
+    noop = (_NoOp(), {phase: _NoOp() for phase in live[1]})
+    instrumented = timed(histogram("bench.ingest"))(_handle)
+    off = on = float("inf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(ROUNDS):
+            EnvelopeDecoder._decode_time, UpdateJobsStoreMetrics._phase = noop
+            try:
+                off = min(off, asyncio.run(_ingest(_handle, messages)))
+            finally:
+                EnvelopeDecoder._decode_time, UpdateJobsStoreMetrics._phase = live
+            on = min(on, asyncio.run(_ingest(instrumented, messages)))
+    return off / len(messages) * 1e6, on / len(messages) * 1e6
+
+
+def main() -> None:
+    logging.getLogger(DATADOG_LOGGER_NAME).setLevel(logging.CRITICAL)
+    _micro()
+
+    replayed = _replayed_event_us()
+    print(f"instrumentation per jobs-action event: {replayed:5.2f} µs (budget {BUDGET_US} µs)")
+
+    rng = random.Random(3)
+    off, on = _ingest_us([jobs_action(i, rng)["message"] for i in range(EVENTS)])
+    print(f"ingest per event: no-op instruments {off:6.2f} µs, live {on:6.2f} µs ({on - off:+5.2f} µs)")
+
+    text = render_prometheus()
+    started = time.perf_counter()
+    for _ in range(100):
+        render_prometheus()
+    print(f"render /metrics: {(time.perf_counter() - started) / 100 * 1e3:6.2f} ms "
+          f"({len(text.splitlines())} lines)")
+    if replayed > BUDGET_US:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
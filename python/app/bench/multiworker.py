@@ -0,0 +1,134 @@
+"""
+Load test: one uvicorn worker vs. N workers behind the single-writer
+aggregator (`app.services.aggregator`), over real HTTP on localhost.
+
+For each setup it runs concurrent GET loops against the dashboards while an
+ingest loop posts jobs-action batches, then checks consistency: after ingest
+stops, every worker must report the same "today" total for the Picking
+dashboard, equal to the lines that were sent. An N-worker run *without* the
+aggregator is included for contrast (each worker only sees its own events).
+
+GET throughput only scales with the number of cores available to the
+workers; the load generator itself also needs CPU.
+
+Run from the `python/` directory:
+    python -m app.bench.multiworker [workers] [seconds]
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from app.bench.envelopes import jobs_action
+
+GET_CONCURRENCY = 32
+INGEST_BATCH = 50
+INGEST_INTERVAL_SECONDS = 0.05
+PATHS = ("/dashboard/Picking", "/dashboard/Replenishment", "/dashboard/Inbound", "/dashboard/Sorting")
+
+
+def _launch(workers: int, port: int, aggregator: bool, socket_path: str) -> subprocess.Popen:
+    env = {**os.environ, "MANUAL_FINISH_REFRESH": "0", "DATADOG_LOG_SAMPLE_RATES": "dashboard.fetch=0"}
+    if aggregator:
+        cmd = [sys.executable, "-m", "app.services.aggregator", "--workers", str(workers),
+               "--port", str(port), "--socket", socket_path]
+    else:
+        env.pop("STATE_BACKEND", None)
+        cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--workers", str(workers), "--port", str(port)]
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def _wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(200):
+        try:
+            if (await client.get("/dashboard/Sorting")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def _run(base_url: str, seconds: float) -> dict:
+    stop = time.monotonic() + seconds
+    gets = 0
+    sent_lines = 0
+    next_id = 0
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=10.0,
+                                 limits=httpx.Limits(max_connections=GET_CONCURRENCY + 2)) as client:
+        await _wait_ready(client)
+
+        async def reader(n: int) -> None:
+            nonlocal gets
+            while time.monotonic() < stop:
+                await client.get(PATHS[(gets + n) % len(PATHS)])
+                gets += 1
+
+        async def ingest() -> None:
+            nonlocal sent_lines, next_id
+            import random
+            rng = random.Random(11)
+            while time.monotonic() < stop:
+                batch = []
+                for _ in range(INGEST_BATCH):
+                    envelope = jobs_action(next_id, rng)
+                    next_id += 1
+                    payload = json.loads(base64.b64decode(envelope["message"]["data"]))
+                    if payload["HIGH_OVER_PROCESS"] == "Pick":
+                        sent_lines += payload["NUMBER_OF_LINES"]
+                    batch.append({"topic": "jobs-action", "envelope": envelope})
+                response = await client.post("/actions/pubsub/batch", json={"messages": batch})
+                assert response.status_code == 200
+                await asyncio.sleep(INGEST_INTERVAL_SECONDS)
+
+        started = time.monotonic()
+        await asyncio.gather(ingest(), *(reader(n) for n in range(GET_CONCURRENCY)))
+        elapsed = time.monotonic() - started
+
+        # Fresh connections so the requests spread over the workers.
+        totals = set()
+        for _ in range(24):
+            async with httpx.AsyncClient(base_url=base_url, timeout=10.0) as probe:
+                body = (await probe.get("/dashboard/Picking")).json()
+                totals.add(body["kpis"][1]["value"])
+
+    return {"gets_per_s": gets / elapsed, "events": next_id, "sent": sent_lines, "totals": sorted(totals)}
+
+
+def main() -> None:
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 8.0
+    setups = [
+        ("1 worker", 1, False),
+        (f"{workers} workers + aggregator", workers, True),
+        (f"{workers} workers, per-process state", workers, False),
+    ]
+    print(f"cores available: {os.cpu_count()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n, (name, count, aggregator) in enumerate(setups):
+            port = 8700 + n
+            proc = _launch(count, port, aggregator, os.path.join(tmp, f"agg{n}.sock"))
+            try:
+                result = asyncio.run(_run(f"http://127.0.0.1:{port}", seconds))
+            finally:
+                proc.terminate()
+                proc.wait(10)
+            consistent = result["totals"] == [result["sent"]]
+            print(
+                f"{name:>32}: {result['gets_per_s']:7.0f} GET/s, {result['events']} events ingested, "
+                f"Picking today={result['totals']} expected {result['sent']} "
+                f"({'consistent' if consistent else 'INCONSISTENT'})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark: per-operator state as the previous pydantic `Person` with a
+deque-backed rolling window vs. `OperatorRecord` (`__slots__`) with the
+array-backed `RollingWindow`.
+
+Memory is measured with tracemalloc for operators whose window holds a
+typical hour (one event per 5 s) and the MAX_SAMPLES cap. Update cost is
+`apply_event` on a dashboard whose operators are of either kind (same code
+path, only the operator objects differ), plus creating an operator.
+
+Run from the `python/` directory:
+    python -m app.bench.operator_state
+"""
+from __future__ import annotations
+
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from typing import Deque, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.data.aggregation import JobEvent, apply_event
+from app.data.operator import OperatorRecord
+from app.data.rolling_window import MAX_SAMPLES, WINDOW_SECONDS
+from app.models import Dashboard, Kpi
+
+OPERATORS = 200
+FILLS = (720, MAX_SAMPLES)
+EVENTS = 60000
+
+
+# ── Previous representation (reference) ─────────────────────────────────────
+class _DequeWindow:
+    __slots__ = ("window_seconds", "maxlen", "_samples", "_total")
+
+    def __init__(self, window_seconds: float = WINDOW_SECONDS, maxlen: int = MAX_SAMPLES) -> None:
+        self.window_seconds = float(window_seconds)
+        self.maxlen = maxlen
+        self._samples: Deque[Tuple[float, int]] = deque()
+        self._total = 0
+
+    def add(self, ts: float, qty: int) -> None:
+        qty = max(0, int(qty))
+        self._samples.append((ts, qty))
+        self._total += qty
+        if len(self._samples) > self.maxlen:
+            self._total -= self._samples.popleft()[1]
+        cutoff = ts - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._total -= self._samples.popleft()[1]
+
+    @property
+    def rate_per_hour(self) -> float:
+        return self._total / (self.window_seconds / 3600 or 1)
+
+
+class _PydanticPerson(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str
+    comment: str
+    category: str
+    speed: int
+    idleSeconds: int
+    last_seen: datetime | None = None
+    jobs: int = 0
+    job_times: _DequeWindow = Field(default_factory=_DequeWindow, exclude=True)
+
+
+def _legacy(name: str) -> _PydanticPerson:
+    return _PydanticPerson(name=name, comment="", category="Pick", speed=0, idleSeconds=0)
+
+
+def _record(name: str) -> OperatorRecord:
+    return OperatorRecord(name=name, category="Pick", speed=0, idleSeconds=0)
+
+
+# ── Measurements ────────────────────────────────────────────────────────────
+def _bytes_per_operator(make, fill: int) -> float:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    operators = []
+    for n in range(OPERATORS):
+        person = make(f"op-{n}")
+        for i in range(fill):
+            person.job_times.add(1_700_000_000 + i * (WINDOW_SECONDS / fill), 1 + i % 3)
+        operators.append(person)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / len(operators)
+
+
+def _dashboard(make, operators: int = 40) -> Dashboard:
+    db = Dashboard(title="bench", status="good", historyText="", people=[],
+                   kpis=[Kpi(label="per hour", value=0, unit="x"), Kpi(label="today", value=0, unit="x")])
+    for n in range(operators):
+        db.people.add(make(f"op-{n}"))
+    return db
+
+
+def _us_per_event(make) -> float:
+    db = _dashboard(make)
+    events = [JobEvent(1_700_000_000 + i * 0.25, f"op-{i % 40}", "Pick", "", 1 + i % 3, 1) for i in range(EVENTS)]
+    started = time.perf_counter()
+    for event in events:
+        apply_event(db, event)
+    return (time.perf_counter() - started) / len(events) * 1e6
+
+
+def _us_per_create(make) -> float:
+    started = time.perf_counter()
+    for n in range(EVENTS):
+        make("op")
+    return (time.perf_counter() - started) / EVENTS * 1e6
+
+
+def main() -> None:
+    rows = (("pydantic Person + deque", _legacy), ("OperatorRecord + arrays", _record))
+    for label, make in rows:
+        memory = ", ".join(f"{_bytes_per_operator(make, fill) / 1024:7.1f} KiB @ {fill} samples" for fill in FILLS)
+        print(f"{label:>24}: {memory}; apply_event {_us_per_event(make):5.2f} µs, "
+              f"create {_us_per_create(make):5.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Startup cost of the persistence layer at a full day of ingest events.
+
+Writes a synthetic day (default 250k events over 24h across all dashboards)
+to a journal in a temp directory, then measures:
+
+  - replaying the whole day from the journal alone (worst case: no snapshot)
+  - writing a snapshot of the resulting state (size, time)
+  - restoring from that snapshot plus a five-minute journal tail (normal startup)
+
+Run from the `python/` directory:
+    python -m app.bench.persistence_replay [events]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.data import journal, store
+from app.data.journal import Journal
+from app.services import persistence
+
+DAY_SECONDS = 24 * 60 * 60
+TAIL_SECONDS = 5 * 60
+OPERATORS_PER_DASHBOARD = 60
+
+
+def _write_day(directory: Path, events: int, start_ts: float) -> tuple[int, int]:
+    """Journal a day of events; returns (events before the tail, tail events)."""
+    rng = random.Random(7)
+    keys = list(store.get_db())
+    job_types = {key: store.get_db()[key].title for key in keys}
+    log = Journal(directory, 0)
+    tail_start = start_ts + DAY_SECONDS - TAIL_SECONDS
+    head = tail = 0
+    rotated = False
+    for i in range(events):
+        ts = start_ts + DAY_SECONDS * i / events
+        if ts >= tail_start and not rotated:
+            log.rotate(1)
+            rotated = True
+        key = rng.choice(keys)
+        lines = rng.randint(1, 12)
+        log.append([ts, key, f"op-{key}-{rng.randrange(OPERATORS_PER_DASHBOARD)}", job_types[key], "", lines, lines])
+        if rotated:
+            tail += 1
+        else:
+            head += 1
+    log.close()
+    return head, tail
+
+
+def main() -> None:
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 250_000
+    empty = {key: persistence.dump_dashboard(db) for key, db in store.get_db().items()}
+
+    def reset() -> None:
+        for key, data in empty.items():
+            store.get_db()[key] = persistence.load_dashboard(data)
+
+    with tempfile.TemporaryDirectory() as raw:
+        directory = Path(raw)
+        head, tail = _write_day(directory, events, time.time() - DAY_SECONDS)
+        size = sum(path.stat().st_size for _, path in journal.segments(directory))
+        print(f"journal: {events} events, {size / 1e6:.1f} MB")
+
+        # Worst case: no snapshot, replay the whole day.
+        stats = persistence.restore(directory)
+        print(f"{'replay full day':>28}: {stats['total_seconds']:7.3f}s  ({stats['replayed_events'] / stats['total_seconds']:9.0f} events/s)")
+
+        # Snapshot of the state up to the start of the tail.
+        reset()
+        persistence.replay_segment(journal.segment_path(directory, 0), store.get_db())
+        started = time.perf_counter()
+        generation, payload = persistence.take_snapshot(directory)   # no active journal: generation 1
+        snapshot_bytes = persistence._write_snapshot(directory, generation, payload)
+        print(f"{'write snapshot':>28}: {time.perf_counter() - started:7.3f}s  ({snapshot_bytes / 1e6:.2f} MB gzip)")
+
+        # Normal startup: newest snapshot + journal tail.
+        reset()
+        stats = persistence.restore(directory)
+        print(
+            f"{'snapshot + 5 min tail':>28}: {stats['total_seconds']:7.3f}s  "
+            f"(snapshot {stats['snapshot_seconds']:.3f}s, {stats['replayed_events']} of {tail} tail events)"
+        )
+        assert stats["replayed_events"] == tail and head + tail == events
+
+
+if __name__ == "__main__":
+    main()
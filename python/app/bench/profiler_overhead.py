@@ -0,0 +1,72 @@
+"""
+Benchmark: cost of leaving the profiler and slow-request capture compiled in.
+
+Per-request cost of `SlowRequestMiddleware` around a trivial ASGI app, with
+capture off (the default) and on (threshold far above the request time, so
+only the in-flight bookkeeping runs), against calling the app directly. Then
+the cost of one stack sample of every thread (with IDLE_THREADS parked
+workers, like the belt-cv pool), which the watchdog and `profile()` pay per
+tick off the request path.
+
+Run from the `python/` directory:
+    python -m app.bench.profiler_overhead
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from app.services.profiler import SlowRequestMiddleware, sample_stacks, slow_requests
+
+REQUESTS = 100000
+ROUNDS = 5
+IDLE_THREADS = 8
+SCOPE = {"type": "http", "method": "GET", "path": "/dashboard/Picking"}
+
+
+async def _app(scope, receive, send) -> None:
+    pass
+
+
+async def _loop(app) -> float:
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(SCOPE, None, None)
+    return time.perf_counter() - started
+
+
+def _ns_per_request(app) -> float:
+    return min(asyncio.run(_loop(app)) for _ in range(ROUNDS)) / REQUESTS * 1e9
+
+
+def main() -> None:
+    middleware = SlowRequestMiddleware(_app)
+    bare = _ns_per_request(_app)
+    off = _ns_per_request(middleware)
+    slow_requests.configure(60_000)
+    try:
+        on = _ns_per_request(middleware)
+    finally:
+        slow_requests.configure(0)
+    print(f"{'app only':>24}: {bare:7.0f} ns/request")
+    print(f"{'middleware, capture off':>24}: {off:7.0f} ns/request ({off - bare:+5.0f})")
+    print(f"{'middleware, capture on':>24}: {on:7.0f} ns/request ({on - bare:+5.0f})")
+
+    release = threading.Event()
+    workers = [threading.Thread(target=release.wait, name=f"belt-cv_{n}") for n in range(IDLE_THREADS)]
+    for worker in workers:
+        worker.start()
+    try:
+        me = threading.get_ident()
+        started = time.perf_counter()
+        for _ in range(1000):
+            list(sample_stacks(me))
+        elapsed = (time.perf_counter() - started) / 1000
+    finally:
+        release.set()
+    print(f"stack sample of {len(workers) + 1} threads: {elapsed * 1e6:6.1f} µs per tick")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Throughput benchmark: one HTTP request per Pub/Sub message vs. the batch
+endpoint (`/actions/pubsub/batch`) at a few batch sizes.
+
+Uses FastAPI's TestClient (ASGI in-process, no network), with logging and
+prints silenced, so the numbers show the per-request and per-event
+overhead that batching removes.
+
+Run from the `python/` directory:
+    python -m app.bench.pubsub_batch
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import logging
+import time
+
+from fastapi.testclient import TestClient
+
+from app.bench.envelopes import mixed
+from app.data.dedupe import ingest_dedupe
+from app.main import create_app
+from datadog_logger import DATADOG_LOGGER_NAME
+
+MESSAGES = 4000
+BATCH_SIZES = (50, 200, 1000)
+PUSH_PATHS = {
+    "jobs-action": "/actions/pubsub/jobs-action",
+    "geek-pickorder": "/actions/pubsub/geek-pickorder",
+    "geek-putaway": "/actions/pubsub/geek-putaway",
+}
+
+
+def main() -> None:
+    logging.getLogger(DATADOG_LOGGER_NAME).setLevel(logging.CRITICAL)
+    items = mixed(MESSAGES)
+    rows = []
+
+    with TestClient(create_app()) as client, contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        for topic, envelope in items:
+            client.post(PUSH_PATHS[topic], json=envelope)
+        rows.append(("per-message", MESSAGES / (time.perf_counter() - started)))
+
+        for size in BATCH_SIZES:
+            ingest_dedupe.clear()   # same envelopes again: measure work, not dedupe hits
+            started = time.perf_counter()
+            for offset in range(0, MESSAGES, size):
+                chunk = items[offset:offset + size]
+                response = client.post("/actions/pubsub/batch", json={
+                    "messages": [{"topic": t, "envelope": e} for t, e in chunk],
+                })
+                assert response.json()["nacked"] == 0
+            rows.append((f"batch {size}", MESSAGES / (time.perf_counter() - started)))
+
+    baseline = rows[0][1]
+    for name, rate in rows:
+        print(f"{name:>12}: {rate:9.0f} msg/s  ({rate / baseline:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Shared-state backend check: the same event stream applied through the
+in-memory backend and through `RedisBackend` (two "instances" sharing one
+Redis) must produce the same dashboards, and ingest must stay at one
+pipelined round-trip per batch.
+
+Uses fakeredis by default; set REDIS_URL to run against a real server (the
+`dash-bench` key prefix is flushed first).
+
+Run from the `python/` directory:
+    python -m app.bench.redis_backend
+"""
+from __future__ import annotations
+
+import os
+import random
+import time
+from datetime import datetime, timezone
+
+from app.data import store
+from app.data.aggregation import JobEvent
+from app.data.backends import InMemoryBackend, RedisBackend
+from app.services import persistence
+
+EVENTS = 20_000
+BATCH = 100
+OPERATORS = 40
+SPEED_TOLERANCE = 0.02   # Redis keeps operator windows in 10 s buckets
+
+
+class _CountingClient:
+    """Proxy counting round-trips (plain commands and pipeline executions)."""
+
+    def __init__(self, client) -> None:
+        self._client = client
+        self.round_trips = 0
+
+    def pipeline(self, *args, **kwargs):
+        pipe = self._client.pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def counted_execute(*a, **kw):
+            self.round_trips += 1
+            return execute(*a, **kw)
+
+        pipe.execute = counted_execute
+        return pipe
+
+    def __getattr__(self, name):
+        command = getattr(self._client, name)
+
+        def counted(*args, **kwargs):
+            self.round_trips += 1
+            return command(*args, **kwargs)
+        return counted
+
+
+def _client():
+    url = os.getenv("REDIS_URL")
+    if url:
+        import redis
+
+        client = redis.Redis.from_url(url)
+        for key in client.scan_iter("dash-bench:*"):
+            client.delete(key)
+        return client
+    import fakeredis
+
+    return fakeredis.FakeRedis()
+
+
+def _events(keys: list[str], start_ts: float) -> list[tuple[str, JobEvent]]:
+    rng = random.Random(3)
+    out = []
+    for i in range(EVENTS):
+        key = rng.choice(keys)
+        lines = rng.randint(1, 9)
+        out.append((key, JobEvent(start_ts + i * 0.2, f"op-{rng.randrange(OPERATORS)}", key.title(), "", lines, lines)))
+    return out
+
+
+def _snapshot(backend, key: str, now: datetime) -> dict:
+    store.configure_backend(backend)
+    data = store.get_snapshot(key, now).model_dump(mode="json")
+    data.pop("version")
+    return data
+
+
+def main() -> None:
+    templates = {key: persistence.load_dashboard(persistence.dump_dashboard(db)) for key, db in store._db.items()}
+    memory = InMemoryBackend({key: persistence.load_dashboard(persistence.dump_dashboard(db)) for key, db in templates.items()})
+    client = _CountingClient(_client())
+    instance_a = RedisBackend(client, templates, prefix="dash-bench")
+    instance_b = RedisBackend(client, templates, prefix="dash-bench")
+
+    keys = [key for key in templates if key != "default"]
+    start_ts = time.time() - EVENTS * 0.2
+    events = _events(keys, start_ts)
+    now = datetime.fromtimestamp(events[-1][1].ts + 5, timezone.utc)
+
+    for offset in range(0, EVENTS, BATCH):
+        chunk = events[offset:offset + BATCH]
+        for key in keys:
+            memory.apply_events(key, [e for k, e in chunk if k == key])
+
+    started = time.perf_counter()
+    round_trips = client.round_trips
+    for n, offset in enumerate(range(0, EVENTS, BATCH)):
+        chunk = events[offset:offset + BATCH]
+        target = instance_a if n % 2 else instance_b   # writes land on either instance
+        by_key: dict[str, list[JobEvent]] = {}
+        for key, event in chunk:
+            by_key.setdefault(key, []).append(event)
+        for key, batch in by_key.items():
+            target.apply_events(key, batch)
+    elapsed = time.perf_counter() - started
+    calls = sum(len({k for k, _ in events[o:o + BATCH]}) for o in range(0, EVENTS, BATCH))
+    print(f"redis ingest: {EVENTS / elapsed:8.0f} events/s, {(client.round_trips - round_trips) / calls:.2f} round-trips per apply_events call")
+
+    mismatches = 0
+    for key in keys:
+        expected = _snapshot(memory, key, now)
+        for name, instance in (("a", instance_a), ("b", instance_b)):
+            actual = _snapshot(instance, key, now)
+            for person_e, person_a in zip(expected["people"], actual["people"]):
+                if abs(person_e["speed"] - person_a["speed"]) <= max(1, SPEED_TOLERANCE * person_e["speed"]):
+                    person_a["speed"] = person_e["speed"]
+            if expected != actual:
+                mismatches += 1
+                print(f"  {key} (instance {name}) differs:\n    memory {expected}\n    redis  {actual}")
+    store.configure_backend()
+    print(f"snapshots compared: {len(keys) * 2}, mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: per-event cost of the per-operator speed window.
+
+Compares the old "normalise the whole deque, then re-sum" update with
+`RollingWindow.add()` at increasing fill levels. The per-event cost of the
+rolling window should stay flat while the legacy path grows with the window.
+
+Run from the `python/` directory:
+    python -m app.bench.rolling_window
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+
+from app.data.rolling_window import MAX_SAMPLES, WINDOW_SECONDS, RollingWindow
+
+EVENTS_PER_STEP = 2000
+FILL_LEVELS = (0, 1000, 2000, 4000, MAX_SAMPLES)
+
+
+def _legacy_update(job_times: deque, ts: float, qty: int) -> tuple[deque, int]:
+    normalized = deque(maxlen=MAX_SAMPLES)
+    for entry in job_times:
+        t, q = entry
+        normalized.append((float(t), int(q)))
+    normalized.append((ts, qty))
+    cutoff = ts - WINDOW_SECONDS
+    while normalized and normalized[0][0] < cutoff:
+        normalized.popleft()
+    window = sum(max(q, 0) for t, q in normalized if t >= cutoff)
+    return normalized, window
+
+
+def _bench_legacy(fill: int) -> float:
+    ts = 0.0
+    job_times: deque = deque(maxlen=MAX_SAMPLES)
+    for _ in range(fill):
+        ts += 0.5
+        job_times.append((ts, 1))
+
+    started = time.perf_counter()
+    for _ in range(EVENTS_PER_STEP):
+        ts += 0.5
+        job_times, _ = _legacy_update(job_times, ts, 1)
+        # keep the fill level constant for this step
+        while len(job_times) > max(fill, 1):
+            job_times.popleft()
+    return (time.perf_counter() - started) / EVENTS_PER_STEP
+
+
+def _bench_window(fill: int) -> float:
+    ts = 0.0
+    window = RollingWindow(maxlen=max(fill, 1))
+    for _ in range(fill):
+        ts += 0.5
+        window.add(ts, 1)
+
+    started = time.perf_counter()
+    for _ in range(EVENTS_PER_STEP):
+        ts += 0.5
+        window.add(ts, 1)
+        _ = window.rate_per_hour
+    return (time.perf_counter() - started) / EVENTS_PER_STEP
+
+
+def main() -> None:
+    print(f"{'fill':>6} {'legacy µs/event':>16} {'window µs/event':>16} {'speed-up':>9}")
+    for fill in FILL_LEVELS:
+        legacy = _bench_legacy(fill)
+        rolling = _bench_window(fill)
+        print(f"{fill:>6} {legacy * 1e6:>16.2f} {rolling * 1e6:>16.2f} {legacy / rolling:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple, Optional
+
+from app.data.rolling_window import BucketRing
+from app.utils.MainUtils import get_or_create_person
+
+# ── Parameters ───────────────────────────────────────────────────────────────
+ROLLING_WINDOW = timedelta(minutes=60)   # size of the rolling KPI window
+KPI_BUCKET_SECONDS = 10                  # granularity of the dashboard KPI ring
+
+
+class JobEvent(NamedTuple):
+    """One normalised ingest event, as applied to a dashboard and journaled."""
+    ts: float
+    operator: str
+    job_type: str
+    comment: str
+    lines: int      # added to the operator's jobs and speed window
+    kpi_qty: int    # added to the dashboard's per-hour / today KPIs
+
+
+def new_kpi_ring() -> BucketRing:
+    return BucketRing(window_seconds=ROLLING_WINDOW.total_seconds(), bucket_seconds=KPI_BUCKET_SECONDS)
+
+
+def add_kpi_quantity(dashboard: Any, qty: int, now: datetime) -> None:
+    """Add `qty` to today's total and the rolling per-hour KPI of `dashboard`."""
+    # ----- Initialise KPI state if needed -----
+    if getattr(dashboard, "kpi_state", None) is None:
+        dashboard.kpi_state = {
+            "date": now.date(),
+            "total": 0,
+            "first_event_time": now,
+            "recent": new_kpi_ring(),
+        }
+
+    state = dashboard.kpi_state
+
+    # ----- Reset for a new day -----
+    if state.get("date") != now.date():
+        state["date"] = now.date()
+        state["total"] = 0
+        state["first_event_time"] = now
+        state["recent"] = new_kpi_ring()
+
+    # ----- Update totals -----
+    state["total"] += qty
+
+    # ----- Maintain rolling one-hour window (time-bucketed ring) -----
+    recent = state.get("recent")
+    if not isinstance(recent, BucketRing):
+        recent = state["recent"] = new_kpi_ring()
+    recent.add(now.timestamp(), qty)
+    per_hour = recent.rate_per_hour
+
+    # Assume [0] = per hour, [1] = total today
+    dashboard.kpis[0].value = round(per_hour, 0)
+    dashboard.kpis[1].value = state["total"]
+
+
+def apply_event(db: Any, event: JobEvent, now: Optional[datetime] = None) -> None:
+    """Apply one job event to an operator and the dashboard KPIs (live ingest and journal replay)."""
+    now = now or datetime.fromtimestamp(event.ts, timezone.utc)
+
+    # Get/create operator
+    person = get_or_create_person(db.people, event.operator, event.job_type, event.comment)
+
+    # Rolling window (running sum, expired from the head) and speed
+    job_times = person.job_times
+    job_times.add(event.ts, event.lines)
+    person.speed = int(round(job_times.rate_per_hour))
+
+    # Activity & metadata
+    person.jobs = (getattr(person, "jobs", 0) or 0) + event.lines
+    person.last_seen = now
+    person.idleSeconds = 0
+    person.category = event.job_type
+    person.comment = event.comment
+    db.people.touch(person)   # most recent first, evicts to the cold tier past MAX_PEOPLE
+
+    # KPI update
+    add_kpi_quantity(db, event.kpi_qty, now)
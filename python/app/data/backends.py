@@ -0,0 +1,399 @@
+"""
+State backends behind `store.get_db()`.
+
+`InMemoryBackend` is the original per-process `_db` dict. `RedisBackend`
+keeps the mutable state in Redis (or anything speaking its protocol, e.g.
+fakeredis) so several API instances/workers serve the same numbers:
+
+    dash:<key>:version          INCR per applied batch / field update
+    dash:<key>:ops              ZSET operator -> last_seen ts (recency order)
+    dash:<key>:op:<name>        HASH comment, category, jobs (HINCRBY)
+    dash:<key>:opw:<name>       HASH 10 s bucket -> lines (operator speed window)
+    dash:<key>:ring             HASH 10 s bucket -> qty (per-hour KPI; only the window is kept)
+    dash:<key>:totals           HASH YYYY-MM-DD (UTC) -> qty (today KPI; only today is kept)
+    dash:<key>:fields           HASH status / kpi:<i> overrides (belt levels)
+
+Every counter is a server-side HINCRBY/ZADD, so concurrent writers never
+lose updates, and a batch of events is one pipelined round-trip. Reads
+materialise a `Dashboard` (two round-trips) that the store turns into a
+snapshot at most once per second per instance. The client is synchronous;
+async code reaches it through `store.run_backend()` (a worker thread). Static configuration (titles,
+KPI labels) comes from the local dashboard templates.
+
+`AggregatorBackend` forwards the same operations over a Unix socket to a
+single aggregator process (`app.services.aggregator`) that owns an
+`InMemoryBackend`, so `uvicorn --workers N` shares one consistent state.
+"""
+from __future__ import annotations
+
+import json
+import socket
+import struct
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from app.data import journal
+from app.data.aggregation import KPI_BUCKET_SECONDS, ROLLING_WINDOW, JobEvent, apply_event
+from app.data.operator import OperatorRecord
+from app.data.registry import MAX_COLD_OPERATORS, MAX_HOT_OPERATORS, OperatorRegistry
+from app.models import Dashboard
+
+
+class StateBackend(ABC, Mapping):
+    """Mapping of store key -> Dashboard (read view) plus the write operations."""
+
+    #: True when `__getitem__` returns the live, process-local object.
+    local: bool = True
+
+    @abstractmethod
+    def apply_events(self, store_key: str, events: Iterable[JobEvent]) -> None:
+        """Apply job events to one dashboard."""
+
+    @abstractmethod
+    def set_fields(self, store_key: str, kpi_values: Dict[int, float], status: Optional[str] = None) -> None:
+        """Overwrite KPI values by index (and optionally the status)."""
+
+    @abstractmethod
+    def version(self, store_key: str) -> int:
+        """Change counter; raises KeyError for unknown dashboards."""
+
+    @abstractmethod
+    def bump(self, store_key: str) -> None:
+        """Record a change made outside `apply_events`/`set_fields`."""
+
+    @abstractmethod
+    def view(self, store_key: str, now: datetime) -> Dashboard:
+        """Dashboard to build the snapshot from."""
+
+    def has_people(self, store_key: str) -> bool:
+        return True
+
+    def prune(self, predicate: Callable[[Any], bool]) -> List[str]:
+        """Retire operators matching `predicate`; returns the changed keys."""
+        return []
+
+
+class InMemoryBackend(StateBackend, MutableMapping):
+    """The process-local dict of live `Dashboard` objects."""
+
+    local = True
+
+    def __init__(self, dashboards: Dict[str, Dashboard]) -> None:
+        self._dashboards = dashboards
+        self._versions: Dict[str, int] = {key: 0 for key in dashboards}
+
+    def __getitem__(self, store_key: str) -> Dashboard:
+        return self._dashboards[store_key]
+
+    def __setitem__(self, store_key: str, dashboard: Dashboard) -> None:
+        self._dashboards[store_key] = dashboard
+
+    def __delitem__(self, store_key: str) -> None:
+        del self._dashboards[store_key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._dashboards)
+
+    def __len__(self) -> int:
+        return len(self._dashboards)
+
+    def apply_events(self, store_key: str, events: Iterable[JobEvent]) -> None:
+        db = self._dashboards[store_key]
+        for event in events:
+            apply_event(db, event)
+            journal.append([event.ts, store_key, *event[1:]])
+
+    def set_fields(self, store_key: str, kpi_values: Dict[int, float], status: Optional[str] = None) -> None:
+        db = self._dashboards[store_key]
+        for index, value in kpi_values.items():
+            db.kpis[index].value = value
+        if status is not None:
+            db.status = status
+
+    def version(self, store_key: str) -> int:
+        if store_key not in self._dashboards:
+            raise KeyError(store_key)
+        return self._versions.get(store_key, 0)
+
+    def bump(self, store_key: str) -> None:
+        self._versions[store_key] = self._versions.get(store_key, 0) + 1
+
+    def view(self, store_key: str, now: datetime) -> Dashboard:
+        return self._dashboards[store_key]
+
+    def has_people(self, store_key: str) -> bool:
+        return bool(self._dashboards[store_key].people)
+
+    def prune(self, predicate: Callable[[Any], bool]) -> List[str]:
+        return [key for key, db in self._dashboards.items() if db.people.retire(predicate)]
+
+
+class RedisBackend(StateBackend):
+    """Shared state in Redis; `client` is a `redis.Redis` (or fakeredis) instance."""
+
+    local = False
+
+    def __init__(self, client: Any, templates: Dict[str, Dashboard], prefix: str = "dash",
+                 max_people: int = MAX_HOT_OPERATORS, max_operators: int = MAX_COLD_OPERATORS) -> None:
+        self.client = client
+        self.templates = templates
+        self.prefix = prefix
+        self.max_people = max_people
+        self.max_operators = max_operators
+        self.window_buckets = int(ROLLING_WINDOW.total_seconds() // KPI_BUCKET_SECONDS)
+        self.ttl = int(ROLLING_WINDOW.total_seconds()) + KPI_BUCKET_SECONDS
+        # Per dashboard: newest bucket already trimmed from `ring`, and the day
+        # `totals` was last trimmed to (what this instance knows of; others trim too).
+        self._trimmed_bucket: Dict[str, int] = {}
+        self._trimmed_day: Dict[str, str] = {}
+
+    def _key(self, store_key: str, *parts: str) -> str:
+        return ":".join((self.prefix, store_key, *parts))
+
+    # ── Mapping (read views) ────────────────────────────────────────────────
+    def __getitem__(self, store_key: str) -> Dashboard:
+        return self.view(store_key, datetime.now(timezone.utc))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.templates)
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def __contains__(self, store_key: object) -> bool:
+        return store_key in self.templates
+
+    # ── Writes ──────────────────────────────────────────────────────────────
+    def apply_events(self, store_key: str, events: Iterable[JobEvent]) -> None:
+        if store_key not in self.templates:
+            raise KeyError(store_key)
+        pipe = self.client.pipeline(transaction=False)
+        ops = self._key(store_key, "ops")
+        ring = self._key(store_key, "ring")
+        head, today = None, None
+        for event in events:
+            bucket = int(event.ts // KPI_BUCKET_SECONDS)
+            day = datetime.fromtimestamp(event.ts, timezone.utc).date().isoformat()
+            head = bucket if head is None else max(head, bucket)
+            today = day if today is None else max(today, day)
+            operator = self._key(store_key, "op", event.operator)
+            window = self._key(store_key, "opw", event.operator)
+            pipe.zadd(ops, {event.operator: event.ts}, gt=True)
+            pipe.hset(operator, mapping={"comment": event.comment, "category": event.job_type})
+            pipe.hincrby(operator, "jobs", event.lines)
+            pipe.hincrby(window, bucket, event.lines)
+            pipe.expire(window, self.ttl)
+            pipe.hincrby(ring, bucket, event.kpi_qty)
+            pipe.hincrby(self._key(store_key, "totals"), day, event.kpi_qty)
+        if head is not None:
+            # Buckets that left the window since the last trim; the TTL covers
+            # gaps longer than the window (every bucket is stale by then).
+            stale = head - self.window_buckets
+            first = max(self._trimmed_bucket.get(store_key, stale - self.window_buckets),
+                        stale - 2 * self.window_buckets) + 1
+            if first <= stale:
+                pipe.hdel(ring, *range(first, stale + 1))
+            pipe.expire(ring, self.ttl)
+            self._trimmed_bucket[store_key] = max(stale, self._trimmed_bucket.get(store_key, stale))
+        # Operators beyond `max_operators` are forgotten, like the registry's cold tier.
+        pipe.zrange(ops, 0, -(self.max_operators + 1))
+        pipe.zremrangebyrank(ops, 0, -(self.max_operators + 1))
+        pipe.incr(self._key(store_key, "version"))
+        trimmed = pipe.execute()[-3]
+        if trimmed:   # rare (only past `max_operators`): drop their hashes too
+            self.client.delete(*(self._key(store_key, kind, _text(name))
+                                 for name in trimmed for kind in ("op", "opw")))
+        if today is not None and self._trimmed_day.get(store_key) != today:
+            self._trim_totals(store_key, today)
+
+    def _trim_totals(self, store_key: str, today: str) -> None:
+        """Drop the daily totals of other days (once per day and dashboard)."""
+        totals = self._key(store_key, "totals")
+        old = [day for day in self.client.hkeys(totals) if _text(day) < today]
+        if old:
+            self.client.hdel(totals, *old)
+        self._trimmed_day[store_key] = today
+
+    def set_fields(self, store_key: str, kpi_values: Dict[int, float], status: Optional[str] = None) -> None:
+        if store_key not in self.templates:
+            raise KeyError(store_key)
+        mapping: Dict[str, Any] = {f"kpi:{index}": value for index, value in kpi_values.items()}
+        if status is not None:
+            mapping["status"] = status
+        pipe = self.client.pipeline(transaction=False)
+        if mapping:
+            pipe.hset(self._key(store_key, "fields"), mapping=mapping)
+        pipe.incr(self._key(store_key, "version"))
+        pipe.execute()
+
+    def version(self, store_key: str) -> int:
+        if store_key not in self.templates:
+            raise KeyError(store_key)
+        return int(self.client.get(self._key(store_key, "version")) or 0)
+
+    def bump(self, store_key: str) -> None:
+        pass   # every remote write already increments the shared version
+
+    # ── Reads ───────────────────────────────────────────────────────────────
+    def _window_sum(self, buckets: Dict[Any, Any], head: int) -> int:
+        low = head - self.window_buckets
+        return sum(int(qty) for bucket, qty in buckets.items() if low < int(bucket) <= head)
+
+    def view(self, store_key: str, now: datetime) -> Dashboard:
+        template = self.templates[store_key]
+        pipe = self.client.pipeline(transaction=False)
+        pipe.zrevrange(self._key(store_key, "ops"), 0, self.max_people - 1, withscores=True)
+        pipe.hgetall(self._key(store_key, "ring"))
+        pipe.hgetall(self._key(store_key, "totals"))
+        pipe.hgetall(self._key(store_key, "fields"))
+        recent, ring, totals, fields = pipe.execute()
+
+        names = [_text(name) for name, _ in recent]
+        pipe = self.client.pipeline(transaction=False)
+        for name in names:
+            pipe.hgetall(self._key(store_key, "op", name))
+            pipe.hgetall(self._key(store_key, "opw", name))
+        ring_head = max((int(b) for b in ring), default=None)
+        replies = pipe.execute()
+
+        rate = 3600 / ROLLING_WINDOW.total_seconds()
+        people: List[OperatorRecord] = []
+        for i, (name, score) in enumerate(recent):
+            info = {_text(k): _text(v) for k, v in replies[2 * i].items()}
+            last_seen = datetime.fromtimestamp(float(score), timezone.utc)
+            window = replies[2 * i + 1]
+            people.append(OperatorRecord(
+                name=names[i],
+                comment=info.get("comment", ""),
+                category=info.get("category", ""),
+                speed=int(round(self._window_sum(window, int(float(score) // KPI_BUCKET_SECONDS)) * rate)),
+                idleSeconds=0,
+                last_seen=last_seen,
+                jobs=int(info.get("jobs", 0)),
+            ))
+
+        kpis = [kpi.model_copy() for kpi in template.kpis]
+        if ring_head is not None and len(kpis) >= 2:
+            kpis[0].value = round(self._window_sum(ring, ring_head) * rate, 0)
+        if len(kpis) >= 2:
+            today = now.astimezone(timezone.utc).date().isoformat()
+            kpis[1].value = int(next((qty for day, qty in totals.items() if _text(day) == today), 0))
+        status = template.status
+        for field, value in fields.items():
+            field, value = _text(field), _text(value)
+            if field == "status":
+                status = value
+            elif field.startswith("kpi:") and int(field[4:]) < len(kpis):
+                kpis[int(field[4:])].value = float(value)
+
+        return Dashboard(
+            title=template.title,
+            status=status,
+            kpis=kpis,
+            historyText=template.historyText,
+            people=OperatorRegistry.restore(list(reversed(people)), []),
+            idleThreshold=template.idleThreshold,
+        )
+
+
+# ── Aggregator IPC (length-prefixed JSON frames over a Unix socket) ────────
+FRAME_HEADER = struct.Struct("!I")
+
+
+def encode_frame(message: Any) -> bytes:
+    body = json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+class AggregatorBackend(StateBackend):
+    """
+    Client side of the single-writer aggregator; one blocking connection per
+    worker, so async code calls it through `store.run_backend()`.
+    """
+
+    local = False
+
+    def __init__(self, path: str, templates: Dict[str, Dashboard], timeout: float = 5.0) -> None:
+        self.path = path
+        self.templates = templates
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()   # calls come from `run_backend` worker threads
+
+    def _call(self, message: Dict[str, Any]) -> Any:
+        frame = encode_frame(message)
+        with self._lock:
+            for attempt in (1, 2):
+                reused = self._sock is not None
+                try:
+                    if self._sock is None:
+                        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                        sock.settimeout(self.timeout)
+                        sock.connect(self.path)
+                        self._sock = sock
+                    self._sock.sendall(frame)
+                    (size,) = FRAME_HEADER.unpack(self._recv(FRAME_HEADER.size))
+                    reply = json.loads(self._recv(size))
+                    break
+                except OSError as exc:
+                    self.close()
+                    # Retry once on a fresh connection only if the kept-alive one
+                    # went stale; a timeout would just stall another `timeout`.
+                    if attempt == 2 or not reused or isinstance(exc, socket.timeout):
+                        raise
+        if "error" in reply:
+            if reply.get("kind") == "KeyError":
+                raise KeyError(message.get("key"))
+            raise RuntimeError(f"aggregator: {reply['error']}")
+        return reply.get("result")
+
+    def _recv(self, size: int) -> bytes:
+        chunks = []
+        while size:
+            chunk = self._sock.recv(size)
+            if not chunk:
+                raise ConnectionError("aggregator closed the connection")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    # ── Mapping (read views) ────────────────────────────────────────────────
+    def __getitem__(self, store_key: str) -> Dashboard:
+        return self.view(store_key, datetime.now(timezone.utc))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.templates)
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def __contains__(self, store_key: object) -> bool:
+        return store_key in self.templates
+
+    # ── Operations ──────────────────────────────────────────────────────────
+    def apply_events(self, store_key: str, events: Iterable[JobEvent]) -> None:
+        self._call({"op": "apply", "key": store_key, "events": [list(event) for event in events]})
+
+    def set_fields(self, store_key: str, kpi_values: Dict[int, float], status: Optional[str] = None) -> None:
+        self._call({"op": "fields", "key": store_key, "kpis": kpi_values, "status": status})
+
+    def version(self, store_key: str) -> int:
+        return self._call({"op": "version", "key": store_key})
+
+    def bump(self, store_key: str) -> None:
+        pass   # the aggregator bumps on every write it applies
+
+    def view(self, store_key: str, now: datetime) -> Dashboard:
+        return Dashboard.model_validate(self._call({"op": "view", "key": store_key}))
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
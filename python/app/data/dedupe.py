@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# ── Tuning knobs ────────────────────────────────────────────────────────────
+DEDUPE_MAX_ENTRIES = int(os.getenv("DEDUPE_MAX_ENTRIES", "200000"))
+DEDUPE_TTL_SECONDS = float(os.getenv("DEDUPE_TTL_SECONDS", str(6 * 60 * 60)))
+
+
+class DedupeIndex:
+    """
+    Bounded, time-expiring set of recently applied ingest keys (LRU + TTL).
+
+    All entries share one TTL, so insertion order is also expiry order:
+    expired keys are popped from the head and the oldest entry is evicted
+    when the index is full. Lookups and inserts are O(1) amortised.
+    """
+
+    def __init__(self, max_entries: int = DEDUPE_MAX_ENTRIES, ttl_seconds: float = DEDUPE_TTL_SECONDS) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._expires: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expire(self, now: float) -> None:
+        expires = self._expires
+        while expires:
+            key, deadline = next(iter(expires.items()))
+            if deadline > now:
+                break
+            del expires[key]
+
+    def seen(self, *keys: Optional[str], final: bool = True) -> bool:
+        """
+        True (and counted as a hit) if any of `keys` was applied within the TTL.
+
+        Routers check a message in two steps (messageId before decoding, then
+        the job key); the first step passes `final=False` so that a message
+        counts as one hit or one miss, not two lookups.
+        """
+        now = time.monotonic()
+        self._expire(now)
+        for key in keys:
+            if key is not None and key in self._expires:
+                self.hits += 1
+                return True
+        if final:
+            self.misses += 1
+        return False
+
+    def remember(self, *keys: Optional[str]) -> None:
+        """
+        Record `keys` as applied. Routers call this before awaiting the update,
+        so a concurrent redelivery already counts as a duplicate, and `forget()`
+        the keys if the update fails.
+        """
+        now = time.monotonic()
+        for key in keys:
+            if key is None:
+                continue
+            self._expires[key] = now + self.ttl_seconds
+            self._expires.move_to_end(key)
+        while len(self._expires) > self.max_entries:
+            self._expires.popitem(last=False)
+            self.evictions += 1
+
+    def forget(self, *keys: Optional[str]) -> None:
+        """Release keys reserved by `remember()` for an update that failed."""
+        for key in keys:
+            if key is not None:
+                self._expires.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._expires),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        self._expires.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+# Process-wide index shared by the push routers and the batch path. With
+# `--workers N` (aggregator or Redis backend) each worker has its own, so a
+# redelivery that lands on a different worker than the original is applied again.
+ingest_dedupe = DedupeIndex()
+
+
+def message_key(message: Any) -> Optional[str]:
+    """Key for the Pub/Sub messageId (same on every redelivery); needs no decoding."""
+    if not isinstance(message, dict):
+        return None
+    message_id = message.get("messageId") or message.get("message_id")
+    return f"msg:{message_id}" if message_id else None
+
+
+def payload_digest(payload: Any) -> str:
+    """
+    Short digest of a decoded payload: the same for a redelivered/republished
+    copy, different for any later event of the same job (new state, counts, times).
+    """
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def job_key(topic: str, *parts: Any) -> Optional[str]:
+    """Key for a job id derived by a router; None when the id is missing."""
+    if not parts or parts[-1] in (None, ""):
+        return None
+    return ":".join([topic, *(str(p) for p in parts)])
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+# ── Format ──────────────────────────────────────────────────────────────────
+# One JSON array per applied ingest event, one event per line:
+#   [ts, store_key, operator, job_type, comment, lines, kpi_qty]
+# Segments are numbered by snapshot generation: `journal.<gen>.jsonl` holds
+# the events applied after `snapshot.<gen>.json.gz` was taken.
+SEGMENT_PREFIX = "journal."
+SEGMENT_SUFFIX = ".jsonl"
+
+
+def segment_path(directory: Path, generation: int) -> Path:
+    return directory / f"{SEGMENT_PREFIX}{generation:06d}{SEGMENT_SUFFIX}"
+
+
+def segments(directory: Path, since: int = 0) -> List[tuple[int, Path]]:
+    """`(generation, path)` of journal segments with generation ≥ `since`, oldest first."""
+    found = []
+    for path in directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+        try:
+            generation = int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+        except ValueError:
+            continue
+        if generation >= since:
+            found.append((generation, path))
+    return sorted(found)
+
+
+def read_segment(path: Path) -> Iterator[list]:
+    """Yield records; a torn trailing line (crash mid-write) is skipped."""
+    with open(path, "rb") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, list) and len(record) == 7:
+                yield record
+
+
+def _drop_torn_tail(path: Path) -> None:
+    """Truncate a segment back to its last newline (a crash can leave half a record)."""
+    try:
+        fh = open(path, "rb+")
+    except FileNotFoundError:
+        return
+    with fh:
+        end = fh.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - (1 << 16))
+            fh.seek(start)
+            newline = fh.read(pos - start).rfind(b"\n")
+            if newline >= 0:
+                pos = start + newline + 1
+                break
+            pos = start
+        if pos != end:
+            fh.truncate(pos)
+
+
+class Journal:
+    """
+    Append-only event log. Writes go to a userspace buffer; `flush()` (called
+    periodically by the persistence task) pushes them to the OS, so the hot
+    path never blocks on disk.
+    """
+
+    def __init__(self, directory: Path, generation: int, fsync: bool = False) -> None:
+        self.directory = directory
+        self.fsync = fsync
+        self.generation = generation
+        self.appended = 0
+        self._fh = self._open(generation)
+
+    def _open(self, generation: int):
+        # Appending after a torn line would glue the next record onto it.
+        path = segment_path(self.directory, generation)
+        _drop_torn_tail(path)
+        return open(path, "a", encoding="utf-8", buffering=1 << 16)
+
+    def append(self, record: list) -> None:
+        self._fh.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False))
+        self._fh.write("\n")
+        self.appended += 1
+
+    def flush(self) -> None:
+        self._fh.flush()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+
+    def rotate(self, generation: int) -> None:
+        """Close the current segment and continue in `journal.<generation>`."""
+        self.flush()
+        self._fh.close()
+        self.generation = generation
+        self._fh = self._open(generation)
+
+    def close(self) -> None:
+        self.flush()
+        self._fh.close()
+
+
+# ── Active journal (set by the persistence service, None when disabled) ─────
+_active: Optional[Journal] = None
+
+
+def activate(journal: Optional[Journal]) -> None:
+    global _active
+    _active = journal
+
+
+def active() -> Optional[Journal]:
+    return _active
+
+
+def append(record: list) -> None:
+    """Record an applied ingest event; no-op when persistence is off."""
+    if _active is not None:
+        _active.append(record)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.data.rolling_window import RollingWindow
+
+# Fields of an operator as seen by the API (`app.models.Person`), in order
+PUBLIC_FIELDS = ("name", "comment", "category", "speed", "idleSeconds", "last_seen", "jobs")
+
+
+class OperatorRecord:
+    """
+    Internal, mutable state of one operator on a dashboard.
+
+    A plain `__slots__` object: events and ticks update it attribute by
+    attribute with no validation, and its speed history is an array-backed
+    `RollingWindow`. The pydantic `Person` is only built from it at the API
+    boundary (`Person.from_record`).
+    """
+
+    __slots__ = (*PUBLIC_FIELDS, "job_times")
+
+    def __init__(
+        self,
+        name: str,
+        comment: str = "",
+        category: str = "",
+        speed: int = 0,
+        idleSeconds: int = 0,
+        last_seen: Optional[datetime] = None,
+        jobs: int = 0,
+        job_times: Optional[RollingWindow] = None,
+    ) -> None:
+        self.name = name
+        self.comment = comment
+        self.category = category
+        self.speed = speed              # jobs/hour measured at the last event
+        self.idleSeconds = idleSeconds  # seconds since last activity
+        self.last_seen = last_seen
+        self.jobs = jobs                # total jobs handled
+        self.job_times = job_times if job_times is not None else RollingWindow()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public fields, the same shape as `Person.model_dump()`."""
+        return {field: getattr(self, field) for field in PUBLIC_FIELDS}
+
+    @classmethod
+    def from_public(cls, person: Any, job_times: Optional[RollingWindow] = None) -> "OperatorRecord":
+        """Record from anything carrying the public fields (a validated `Person`)."""
+        return cls(*(getattr(person, field) for field in PUBLIC_FIELDS), job_times=job_times)
+
+    def __repr__(self) -> str:
+        return f"OperatorRecord(name={self.name!r}, speed={self.speed}, jobs={self.jobs}, window={self.job_times!r})"
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Iterator, List, Optional
+
+# ── Tuning knobs ────────────────────────────────────────────────────────────
+MAX_HOT_OPERATORS  = 10    # operators shown on a dashboard (most recent first)
+MAX_COLD_OPERATORS = 500   # evicted operators kept with their history
+
+
+class OperatorRegistry:
+    """
+    Per-dashboard operator index.
+
+    `_hot` is an OrderedDict keyed by name in recency order (least recent
+    first), so lookups, "touch on activity" and "top N most recent" are all
+    O(1)/O(N) without sorting. Operators pushed out of the hot tier (or
+    retired for being idle) move to a bounded `_cold` LRU and are promoted
+    back with their rolling window and job count when they return.
+    """
+
+    __slots__ = ("max_hot", "max_cold", "_hot", "_cold")
+
+    def __init__(self, max_hot: int = MAX_HOT_OPERATORS, max_cold: int = MAX_COLD_OPERATORS) -> None:
+        self.max_hot = max_hot
+        self.max_cold = max_cold
+        self._hot: "OrderedDict[str, Any]" = OrderedDict()
+        self._cold: "OrderedDict[str, Any]" = OrderedDict()
+
+    # ── Lookup ──────────────────────────────────────────────────────────────
+    def get(self, name: str) -> Optional[Any]:
+        """Hot operator, or a cold one promoted back into the hot tier."""
+        person = self._hot.get(name)
+        if person is not None:
+            return person
+        person = self._cold.pop(name, None)
+        if person is not None:
+            # Promoted as the most recent, so eviction drops the real LRU operator.
+            self._hot[name] = person
+            self._evict()
+        return person
+
+    def add(self, person: Any) -> None:
+        """Insert `person` as the most recently active operator."""
+        self._hot[person.name] = person
+        self._hot.move_to_end(person.name)
+        self._evict()
+
+    def touch(self, person: Any) -> None:
+        """Mark `person` as the most recently active operator."""
+        if person.name not in self._hot:
+            self._cold.pop(person.name, None)
+            self._hot[person.name] = person
+        self._hot.move_to_end(person.name)
+        self._evict()
+
+    # ── Eviction ────────────────────────────────────────────────────────────
+    def _evict(self) -> None:
+        while len(self._hot) > self.max_hot:
+            name, person = self._hot.popitem(last=False)
+            self._to_cold(name, person)
+
+    def _to_cold(self, name: str, person: Any) -> None:
+        self._cold[name] = person
+        self._cold.move_to_end(name)
+        while len(self._cold) > self.max_cold:
+            self._cold.popitem(last=False)
+
+    def retire(self, predicate: Callable[[Any], bool]) -> int:
+        """Move hot operators matching `predicate` to the cold tier; returns how many."""
+        names = [name for name, person in self._hot.items() if predicate(person)]
+        for name in names:
+            self._to_cold(name, self._hot.pop(name))
+        return len(names)
+
+    # ── Views ───────────────────────────────────────────────────────────────
+    def most_recent(self) -> Iterator[Any]:
+        """Hot operators, most recently active first."""
+        return reversed(self._hot.values())
+
+    def cold(self) -> Iterator[Any]:
+        """Cold operators, least recently evicted first."""
+        return iter(self._cold.values())
+
+    def cold_count(self) -> int:
+        return len(self._cold)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._hot.values())
+
+    def __len__(self) -> int:
+        return len(self._hot)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._hot
+
+    def __repr__(self) -> str:
+        return f"OperatorRegistry(hot={len(self._hot)}, cold={len(self._cold)})"
+
+    @classmethod
+    def from_people(cls, people: List[Any]) -> "OperatorRegistry":
+        """Build from a plain list, ordered by each operator's `last_seen`."""
+        registry = cls()
+        for person in sorted(people, key=lambda p: p.last_seen.timestamp() if p.last_seen else float("-inf")):
+            registry.touch(person)
+        return registry
+
+    @classmethod
+    def restore(cls, hot: List[Any], cold: List[Any]) -> "OperatorRegistry":
+        """Rebuild from `__iter__()` / `cold()` order, e.g. when loading a snapshot."""
+        registry = cls()
+        for person in cold:
+            registry._to_cold(person.name, person)
+        for person in hot:
+            registry._hot[person.name] = person
+        registry._evict()
+        return registry
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from array import array
+from typing import Iterator, Tuple
+
+# ── Defaults ────────────────────────────────────────────────────────────────
+WINDOW_SECONDS = 60 * 60   # size of the rolling window (one hour)
+MAX_SAMPLES    = 6000      # hard cap on samples kept in the window
+
+
+class RollingWindow:
+    """
+    Time-based sliding window of `(timestamp, qty)` samples with a running sum.
+
+    Samples are appended at the tail and only ever expired from the head, so
+    `add()` and `expire()` cost O(1) amortised per event no matter how full
+    the window is. `total` and `rate_per_hour` are plain reads.
+
+    Samples live in two flat arrays (8-byte timestamp + 8-byte quantity, no
+    per-sample tuple or boxed numbers). Expiring only moves `_head`; the
+    dead prefix is cut off once it is larger than the live part.
+    """
+
+    __slots__ = ("window_seconds", "maxlen", "_ts", "_qty", "_head", "_total")
+
+    def __init__(self, window_seconds: float = WINDOW_SECONDS, maxlen: int = MAX_SAMPLES) -> None:
+        self.window_seconds = float(window_seconds)
+        self.maxlen = maxlen
+        self._ts = array("d")
+        self._qty = array("q")
+        self._head = 0     # index of the oldest live sample
+        self._total = 0
+
+    def add(self, ts: float, qty: int) -> None:
+        """Append a sample and drop whatever fell out of the window."""
+        qty = max(0, int(qty))
+        self._ts.append(ts)
+        self._qty.append(qty)
+        self._total += qty
+        if len(self._ts) - self._head > self.maxlen:
+            self._total -= self._qty[self._head]
+            self._advance(self._head + 1)
+        self.expire(ts)
+
+    def expire(self, now_ts: float) -> None:
+        """Drop samples older than the window from the head."""
+        cutoff = now_ts - self.window_seconds
+        ts, head, end = self._ts, self._head, len(self._ts)
+        if head == end or ts[head] >= cutoff:
+            return
+        qty = self._qty
+        while head < end and ts[head] < cutoff:
+            self._total -= qty[head]
+            head += 1
+        self._advance(head)
+
+    def _advance(self, head: int) -> None:
+        """Move the head; cut the dead prefix off once it outgrows the live part."""
+        if head > len(self._ts) - head:
+            del self._ts[:head]
+            del self._qty[:head]
+            head = 0
+        self._head = head
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def rate_per_hour(self) -> float:
+        hours = self.window_seconds / 3600 or 1
+        return self._total / hours
+
+    def __len__(self) -> int:
+        return len(self._ts) - self._head
+
+    def __iter__(self) -> Iterator[Tuple[float, int]]:
+        return zip(self._ts[self._head:], self._qty[self._head:])
+
+    def __repr__(self) -> str:
+        return f"RollingWindow(samples={len(self)}, total={self._total})"
+
+
+class BucketRing:
+    """
+    Fixed-size ring of per-`bucket_seconds` totals covering `window_seconds`.
+
+    Unlike `RollingWindow` it does not keep individual events: each event is
+    added to the bucket of its timestamp, and advancing the clock clears the
+    buckets that slid out of the window. Memory is constant per dashboard and
+    `total` is a running sum, so the per-hour KPI is an O(1) read.
+    """
+
+    __slots__ = ("bucket_seconds", "_counts", "_head", "_total")
+
+    def __init__(self, window_seconds: float = WINDOW_SECONDS, bucket_seconds: int = 10) -> None:
+        self.bucket_seconds = int(bucket_seconds)
+        self._counts = [0] * max(1, int(window_seconds // self.bucket_seconds))
+        self._head: int | None = None   # absolute index of the newest bucket
+        self._total = 0
+
+    @property
+    def window_seconds(self) -> int:
+        return len(self._counts) * self.bucket_seconds
+
+    def advance(self, now_ts: float) -> None:
+        """Move the head to `now_ts`, clearing buckets that left the window."""
+        idx = int(now_ts // self.bucket_seconds)
+        if self._head is None:
+            self._head = idx
+            return
+        steps = idx - self._head
+        if steps <= 0:
+            return
+
+        size = len(self._counts)
+        if steps >= size:
+            self._counts = [0] * size
+            self._total = 0
+        else:
+            counts = self._counts
+            for i in range(self._head + 1, idx + 1):
+                slot = i % size
+                self._total -= counts[slot]
+                counts[slot] = 0
+        self._head = idx
+
+    def add(self, ts: float, qty: int) -> None:
+        self.advance(ts)
+        idx = int(ts // self.bucket_seconds)
+        if self._head - idx >= len(self._counts):
+            return  # older than the window
+        self._counts[idx % len(self._counts)] += qty
+        self._total += qty
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def rate_per_hour(self) -> float:
+        return self._total * (3600 / self.window_seconds)
+
+    # ── Compact (JSON-friendly) form for snapshots ─────────────────────────
+    def to_compact(self) -> dict:
+        """`{"b": bucket_seconds, "n": size, "h": head, "c": [[age, qty], ...]}`, non-empty buckets only."""
+        size = len(self._counts)
+        counts = []
+        if self._head is not None:
+            for age in range(size):
+                qty = self._counts[(self._head - age) % size]
+                if qty:
+                    counts.append([age, qty])
+        return {"b": self.bucket_seconds, "n": size, "h": self._head, "c": counts}
+
+    @classmethod
+    def from_compact(cls, data: dict) -> "BucketRing":
+        ring = cls(window_seconds=data["b"] * data["n"], bucket_seconds=data["b"])
+        ring._head = data.get("h")
+        if ring._head is not None:
+            for age, qty in data.get("c", []):
+                ring._counts[(ring._head - age) % data["n"]] = qty
+                ring._total += qty
+        return ring
+
+    def __repr__(self) -> str:
+        return f"BucketRing(bucket_seconds={self.bucket_seconds}, total={self._total})"
@@ -1,19 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
+import os
+import secrets
 import threading
 import time
-from datetime import datetime, timezone, timedelta
-from typing import Dict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
 
-from app.models import Dashboard, Kpi
+from app.data.backends import AggregatorBackend, InMemoryBackend, RedisBackend, StateBackend
+from app.data.registry import MAX_HOT_OPERATORS
+from app.data.operator import OperatorRecord
+from app.models import Dashboard, DashboardSnapshot, Kpi, PersonSnapshot
+from app.services.metrics import FAST_BUCKETS, gauge, histogram
 
-# ── Tuning knobs ────────────────────────────────────────────────────────────
 # ── Tuning knobs ────────────────────────────────────────────────────────────
 DECAY_RATE           = 0.99     # 1 % speed drop **per second of idleness**
-IDLE_TICK_FALLBACK   = 1        # seconds to add if last_seen is None
-MAX_PEOPLE           = 10       # keep only the N most-recent operators
-TICK_INTERVAL        = 1.0      # seconds between background ticks
-IDLE_REMOVAL_SECONDS = 30 * 60  # NEW: remove from list if idle ≥ 30 minutes
+MAX_PEOPLE           = MAX_HOT_OPERATORS  # keep only the N most-recent operators
+PRUNE_INTERVAL       = 60.0     # seconds between idle-operator pruning passes
+IDLE_REMOVAL_SECONDS = 30 * 60  # remove from list if idle ≥ 30 minutes
+REMOTE_POLL_SECONDS  = 1.0      # how often streams re-check a shared backend's version
+AGGREGATOR_SOCKET    = "/tmp/sorting-dashboard.sock"
 
 # ── The “database” ──────────────────────────────────────────────────────────
 _db: Dict[str, Dashboard] = {
@@ -110,74 +118,241 @@ _db: Dict[str, Dashboard] = {
     ),
 }
 
-# ── Synchronisation primitives ──────────────────────────────────────────────
-_tick_lock      = threading.Lock()      # protects the critical section
-_shutdown_event = threading.Event()     # so we can cleanly exit if needed
+# ── Lazy decay (computed at read time) ──────────────────────────────────────
+def _as_utc(ts: datetime) -> datetime:
+    # Treat naive timestamps as UTC to avoid offset errors
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
 
 
-# ── Background ticker ───────────────────────────────────────────────────────
-def _tick_once() -> None:
-    now = datetime.now(timezone.utc)
+def idle_seconds(person: OperatorRecord, now: datetime) -> int:
+    """Seconds since the operator's last event (or the stored value if never seen)."""
+    if not person.last_seen:
+        return person.idleSeconds
+    return max(0, int((now - _as_utc(person.last_seen)).total_seconds()))
 
-    for db in _db.values():  # Loop over all dashboards
-        # First pass: update idleSeconds / speed
-        for p in db.people:
-            if p.last_seen:
-                if p.last_seen.tzinfo is None:
-                    # Treat naive timestamps as UTC to avoid offset errors
-                    p.last_seen = p.last_seen.replace(tzinfo=timezone.utc)
-                p.idleSeconds = int((now - p.last_seen).total_seconds())
-            else:
-                p.idleSeconds += IDLE_TICK_FALLBACK
 
-            if p.idleSeconds and p.speed:
-                p.speed = max(0, int(p.speed * DECAY_RATE))
+def decayed_speed(person: OperatorRecord, now: datetime) -> int:
+    """
+    `person.speed` holds the speed measured at the last event; the displayed
+    speed drops by `DECAY_RATE` per idle second, i.e. `speed * DECAY_RATE ** idle`.
+    """
+    idle = idle_seconds(person, now)
+    if not idle or not person.speed:
+        return person.speed
+    return max(0, int(person.speed * DECAY_RATE ** idle))
 
-        # NEW: prune people idle for too long (≥ 30 minutes)
-        db.people[:] = [p for p in db.people if (p.idleSeconds or 0) < IDLE_REMOVAL_SECONDS]
 
-        # Existing behavior: keep the most recently seen, then cap list length
-        db.people.sort(
-            key=lambda person: person.last_seen or datetime.min.replace(tzinfo=timezone.utc),
-            reverse=True,
-        )
-        db.people[:] = db.people[:MAX_PEOPLE]
+# ── State backend (in-memory by default, Redis for multi-instance) ─────────
+_backend: StateBackend = InMemoryBackend(_db)
 
 
-def _ticker_loop() -> None:
+def configure_backend(backend: Optional[StateBackend] = None) -> StateBackend:
     """
-    Runs in its own daemon thread; sleeps `TICK_INTERVAL` seconds between
-    calls to `_tick_once()`.
+    Install `backend`, or pick one from the environment: STATE_BACKEND=redis
+    with REDIS_URL uses a shared Redis, STATE_BACKEND=aggregator forwards to
+    the aggregator process at AGGREGATOR_SOCKET, anything else is the
+    in-process dict.
     """
-    while not _shutdown_event.is_set():
-        started = time.time()
-        with _tick_lock:
-            _tick_once()
-        # sleep the remainder of the interval (drift-corrected)
-        elapsed = time.time() - started
-        time_to_sleep = max(0.0, TICK_INTERVAL - elapsed)
-        if _shutdown_event.wait(time_to_sleep):
-            break
+    global _backend
+    if backend is None:
+        kind = os.getenv("STATE_BACKEND", "memory").lower()
+        if kind == "redis":
+            import redis  # optional dependency, only needed for the shared backend
 
+            client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+            backend = RedisBackend(client, templates=_db, prefix=os.getenv("REDIS_PREFIX", "dash"))
+        elif kind == "aggregator":
+            backend = AggregatorBackend(os.getenv("AGGREGATOR_SOCKET", AGGREGATOR_SOCKET), templates=_db)
+        else:
+            backend = InMemoryBackend(_db)
+    _backend = backend
+    _snapshots.clear()
+    return backend
 
-# Start the background thread exactly once at import time
-_thread = threading.Thread(target=_ticker_loop, daemon=True, name="decay-ticker")
-_thread.start()
 
+def get_backend() -> StateBackend:
+    return _backend
 
-# ── Public API ──────────────────────────────────────────────────────────────
-def get_db() -> Dict[str, Dashboard]:
+
+async def run_backend(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Call `fn(*args)` (a backend operation or a store function using it) from
+    async code: directly for the in-process dict, in a worker thread for
+    shared backends, whose calls block on network round-trips.
+    """
+    if _backend.local:
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+
+# ── Versioned snapshots (what the API serves) ───────────────────────────────
+_snapshots: Dict[str, Tuple[Tuple[int, int | None], DashboardSnapshot]] = {}
+_snapshot_ids = itertools.count(1)
+# Shared backends build snapshots in `run_backend` worker threads: one lock per
+# dashboard keeps check-build-publish atomic, so versions never step back.
+_snapshot_locks: Dict[str, threading.Lock] = {}
+# Snapshot versions restart at 1 on every boot and advance independently per
+# worker/instance; ETags pair them with this nonce so they never collide.
+BOOT_ID = secrets.token_hex(4)
+
+
+_change_events: Dict[str, asyncio.Event] = {}
+
+
+def mark_changed(store_key: str) -> None:
+    """Signal that `store_key` was mutated so its snapshot gets rebuilt and streams wake up."""
+    _backend.bump(store_key)
+    wake_streams(store_key)
+
+
+def wake_streams(store_key: str) -> None:
+    """Wake this process's streams on `store_key` without a new version (e.g. a tile changed)."""
+    event = _change_events.pop(store_key, None)
+    if event is not None:
+        event.set()
+
+
+def current_version(store_key: str) -> int:
+    """Change counter of `store_key` (bumped by every `mark_changed()`)."""
+    return _backend.version(store_key)
+
+
+async def wait_for_change(store_key: str, seen_version: int, timeout: float | None = None) -> bool:
+    """Wait until `store_key` moves past `seen_version`; False on timeout."""
+    if await run_backend(current_version, store_key) != seen_version:
+        return True
+    if _backend.local:
+        event = _change_events.setdefault(store_key, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    # Shared backend: local writes wake us up, other instances' are polled.
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        step = REMOTE_POLL_SECONDS if deadline is None else min(REMOTE_POLL_SECONDS, deadline - time.monotonic())
+        if step <= 0:
+            return False
+        event = _change_events.setdefault(store_key, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), step)
+            return True
+        except asyncio.TimeoutError:
+            if await run_backend(current_version, store_key) != seen_version:
+                return True
+
+
+def get_snapshot(store_key: str, now: datetime | None = None) -> DashboardSnapshot:
     """
-    Return the singleton Dashboard.
+    Return the current immutable snapshot of a dashboard.
 
-    No decay is applied here any more – the dedicated ticker thread already
-    takes care of it once per second, regardless of how often (or seldom)
-    you call `get_db()`.
+    The snapshot is rebuilt only when the dashboard was marked changed or, if
+    it shows operators, when the clock moved to a new second (idle timers and
+    decayed speeds). A rebuild that yields the same content keeps the old
+    snapshot and its version. Raises KeyError for unknown dashboards.
     """
-    return _db
+    backend = _backend
+    lock = _snapshot_locks.get(store_key) or _snapshot_locks.setdefault(store_key, threading.Lock())
+    with lock:
+        now = now or datetime.now(timezone.utc)   # read under the lock: never older than the cached build
+        stamp = (backend.version(store_key), int(now.timestamp()) if backend.has_people(store_key) else None)
 
+        cached = _snapshots.get(store_key)
+        if cached and cached[0] == stamp:
+            return cached[1]
 
-# (Optional) helper so your app can shut down cleanly if you ever need it
-def stop_decay_thread() -> None:
-    _shutdown_event.set()
-    _thread.join(timeout=1)
+        previous = cached[1] if cached else None
+        with histogram("dashboard.snapshot_build", FAST_BUCKETS, dashboard=store_key).time():
+            snapshot = _build_snapshot(backend.view(store_key, now), now, version=previous.version if previous else 0)
+        if previous is None or snapshot != previous:
+            snapshot = snapshot.model_copy(update={"version": next(_snapshot_ids)})
+        else:
+            snapshot = previous
+        _snapshots[store_key] = (stamp, snapshot)
+        return snapshot
+
+
+def _build_snapshot(db: Dashboard, now: datetime, version: int) -> DashboardSnapshot:
+    """Presentation view: decayed speeds, stale operators dropped, `MAX_PEOPLE` most recent."""
+    people = []
+    for p in db.people.most_recent():
+        idle = idle_seconds(p, now)
+        if idle >= IDLE_REMOVAL_SECONDS:
+            continue
+        people.append(PersonSnapshot(
+            name=p.name,
+            comment=p.comment,
+            category=p.category,
+            speed=decayed_speed(p, now),
+            idleSeconds=idle,
+            last_seen=p.last_seen,
+            jobs=p.jobs,
+        ))
+        if len(people) >= MAX_PEOPLE:
+            break
+
+    return DashboardSnapshot(
+        title=db.title,
+        status=db.status,
+        kpis=[kpi.model_copy() for kpi in db.kpis],
+        historyText=db.historyText,
+        people=people,
+        idleThreshold=db.idleThreshold,
+        version=version,
+    )
+
+
+# ── Periodic pruning (asyncio task owned by the app lifespan) ───────────────
+def prune_idle_people(now: datetime | None = None) -> int:
+    """Move operators idle ≥ `IDLE_REMOVAL_SECONDS` to the cold tier (history is kept)."""
+    now = now or datetime.now(timezone.utc)
+    changed = _backend.prune(lambda p: idle_seconds(p, now) >= IDLE_REMOVAL_SECONDS)
+    for key in changed:
+        mark_changed(key)
+    return len(changed)
+
+
+async def run_pruner(interval: float = PRUNE_INTERVAL) -> None:
+    """Prune idle operators every `interval` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        prune_idle_people()
+
+
+# ── Size gauges (evaluated on /metrics scrapes) ─────────────────────────────
+def _local_dashboards():
+    # Shared backends keep people out of process; only the local dict is sized.
+    return _backend.items() if _backend.local else ()
+
+
+def _people_sizes():
+    for key, db in _local_dashboards():
+        yield {"dashboard": key, "tier": "hot"}, len(db.people)
+        yield {"dashboard": key, "tier": "cold"}, db.people.cold_count()
+
+
+def _window_sizes():
+    for key, db in _local_dashboards():
+        samples = sum(len(p.job_times) for p in db.people) + sum(len(p.job_times) for p in db.people.cold())
+        yield {"dashboard": key}, samples
+
+
+gauge("dashboard.people", _people_sizes, "Operators per dashboard and registry tier")
+gauge("dashboard.window_samples", _window_sizes, "Samples held in operators' rolling windows")
+
+
+# ── Public API ──────────────────────────────────────────────────────────────
+def get_db() -> StateBackend:
+    """
+    Return the dashboards (a mapping of store key -> Dashboard) of the
+    configured backend.
+
+    Stored speeds are the values measured at each operator's last event; use
+    `get_snapshot()` for the idle/decayed values shown on the screens. Write
+    through `apply_events()` / `set_fields()` and call `mark_changed()`
+    afterwards; with the in-memory backend the Dashboards are the live objects.
+    From async code, call backend operations through `run_backend()`.
+    """
+    return _backend
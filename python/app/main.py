@@ -1,9 +1,44 @@
 
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 
-from app.routers import dashboard, sortingBeltAnalyser, \
-    PostJobsActionToDashboard, PostGeekPutAway, PostGeekPickOrder  # import other routers as you add them
+from app.data import store
+from app.routers import dashboard, sortingBeltAnalyser, monitoring, admin, \
+    PostJobsActionToDashboard, PostGeekPutAway, PostGeekPickOrder, PostPubSubBatch  # import other routers as you add them
+from app.services.manual_finish import start_manual_finish_refresher
+from app.services.cv_pool import shutdown_pool
+from app.services.persistence import start_persistence
+from app.services.profiler import SlowRequestMiddleware, start_slow_request_capture, stop_slow_request_capture
+from app.services.pubsub_pull import start_pull_subscribers
+from datadog_logger import start_log_writer, stop_log_writer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background work lives on the event loop, started with the app (not at import).
+    start_log_writer()
+    start_slow_request_capture()   # only when SLOW_REQUEST_MS > 0
+    store.configure_backend()   # STATE_BACKEND=redis shares state across instances
+    tasks = [
+        *start_persistence(),   # restores state before anything is served
+        asyncio.create_task(store.run_pruner(), name="idle-pruner"),
+        *start_manual_finish_refresher(),
+        *start_pull_subscribers(),
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        shutdown_pool()
+        stop_slow_request_capture()
+        stop_log_writer()
 
 
 def create_app() -> FastAPI:
@@ -16,20 +51,25 @@ def create_app() -> FastAPI:
         "https://sorting-dashboard-web-208732756826.europe-west4.run.app",
     ]
 
-    app = FastAPI(title="Sorting Dashboard API", version="1.0.0", docs_url="/")
+    app = FastAPI(title="Sorting Dashboard API", version="1.0.0", docs_url="/", lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
         allow_origins=ALLOWED_ORIGINS,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag"],
     )
+    app.add_middleware(SlowRequestMiddleware)   # pass-through unless slow-request capture is on
 
     app.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
     app.include_router(sortingBeltAnalyser.router, prefix="/analysis", tags=["analyse-belt"])
     app.include_router(PostJobsActionToDashboard.router, prefix="/actions", tags=["sorting-actions"])
     app.include_router(PostGeekPutAway.router, prefix="/actions", tags=["put-away"])
     app.include_router(PostGeekPickOrder.router, prefix="/actions", tags=["pick-order"])
+    app.include_router(PostPubSubBatch.router, prefix="/actions", tags=["pubsub-batch"])
+    app.include_router(monitoring.router, tags=["monitoring"])
+    app.include_router(admin.router, prefix="/admin", tags=["admin"], include_in_schema=False)
     return app
 
 
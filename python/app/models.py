@@ -1,10 +1,13 @@
-from collections import deque
 from datetime import datetime
 
-from pydantic import BaseModel, Field
-from typing import List, Literal, Deque, Optional, Dict, Tuple
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator
+from typing import List, Literal, Optional, Dict
 
-MAX_APM = 6000  # samples to keep for per-operator speed (covers the last hour)
+from app.data.operator import OperatorRecord
+from app.data.registry import OperatorRegistry
+from app.data.rolling_window import MAX_SAMPLES, BucketRing, RollingWindow
+
+MAX_APM = MAX_SAMPLES  # samples to keep for per-operator speed (covers the last hour)
 
 
 class Kpi(BaseModel):
@@ -14,6 +17,7 @@ class Kpi(BaseModel):
 
 
 class Person(BaseModel):
+    """API/serialisation view of an operator; live state is an `OperatorRecord`."""
     name: str
     comment: str
     category: str
@@ -21,14 +25,69 @@ class Person(BaseModel):
     idleSeconds: int    # seconds since last activity
     last_seen: datetime | None = None
     jobs: int = 0       # total jobs handled (optional but handy)
-    job_times: Deque[Tuple[float, int]] = Field(default_factory=lambda: deque(maxlen=MAX_APM))
+
+    @classmethod
+    def from_record(cls, record: OperatorRecord) -> "Person":
+        return cls(**record.to_dict())
+
+    def to_record(self, job_times: Optional[RollingWindow] = None) -> OperatorRecord:
+        return OperatorRecord.from_public(self, job_times=job_times)
 
 
 class Dashboard(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     title: str
     status: Literal["good", "risk", "bad"]
     kpis: List[Kpi]
     historyText: str
-    people: List[Person]
+    people: OperatorRegistry = Field(default_factory=OperatorRegistry)
     idleThreshold: int = 60
     kpi_state: Optional[Dict] = None
+
+    @field_validator("people", mode="before")
+    @classmethod
+    def _people_registry(cls, people):
+        # Accept a plain list of Person / dicts (e.g. `people=[]`), validate it and index the records.
+        if isinstance(people, list):
+            return OperatorRegistry.from_people([
+                p if isinstance(p, OperatorRecord) else Person.model_validate(p).to_record() for p in people
+            ])
+        return people
+
+    @field_serializer("people")
+    def _serialize_people(self, people: OperatorRegistry) -> List[Dict]:
+        return [p.to_dict() for p in people.most_recent()]
+
+    @field_serializer("kpi_state")
+    def _serialize_kpi_state(self, state: Optional[Dict]) -> Optional[Dict]:
+        # The rolling KPI ring is stored in its compact form.
+        if not state:
+            return state
+        return {k: v.to_compact() if isinstance(v, BucketRing) else v for k, v in state.items()}
+
+
+# ── Wire models (what the API returns) ──────────────────────────────────────
+class PersonSnapshot(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    comment: str
+    category: str
+    speed: int
+    idleSeconds: int
+    last_seen: datetime | None = None
+    jobs: int = 0
+
+
+class DashboardSnapshot(BaseModel):
+    """Immutable, versioned view of a Dashboard without internal state."""
+    model_config = ConfigDict(frozen=True)
+
+    title: str
+    status: Literal["good", "risk", "bad"]
+    kpis: List[Kpi]
+    historyText: str
+    people: List[PersonSnapshot]
+    idleThreshold: int = 60
+    version: int = 0
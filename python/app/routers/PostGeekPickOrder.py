@@ -14,13 +14,14 @@ Final URL in that case: /actions/pubsub/geek-putaway
 """
 from __future__ import annotations
 
-import base64
-import json
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, HTTPException, Request
 
+from app.data.dedupe import ingest_dedupe, job_key, message_key
+from app.services.metrics import histogram, timed
+from app.utils.jobExtractors.EnvelopeDecoder import decode_message_data
 from app.utils.jobExtractors.UpdateJobsStoreMetrics import (
     update_jobs_store_metric,
 )
@@ -29,41 +30,28 @@ from datadog_logger import log_datadog_event
 
 router = APIRouter()
 
-@router.post("/pubsub/geek-pickorder")
-async def handle_geek_pickorder_push(request: Request):
-    try:
-        outer = await request.json()
-    except Exception as exc:
-        log_datadog_event(
-            status="error",
-            message=f"PubSub envelope not valid JSON: {exc}",
-            event_type="geek.pickorder",
-            function_name="handle_geek_pickorder_push",
-        )
-        raise HTTPException(status_code=400, detail=f"PubSub envelope not valid JSON: {exc}")
+def parse_geek_pickorder(outer: Dict[str, Any]) -> Dict[str, Any]:
+    """Step 1: Pub/Sub base64 decode of `message.data`."""
+    return decode_message_data(outer.get("message", {}))
 
-    # ---- Step 1: Pub/Sub base64 decode ----
-    try:
-        msg = outer.get("message", {})
-        encoded = msg.get("data")
-        if not encoded:
-            raise ValueError("Missing 'message.data' field in Pub/Sub envelope")
 
-        decoded_bytes = base64.b64decode(encoded)
-        body = json.loads(decoded_bytes)
+def _first_order(body: Dict[str, Any]) -> Dict[str, Any]:
+    order_list = body.get("body", {}).get("order_list", [])
+    return order_list[0] if order_list else {}
+
+
+def geek_pickorder_dedupe_key(body: Dict[str, Any]) -> Optional[str]:
+    return job_key("geek-pickorder", _first_order(body).get("out_order_code"))
 
-    except Exception as exc:
-        log_datadog_event(
-            status="error",
-            message=f"Failed to decode Geek message.data: {exc}",
-            event_type="geek.pickorder",
-            function_name="handle_geek_pickorder_push",
-        )
-        raise HTTPException(status_code=400, detail=f"Failed to decode message.data: {exc}")
 
+def decode_geek_pickorder(outer: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode a Geek pick-order push envelope into the dashboard job_data shape."""
+    return build_geek_pickorder_job(parse_geek_pickorder(outer))
+
+
+def build_geek_pickorder_job(body: Dict[str, Any]) -> Dict[str, Any]:
     # ---- Step 2: Extract Geek structure ----
-    order_list = body.get("body", {}).get("order_list", [])
-    first_order = order_list[0] if order_list else {}
+    first_order = _first_order(body)
     containers = first_order.get("container_list", [])
     first_container = containers[0] if containers else {}
 
@@ -82,12 +70,11 @@ async def handle_geek_pickorder_push(request: Request):
     warehouse = first_order.get("warehouse_code") or body.get("header", {}).get("warehouse_code")
 
     # ---- Step 5: job_data for dashboard ----
-    job_data: Dict[str, Any] = {
+    return {
         "HEADER_ID": job_id,
         "EMPLOYEE_CODE": picker,
         "HIGH_OVER_PROCESS": "GeekPicking",
         "ORIGINAL_EVENT_TIME": first_order.get("finish_date"),
-        "RAW_GEEK": body,
         "ACTION": "feedback_outbound_order",
         "ACTIVITY": "pickorder",
         "DEPOT": warehouse,
@@ -95,7 +82,51 @@ async def handle_geek_pickorder_push(request: Request):
         "NUMBER_OF_LINES": number_of_lines,   # 🔥 the unified metric
     }
 
-    update_result = await update_jobs_store_metric(job_data)
+
+@router.post("/pubsub/geek-pickorder")
+@timed(histogram("ingest.request", topic="geek-pickorder"))
+async def handle_geek_pickorder_push(request: Request):
+    try:
+        outer = await request.json()
+    except Exception as exc:
+        log_datadog_event(
+            status="error",
+            message=f"PubSub envelope not valid JSON: {exc}",
+            event_type="geek.pickorder",
+            function_name="handle_geek_pickorder_push",
+        )
+        raise HTTPException(status_code=400, detail=f"PubSub envelope not valid JSON: {exc}")
+
+    # ---- Step 0: redelivered message? (no decoding needed) ----
+    msg_key = message_key(outer.get("message"))
+    if ingest_dedupe.seen(msg_key, final=False):
+        return _duplicate(None)
+
+    # ---- Step 1: decode, dedupe on out_order_code, build job_data ----
+    try:
+        body = parse_geek_pickorder(outer)
+        dedupe_key = geek_pickorder_dedupe_key(body)
+        if ingest_dedupe.seen(dedupe_key):
+            return _duplicate(_first_order(body).get("out_order_code"))
+        job_data = build_geek_pickorder_job(body)
+    except Exception as exc:
+        log_datadog_event(
+            status="error",
+            message=f"Failed to decode Geek message.data: {exc}",
+            event_type="geek.pickorder",
+            function_name="handle_geek_pickorder_push",
+        )
+        raise HTTPException(status_code=400, detail=f"Failed to decode message.data: {exc}")
+
+    job_id = job_data["HEADER_ID"]
+    number_of_lines = job_data["NUMBER_OF_LINES"]
+
+    ingest_dedupe.remember(msg_key, dedupe_key)   # reserved before the await, released on failure
+    try:
+        update_result = await update_jobs_store_metric(job_data)
+    except Exception:
+        ingest_dedupe.forget(msg_key, dedupe_key)
+        raise
 
     now = datetime.now(timezone.utc).isoformat()
 
@@ -120,3 +151,15 @@ async def handle_geek_pickorder_push(request: Request):
         "NUMBER_OF_LINES": number_of_lines,
         "dashboard": "geek pickorders",
     }
+
+
+def _duplicate(job_id: Any) -> Dict[str, Any]:
+    log_datadog_event(
+        status="ok",
+        message=f"Duplicate Geek PickOrder {job_id} skipped",
+        event_type="geek.pickorder",
+        function_name="handle_geek_pickorder_push",
+        jobs_id=str(job_id) if job_id is not None else None,
+        extra={"duplicate": True},
+    )
+    return {"status": "duplicate", "job_id": job_id, "dashboard": "geek pickorders"}
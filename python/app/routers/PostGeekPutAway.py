@@ -14,14 +14,16 @@ Final URL in that case: /actions/pubsub/geek-putaway
 """
 from __future__ import annotations
 
-import base64
-import json
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, HTTPException, Request
 
+from app.data.dedupe import ingest_dedupe, job_key, message_key
+from app.services.metrics import histogram, timed
+from app.utils.jobExtractors.EnvelopeDecoder import decode_message_data, decode_nested
 from app.utils.jobExtractors.UpdateJobsStoreMetrics import (
+    ipg_quantity,
     update_jobs_store_metric,
 )
 from datadog_logger import log_datadog_event
@@ -32,38 +34,19 @@ router = APIRouter()
 # Decoding helpers
 # ──────────────────────────────────────────────────────────────────────────────
 
-def _try_b64_or_json(value: Any) -> Any:
-    if isinstance(value, (dict, list)):
-        return value
-    if isinstance(value, (bytes, bytearray)):
-        try:
-            return json.loads(value.decode("utf-8"))
-        except Exception as exc:  # noqa: BLE001
-            raise HTTPException(status_code=400, detail=f"Failed to parse bytes as JSON: {exc}")
-    if isinstance(value, str):
-        s = value.strip()
-        try:
-            decoded = base64.b64decode(s, validate=True)
-            return json.loads(decoded.decode("utf-8"))
-        except Exception:
-            pass
-        try:
-            return json.loads(s)
-        except Exception:
-            return value
-    return value
-
-
 def _decode_geek_event(envelope: Dict[str, Any]) -> Dict[str, Any]:
     if "data" not in envelope:
         raise HTTPException(status_code=400, detail="Missing 'data' field in payload")
 
-    outer = _try_b64_or_json(envelope["data"])
+    try:
+        outer = decode_nested(envelope["data"])
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Failed to parse bytes as JSON: {exc}")
     if not isinstance(outer, dict):
         raise HTTPException(status_code=400, detail="Outer data is not a JSON object")
 
     if isinstance(outer.get("data"), str):
-        inner_decoded = _try_b64_or_json(outer["data"])
+        inner_decoded = decode_nested(outer["data"])
         if isinstance(inner_decoded, dict):
             outer["data"] = inner_decoded
 
@@ -81,11 +64,59 @@ def _derive_header_id(decoded: Dict[str, Any], envelope: Dict[str, Any], body: D
     return str(uuid32 or hd_num or envelope.get("id") or body.get("id") or f"geek-{int(datetime.now(timezone.utc).timestamp())}")
 
 
+def is_pubsub_push(body: Dict[str, Any]) -> bool:
+    return "message" in body and isinstance(body["message"], dict) and "data" in body["message"]
+
+
+def parse_geek_putaway(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Base64 + JSON decode of a Google Pub/Sub push wrapper `{"message": {"data": ...}}`."""
+    return decode_message_data(body["message"])
+
+
+def geek_putaway_dedupe_key(payload: Dict[str, Any]) -> Optional[str]:
+    receipt_list = payload.get("body", {}).get("receipt_list", [])
+    receipt = receipt_list[0] if receipt_list else {}
+    return job_key(
+        "geek-putaway",
+        payload.get("uuid32") or receipt.get("receipt_code") or receipt.get("pallet_code"),
+    )
+
+
+def decode_geek_putaway(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode a Google Pub/Sub push wrapper `{"message": {"data": ...}}` into job_data."""
+    return build_geek_putaway_job(parse_geek_putaway(body))
+
+
+def build_geek_putaway_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    receipt_list = payload.get("body", {}).get("receipt_list", [])
+    receipt = receipt_list[0] if receipt_list else {}
+    job_id = (
+        receipt.get("receipt_code")
+        or receipt.get("pallet_code")
+        or str(receipt.get("id") or f"geek-{int(datetime.now(timezone.utc).timestamp())}")
+    )
+    qty = 0
+    for rec in receipt_list:
+        for sku in rec.get("sku_list", []) or []:
+            try:
+                qty += int(sku.get("amount", 0) or 0)
+            except Exception:
+                continue
+    return {
+        "HEADER_ID": job_id,
+        "EMPLOYEE_CODE": "Unknown",
+        "HIGH_OVER_PROCESS": "GeekInbound",
+        "QUANTITY": max(qty, 1),
+        "IPG_QUANTITY": ipg_quantity(payload),   # KPI quantity; the payload itself is not kept
+    }
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Endpoint
 # ──────────────────────────────────────────────────────────────────────────────
 
 @router.post("/pubsub/geek-putaway")
+@timed(histogram("ingest.request", topic="geek-putaway"))
 async def handle_geek_putaway_push(request: Request):
     """
     Dedicated endpoint for Geek Putaways subscription.
@@ -107,10 +138,16 @@ async def handle_geek_putaway_push(request: Request):
         )
         raise HTTPException(status_code=400, detail=f"Body is not valid JSON: {exc}")
 
-    if "message" in body and isinstance(body["message"], dict) and "data" in body["message"]:
+    if is_pubsub_push(body):
+        msg_key = message_key(body["message"])
+        if ingest_dedupe.seen(msg_key, final=False):
+            return _duplicate(None)
         try:
-            decoded_bytes = base64.b64decode(body["message"]["data"])
-            inner_json = json.loads(decoded_bytes.decode("utf-8"))
+            payload = parse_geek_putaway(body)
+            dedupe_key = geek_putaway_dedupe_key(payload)
+            if ingest_dedupe.seen(dedupe_key):
+                return _duplicate(dedupe_key)
+            job_data = build_geek_putaway_job(payload)
         except Exception as exc:
             log_datadog_event(
                 status="error",
@@ -119,30 +156,13 @@ async def handle_geek_putaway_push(request: Request):
                 function_name="handle_geek_putaway_push",
             )
             raise HTTPException(status_code=400, detail=f"Failed to decode message.data: {exc}")
-        # Merge header/body if present
-        payload = inner_json
-        receipt_list = payload.get("body", {}).get("receipt_list", [])
-        receipt = receipt_list[0] if receipt_list else {}
-        job_id = (
-            receipt.get("receipt_code")
-            or receipt.get("pallet_code")
-            or str(receipt.get("id") or f"geek-{int(datetime.now(timezone.utc).timestamp())}")
-        )
-        qty = 0
-        for rec in receipt_list:
-            for sku in rec.get("sku_list", []) or []:
-                try:
-                    qty += int(sku.get("amount", 0) or 0)
-                except Exception:
-                    continue
-        job_data: Dict[str, Any] = {
-            "HEADER_ID": job_id,
-            "EMPLOYEE_CODE": "Unknown",
-            "HIGH_OVER_PROCESS": "GeekInbound",
-            "RAW_GEEK": payload,
-            "QUANTITY": max(qty, 1),
-        }
-        update_result = await update_jobs_store_metric(job_data)
+        job_id = job_data["HEADER_ID"]
+        ingest_dedupe.remember(msg_key, dedupe_key)   # reserved before the await, released on failure
+        try:
+            update_result = await update_jobs_store_metric(job_data)
+        except Exception:
+            ingest_dedupe.forget(msg_key, dedupe_key)
+            raise
         now = datetime.now(timezone.utc).isoformat()
         log_datadog_event(
             status="ok",
@@ -154,3 +174,14 @@ async def handle_geek_putaway_push(request: Request):
         )
         print(f"✅ [Geek Putaway-PubSub] {job_id} qty={job_data['QUANTITY']} at {now} update={update_result}")
         return {"status": "success", "job_id": job_id, "dashboard": "geek putaways", "quantity": job_data["QUANTITY"]}
+
+
+def _duplicate(key: Optional[str]) -> Dict[str, Any]:
+    log_datadog_event(
+        status="ok",
+        message=f"Duplicate Geek Putaway skipped ({key or 'messageId'})",
+        event_type="geek.putaway",
+        function_name="handle_geek_putaway_push",
+        extra={"duplicate": True},
+    )
+    return {"status": "duplicate", "dashboard": "geek putaways"}
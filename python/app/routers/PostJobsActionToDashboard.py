@@ -1,17 +1,12 @@
-import base64
-import json
-from collections import deque
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from app.data.store import get_db
-from app.models import Person
-from app.utils.MainUtils import get_or_create_person
-from app.utils.jobExtractors.JobMetricExtractor import extract_fma_metrics, extract_monopicking_metrics, \
-    extract_inbound_and_bulk_metrics, extract_returns_metrics, extract_errorlanes_metrics
+from app.data.dedupe import ingest_dedupe, job_key, message_key, payload_digest
+from app.services.metrics import histogram, timed
+from app.utils.jobExtractors.EnvelopeDecoder import decode_message_data
+from app.utils.jobExtractors.JobMetricExtractor import JOB_TYPE_TO_EXTRACTOR
 from app.utils.jobExtractors.UpdateJobsStoreMetrics import update_jobs_store_metric
 from datadog_logger import log_datadog_event
 
@@ -23,16 +18,35 @@ class PubSubMessage(BaseModel):
     subscription: str
 
 
+def decode_jobs_action(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode the base64 JSON `message.data` of a jobs-action push into job_data."""
+    return decode_message_data(message)
+
+
+def jobs_action_dedupe_key(job_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Job type + HEADER_ID + a digest of the event itself: a header gets several
+    events (confirmation, line-count updates), only exact copies are duplicates.
+    """
+    header_id = job_data.get("HEADER_ID")
+    if header_id in (None, ""):
+        return None
+    job_type = (job_data.get("HIGH_OVER_PROCESS") or "").strip()
+    return job_key("jobs-action", job_type, header_id, payload_digest(job_data))
 
 
 # ── Endpoint ─────────────────────────────────────────────────────────────────
 @router.post("/pubsub/jobs-action")
+@timed(histogram("ingest.request", topic="jobs-action"))
 async def handle_pubsub_push(pubsub_msg: PubSubMessage):
+    # 0) Redelivered message? (no decoding needed) -----------------------------
+    msg_key = message_key(pubsub_msg.message)
+    if ingest_dedupe.seen(msg_key, final=False):
+        return _duplicate(None)
+
     # 1) Decode Pub/Sub payload ------------------------------------------------
     try:
-        data_b64: str = pubsub_msg.message.get("data", "")
-        decoded_json  = base64.b64decode(data_b64).decode("utf-8")
-        job_data: Dict[str, Any] = json.loads(decoded_json)
+        job_data: Dict[str, Any] = decode_jobs_action(pubsub_msg.message)
     except Exception as exc:
         log_datadog_event(
             status="error",
@@ -47,23 +61,15 @@ async def handle_pubsub_push(pubsub_msg: PubSubMessage):
 
     # 2) Extract useful fields -------------------------------------------------
     job_id        = job_data.get("HEADER_ID")
+    dedupe_key    = jobs_action_dedupe_key(job_data)
+    if ingest_dedupe.seen(dedupe_key):
+        return _duplicate(job_id)
     comment       = job_data.get("HIGH_OVER_PROCESS", "").strip()   # Change here
-    operator_name = job_data.get("EMPLOYEE_CODE", "").strip() or "Unknown"
-    now           = datetime.now(timezone.utc)
     job_type = comment  # Get the job type based on comment
 
-    # 3) Define a dictionary to map job types to their respective metric extractor functions
-    job_type_to_extractor = {
-        "Replenishment": extract_fma_metrics,
-        "Pick": extract_monopicking_metrics,
-        "Inbound": extract_inbound_and_bulk_metrics,
-        "Returns": extract_returns_metrics,
-        "Error lane": extract_errorlanes_metrics
-    }
-
-    # 4) Call the appropriate metric extraction function based on job type
+    # 3) Call the appropriate metric extraction function based on job type
     print(job_type)
-    extractor_function = job_type_to_extractor.get(job_type)
+    extractor_function = JOB_TYPE_TO_EXTRACTOR.get(job_type)
 
     if not extractor_function:
         log_datadog_event(
@@ -75,10 +81,15 @@ async def handle_pubsub_push(pubsub_msg: PubSubMessage):
         )
         raise HTTPException(status_code=200, detail=f"Unsupported job type: {job_type}")
 
-    job_metrics = await extractor_function(job_data)
+    job_metrics = extractor_function(job_data)
 
-    # 6) Update the job metrics in the store (for the correct job type and dashboard)
-    update_result = await update_jobs_store_metric(job_data)  # Update the store with job data
+    # 4) Update the job metrics in the store (for the correct job type and dashboard)
+    ingest_dedupe.remember(msg_key, dedupe_key)   # reserved before the await, released on failure
+    try:
+        update_result = await update_jobs_store_metric(job_data)  # Update the store with job data
+    except Exception:
+        ingest_dedupe.forget(msg_key, dedupe_key)
+        raise
 
     log_datadog_event(
         status="ok",
@@ -90,3 +101,15 @@ async def handle_pubsub_push(pubsub_msg: PubSubMessage):
     )
     print(f"✅ Job {job_id} processed with metrics: {job_metrics}")
     return {"status": "success", "job_id": job_id}
+
+
+def _duplicate(job_id: Any) -> Dict[str, Any]:
+    log_datadog_event(
+        status="ok",
+        message=f"Duplicate job {job_id} skipped",
+        event_type="jobs_action.pubsub",
+        function_name="handle_pubsub_push",
+        jobs_id=str(job_id) if job_id is not None else None,
+        extra={"duplicate": True},
+    )
+    return {"status": "duplicate", "job_id": job_id}
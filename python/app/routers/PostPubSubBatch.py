@@ -0,0 +1,50 @@
+"""
+FastAPI router for batched Pub/Sub ingestion.
+
+Takes N push envelopes (for any of the jobs-action, geek-putaway and
+geek-pickorder feeds) in one request and applies them under one store update
+per dashboard. Each message still gets its own ack/nack in the response.
+
+Final URL: /actions/pubsub/batch
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Literal
+
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+from app.data.dedupe import ingest_dedupe
+from app.services.batch_ingest import ingest_envelopes
+from app.services.metrics import histogram, timed
+
+router = APIRouter()
+
+
+# ── Input contract ───────────────────────────────────────────────────────────
+class BatchMessage(BaseModel):
+    topic: Literal["jobs-action", "geek-putaway", "geek-pickorder"]
+    envelope: Dict[str, Any]   # the body the matching push endpoint would receive
+
+
+class BatchRequest(BaseModel):
+    messages: List[BatchMessage]
+
+
+# ── Endpoint ─────────────────────────────────────────────────────────────────
+@router.post("/pubsub/batch")
+@timed(histogram("ingest.request", topic="batch"))
+async def handle_pubsub_batch(batch: BatchRequest):
+    results = await ingest_envelopes([(m.topic, m.envelope) for m in batch.messages])
+    return {
+        "status": "success",
+        "acked": sum(1 for r in results if r["ack"]),
+        "nacked": sum(1 for r in results if not r["ack"]),
+        "results": results,
+    }
+
+
+@router.get("/pubsub/dedupe-stats")
+async def get_dedupe_stats():
+    """Hit/miss counters and size of the ingest dedupe index."""
+    return ingest_dedupe.stats()
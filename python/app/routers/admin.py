@@ -0,0 +1,82 @@
+"""
+FastAPI router for admin-only diagnostics.
+
+Disabled (404) unless ADMIN_TOKEN is set; requests must then send it in the
+`X-Admin-Token` header.
+
+Final URLs:
+    POST /admin/profile?seconds=10      sampling profile, collapsed stacks
+    GET  /admin/slow-requests           slow-request capture status
+    PUT  /admin/slow-requests?threshold_ms=200   (0 turns it off)
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import secrets
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.services.profiler import PROFILE_MAX_SECONDS, ProfileBusy, profile, slow_requests
+from datadog_logger import log_datadog_event
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+# ── Endpoints ────────────────────────────────────────────────────────────────
+@router.post("/profile", response_class=PlainTextResponse)
+async def capture_profile(
+    seconds: float = Query(10.0, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(5.0, ge=1, le=100),
+):
+    """
+    Sample every thread's stack for `seconds` and return the collapsed stacks
+    (`flamegraph.pl profile.collapsed > profile.svg`, or open in speedscope).
+    """
+    try:
+        collapsed, samples = await asyncio.to_thread(profile, seconds, interval_ms / 1000)
+    except ProfileBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+    log_datadog_event(
+        status="info",
+        message=f"Profile captured ({seconds:g}s, {samples} samples)",
+        event_type="admin.profile",
+        function_name="capture_profile",
+        extra={"seconds": seconds, "interval_ms": interval_ms, "samples": samples},
+    )
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return PlainTextResponse(collapsed, headers={
+        "Content-Disposition": f'attachment; filename="profile-{stamp}.collapsed"',
+        "X-Profile-Samples": str(samples),
+    })
+
+
+@router.get("/slow-requests")
+async def get_slow_requests():
+    return slow_requests.stats()
+
+
+@router.put("/slow-requests")
+async def set_slow_requests(threshold_ms: float = Query(..., ge=0)):
+    """Log requests slower than `threshold_ms` with stack samples; 0 turns capture off."""
+    slow_requests.configure(threshold_ms)
+    log_datadog_event(
+        status="info",
+        message=f"Slow-request threshold set to {threshold_ms:g} ms",
+        event_type="admin.slow_requests",
+        function_name="set_slow_requests",
+    )
+    return slow_requests.stats()
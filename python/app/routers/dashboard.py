@@ -1,13 +1,15 @@
+import json
 import logging
-from copy import deepcopy
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 
-from app.models import Dashboard, Kpi
-from app.data.store import get_db
-from app.services.manual_finish import get_manual_finish_metrics
+from app.models import Dashboard, DashboardSnapshot, Kpi
+from app.data.store import BOOT_ID, get_snapshot, run_backend, wake_streams
+from app.services.live_updates import dashboard_frames, encode_sse
+from app.services.manual_finish import cache_age, get_manual_finish_metrics, manual_finish_stats, on_change
 from datadog_logger import log_datadog_event
 
 logger = logging.getLogger(__name__)
@@ -107,13 +109,62 @@ MANUAL_FINISH_TILES: Dict[str, ManualFinishTileConfig] = {
 }
 
 
-async def _build_dashboard_response(store_key: str) -> Dashboard:
+def _wake_tile_streams(metrics) -> None:
+    # The tile is not dashboard state: wake the streams that show it, no version bump.
+    for store_key in MANUAL_FINISH_TILES:
+        wake_streams(store_key)
+
+
+on_change(_wake_tile_streams)
+
+
+# ── Pre-serialised responses ────────────────────────────────────────────────
+# store_key -> (etag, encoded body); re-encoded only when the ETag changes.
+_encoded: Dict[str, Tuple[str, bytes]] = {}
+
+CACHE_HEADERS = {"Cache-Control": "no-cache"}  # always revalidate with If-None-Match
+
+
+def _etag_for(snapshot: DashboardSnapshot, tile: Optional[Kpi]) -> str:
+    if tile is None:
+        return f'"{BOOT_ID}.{snapshot.version}"'
+    return f'"{BOOT_ID}.{snapshot.version}-{tile.value:g}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def _with_tile(snapshot: DashboardSnapshot, tile: Optional[Kpi]) -> DashboardSnapshot:
+    if tile is None:
+        return snapshot
+    # Shallow copy: the snapshot itself stays shared and untouched.
+    return snapshot.model_copy(update={"kpis": [*snapshot.kpis, tile]})
+
+
+def _encode(store_key: str, etag: str, snapshot: DashboardSnapshot, tile: Optional[Kpi]) -> bytes:
+    cached = _encoded.get(store_key)
+    if cached and cached[0] == etag:
+        return cached[1]
+
+    body = _with_tile(snapshot, tile).model_dump_json().encode()
+    _encoded[store_key] = (etag, body)
+    return body
+
+
+async def _build_dashboard_response(store_key: str, request: Request) -> Response:
     """
-    Create an isolated snapshot of the dashboard, enrich it with manual finish
-    metrics (if configured), and return it to the caller.
+    Serve the current immutable snapshot of the dashboard, enriched with the
+    manual finish tile (if configured), as pre-encoded JSON with a strong ETag.
+    Answers 304 when the client's If-None-Match already has that version.
     """
-    db = get_db()
-    if store_key not in db:
+    try:
+        snapshot = await run_backend(get_snapshot, store_key)
+    except KeyError:
         log_datadog_event(
             status="error",
             message=f"Dashboard '{store_key}' not found",
@@ -123,22 +174,35 @@ async def _build_dashboard_response(store_key: str) -> Dashboard:
         )
         raise HTTPException(status_code=404, detail=f"Dashboard '{store_key}' not found.")
 
-    dashboard = deepcopy(db[store_key])
-    await _inject_manual_finish_tile(store_key, dashboard)
+    tile = await _manual_finish_tile(store_key)
+    etag = _etag_for(snapshot, tile)
+    headers = {"ETag": etag, **CACHE_HEADERS}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        log_datadog_event(
+            status="ok",
+            message=f"Dashboard '{store_key}' not modified",
+            event_type="dashboard.fetch",
+            function_name="_build_dashboard_response",
+            extra={"store_key": store_key, "etag": etag, "not_modified": True},
+        )
+        return Response(status_code=304, headers=headers)
+
+    body = _encode(store_key, etag, snapshot, tile)
     log_datadog_event(
         status="ok",
         message=f"Dashboard '{store_key}' served",
         event_type="dashboard.fetch",
         function_name="_build_dashboard_response",
-        extra={"store_key": store_key, "kpi_count": len(dashboard.kpis)},
+        extra={"store_key": store_key, "kpi_count": len(snapshot.kpis) + (tile is not None), "etag": etag},
     )
-    return dashboard
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
-async def _inject_manual_finish_tile(store_key: str, dashboard: Dashboard) -> None:
+async def _manual_finish_tile(store_key: str) -> Optional[Kpi]:
     config: Optional[ManualFinishTileConfig] = MANUAL_FINISH_TILES.get(store_key)
     if not config:
-        return
+        return None
 
     try:
         metrics = await get_manual_finish_metrics()
@@ -149,63 +213,159 @@ async def _inject_manual_finish_tile(store_key: str, dashboard: Dashboard) -> No
             status="error",
             message=f"manual-finish metrics unavailable: {exc}",
             event_type="manual_finish.tile",
-            function_name="_inject_manual_finish_tile",
+            function_name="_manual_finish_tile",
             extra={"store_key": store_key},
         )
-        return
+        return None
 
     value = getattr(metrics, config.metric, None)
     if value is None:
-        return
+        return None
 
-    dashboard.kpis.append(Kpi(label=config.label, value=value, unit=config.unit))
     log_datadog_event(
         status="ok",
         message="manual-finish tile updated",
         event_type="manual_finish.tile",
-        function_name="_inject_manual_finish_tile",
-        extra={"store_key": store_key, "metric": config.metric, "value": value},
+        function_name="_manual_finish_tile",
+        extra={"store_key": store_key, "metric": config.metric, "value": value, "cache_age": cache_age()},
+    )
+    return Kpi(label=config.label, value=value, unit=config.unit)
+
+
+# ---------------------------------------------------------------------------
+# Live updates (SSE / WebSocket)
+# ---------------------------------------------------------------------------
+# Endpoint name -> store key, as used by the GET endpoints below.
+DASHBOARD_KEYS: Dict[str, str] = {
+    "GeekPicking": "geekpicking",
+    "GeekInbound": "geekinbound",
+    "Replenishment": "replenishment",
+    "Picking": "pick",
+    "InboundAndBulk": "inbound",
+    "Returns": "returns",
+    "ErrorLanes": "error lane",
+    "Sorting": "default",
+}
+
+# store_key -> (etag, JSON-ready payload) shared by every open stream.
+_payloads: Dict[str, Tuple[str, dict]] = {}
+
+
+async def _current_payload(store_key: str) -> dict:
+    snapshot = await run_backend(get_snapshot, store_key)
+    tile = await _manual_finish_tile(store_key)
+    etag = _etag_for(snapshot, tile)
+    cached = _payloads.get(store_key)
+    if cached and cached[0] == etag:
+        return cached[1]
+
+    payload = _with_tile(snapshot, tile).model_dump(mode="json")
+    _payloads[store_key] = (etag, payload)
+    return payload
+
+
+def _log_stream(store_key: str, transport: str, message: str) -> None:
+    log_datadog_event(
+        status="ok",
+        message=message,
+        event_type="dashboard.stream",
+        function_name="stream_dashboard",
+        extra={"store_key": store_key, "transport": transport},
+    )
+
+
+@router.get("/{name}/stream")
+async def stream_dashboard(name: str):
+    """
+    Server-Sent Events: `event: snapshot` on connect, then `event: delta`
+    frames (changed fields, KPIs and people rows), coalesced to STREAM_MAX_FPS.
+    """
+    store_key = DASHBOARD_KEYS.get(name)
+    if store_key is None:
+        raise HTTPException(status_code=404, detail=f"Dashboard '{name}' not found.")
+
+    async def body():
+        _log_stream(store_key, "sse", f"Dashboard '{store_key}' stream opened")
+        try:
+            async for frame in dashboard_frames(store_key, lambda: _current_payload(store_key)):
+                yield encode_sse(frame, _json_dumps)
+        finally:
+            _log_stream(store_key, "sse", f"Dashboard '{store_key}' stream closed")
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@router.websocket("/{name}/stream")
+async def stream_dashboard_ws(websocket: WebSocket, name: str):
+    """WebSocket variant: `{"type": "snapshot"|"delta"|"keepalive", "data": ...}` text frames."""
+    store_key = DASHBOARD_KEYS.get(name)
+    if store_key is None:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    _log_stream(store_key, "websocket", f"Dashboard '{store_key}' stream opened")
+    try:
+        async for kind, data in dashboard_frames(store_key, lambda: _current_payload(store_key)):
+            await websocket.send_text(_json_dumps({"type": kind, "data": data}))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        _log_stream(store_key, "websocket", f"Dashboard '{store_key}' stream closed")
+
+
+def _json_dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+@router.get("/manual-finish/status")
+async def get_manual_finish_status():
+    """Cache age, circuit-breaker state and refresh counters for the manual-finish tile."""
+    return manual_finish_stats()
+
+
 # ---------------------------------------------------------------------------
 # Endpoints for each category dashboard
 # ---------------------------------------------------------------------------
 
-@router.get("/GeekPicking", response_model=Dashboard)
-async def get_geek_picking():
-    return await _build_dashboard_response("geekpicking")
+@router.get("/GeekPicking", response_model=DashboardSnapshot)
+async def get_geek_picking(request: Request):
+    return await _build_dashboard_response("geekpicking", request)
 
-@router.get("/GeekInbound", response_model=Dashboard)
-async def get_geek_inbound():
-    return await _build_dashboard_response("geekinbound")
+@router.get("/GeekInbound", response_model=DashboardSnapshot)
+async def get_geek_inbound(request: Request):
+    return await _build_dashboard_response("geekinbound", request)
 
-@router.get("/Replenishment", response_model=Dashboard)
-async def get_replenishment():
+@router.get("/Replenishment", response_model=DashboardSnapshot)
+async def get_replenishment(request: Request):
     # Use the live dashboard from the in-memory DB for "FMA"
-    return await _build_dashboard_response("replenishment")
+    return await _build_dashboard_response("replenishment", request)
 
-@router.get("/Picking", response_model=Dashboard)
-async def get_mono_picking():
+@router.get("/Picking", response_model=DashboardSnapshot)
+async def get_mono_picking(request: Request):
     # Use the live dashboard from the in-memory DB for "MonoPicking"
-    return await _build_dashboard_response("pick")
+    return await _build_dashboard_response("pick", request)
 
-@router.get("/InboundAndBulk", response_model=Dashboard)
-async def get_inbound_bulk():
+@router.get("/InboundAndBulk", response_model=DashboardSnapshot)
+async def get_inbound_bulk(request: Request):
     # Use the live dashboard from the in-memory DB for "InboundAndBulk"
-    return await _build_dashboard_response("inbound")
+    return await _build_dashboard_response("inbound", request)
 
-@router.get("/Returns", response_model=Dashboard)
-async def get_returns():
+@router.get("/Returns", response_model=DashboardSnapshot)
+async def get_returns(request: Request):
     # Use the live dashboard from the in-memory DB for "Returns"
-    return await _build_dashboard_response("returns")
+    return await _build_dashboard_response("returns", request)
 
-@router.get("/ErrorLanes", response_model=Dashboard)
-async def get_error_lanes():
+@router.get("/ErrorLanes", response_model=DashboardSnapshot)
+async def get_error_lanes(request: Request):
     # Use the live dashboard from the in-memory DB for "ErrorLanes"
-    return await _build_dashboard_response("error lane")
+    return await _build_dashboard_response("error lane", request)
 
-@router.get("/Sorting", response_model=Dashboard)
-async def get_sorting():
+@router.get("/Sorting", response_model=DashboardSnapshot)
+async def get_sorting(request: Request):
     # Use the live dashboard from the in-memory DB
-    return await _build_dashboard_response("default")
+    return await _build_dashboard_response("default", request)
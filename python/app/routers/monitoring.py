@@ -0,0 +1,26 @@
+"""
+FastAPI router for Prometheus scraping.
+
+Serves the in-process registry of `app.services.metrics`: ingest latency per
+push router, decode/extract/update phases of the store update, belt-analysis
+stages and per-camera skip counters/ratios, dashboard snapshot builds, manual-finish reads and upstream latency,
+and (computed at scrape time) people-list and rolling-window sizes.
+
+Final URL: /metrics
+"""
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.metrics import render_prometheus
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """All metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(render_prometheus(), media_type=CONTENT_TYPE)
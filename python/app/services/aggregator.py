@@ -0,0 +1,172 @@
+"""
+Single-writer aggregator for multi-worker deployments.
+
+One aggregator process owns the dashboard state (the in-memory backend, plus
+journal/snapshots when PERSIST_DIR is set, plus idle pruning). HTTP workers
+run with STATE_BACKEND=aggregator and forward ingest events and snapshot
+reads over a Unix socket (`AggregatorBackend`), so GETs scale across cores
+while every event is applied once, in arrival order, by one process. Pub/Sub
+redeliveries are only deduplicated per worker (`ingest_dedupe` lives in the
+worker that received the message), not across workers.
+
+Start everything with:
+    python -m app.services.aggregator --workers 4 --port 8080
+
+or run the two halves separately:
+    python -m app.services.aggregator --serve-only
+    STATE_BACKEND=aggregator uvicorn app.main:app --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from contextlib import suppress
+from typing import Any, Dict
+
+from app.data import store
+from app.data.aggregation import JobEvent
+from app.data.backends import FRAME_HEADER, InMemoryBackend, encode_frame
+from app.models import Dashboard, Person
+from app.services.persistence import start_persistence
+from datadog_logger import log_datadog_event
+
+logger = logging.getLogger(__name__)
+
+
+def _view_payload(db: Dashboard) -> Dict[str, Any]:
+    """What a worker needs to build the snapshot: no windows, no cold tier."""
+    return {
+        "title": db.title,
+        "status": db.status,
+        "kpis": [kpi.model_dump() for kpi in db.kpis],
+        "historyText": db.historyText,
+        "idleThreshold": db.idleThreshold,
+        "people": [Person.from_record(p).model_dump(mode="json") for p in db.people.most_recent()],
+    }
+
+
+def handle(message: Dict[str, Any]) -> Any:
+    """Apply one request to the local store (runs on the aggregator's event loop)."""
+    backend = store.get_backend()
+    op = message["op"]
+    key = message.get("key")
+    if op == "apply":
+        backend.apply_events(key, [JobEvent(*event) for event in message["events"]])
+        store.mark_changed(key)
+        return None
+    if op == "fields":
+        kpis = {int(index): value for index, value in message["kpis"].items()}
+        backend.set_fields(key, kpis, status=message.get("status"))
+        store.mark_changed(key)
+        return None
+    if op == "version":
+        return backend.version(key)
+    if op == "view":
+        return _view_payload(backend[key])
+    raise ValueError(f"unknown op {op!r}")
+
+
+async def _serve_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            header = await reader.readexactly(FRAME_HEADER.size)
+            (size,) = FRAME_HEADER.unpack(header)
+            message = json.loads(await reader.readexactly(size))
+            try:
+                reply = {"result": handle(message)}
+            except KeyError as exc:
+                reply = {"error": str(exc), "kind": "KeyError"}
+            except Exception as exc:
+                logger.exception("aggregator request failed")
+                reply = {"error": str(exc), "kind": type(exc).__name__}
+            writer.write(encode_frame(reply))
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(path: str) -> None:
+    """Own the state and serve workers on the Unix socket at `path` until cancelled."""
+    store.configure_backend(InMemoryBackend(store._db))
+    with suppress(NotImplementedError):
+        # SIGTERM (e.g. from the launcher) shuts down cleanly: final snapshot, socket removed.
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    with suppress(FileNotFoundError):
+        os.unlink(path)
+    tasks = [*start_persistence(), asyncio.create_task(store.run_pruner(), name="idle-pruner")]
+    server = await asyncio.start_unix_server(_serve_connection, path=path)
+    log_datadog_event(
+        status="ok",
+        message="Aggregator listening",
+        event_type="aggregator.start",
+        function_name="serve",
+        extra={"socket": path, "pid": os.getpid()},
+    )
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        with suppress(FileNotFoundError):
+            os.unlink(path)
+
+
+def run_aggregator(path: str) -> None:
+    with suppress(KeyboardInterrupt):
+        asyncio.run(serve(path))
+
+
+def wait_for_socket(path: str, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(path)
+                return
+            except OSError:
+                time.sleep(0.05)
+    raise TimeoutError(f"aggregator socket {path} not ready")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Aggregator + uvicorn workers")
+    parser.add_argument("--socket", default=os.getenv("AGGREGATOR_SOCKET", store.AGGREGATOR_SOCKET))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8080")))
+    parser.add_argument("--serve-only", action="store_true", help="run only the aggregator")
+    args = parser.parse_args()
+
+    if args.serve_only:
+        run_aggregator(args.socket)
+        return
+
+    aggregator = multiprocessing.Process(target=run_aggregator, args=(args.socket,), name="aggregator")
+    aggregator.start()
+    try:
+        wait_for_socket(args.socket)
+        os.environ["STATE_BACKEND"] = "aggregator"
+        os.environ["AGGREGATOR_SOCKET"] = args.socket
+        import uvicorn
+
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        aggregator.terminate()
+        aggregator.join(5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Batched ingestion of Pub/Sub envelopes for the jobs-action, geek-putaway and
+geek-pickorder feeds.
+
+Envelopes are decoded with the same decoders as the push endpoints, grouped
+per dashboard and applied in one store update per dashboard. Every input
+gets its own ack/nack result so a caller (push batcher or pull subscriber)
+can acknowledge message by message.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.data.dedupe import ingest_dedupe, message_key
+from app.routers.PostGeekPickOrder import (
+    build_geek_pickorder_job,
+    geek_pickorder_dedupe_key,
+    parse_geek_pickorder,
+)
+from app.routers.PostGeekPutAway import (
+    build_geek_putaway_job,
+    geek_putaway_dedupe_key,
+    is_pubsub_push,
+    parse_geek_putaway,
+)
+from app.routers.PostJobsActionToDashboard import (
+    JOB_TYPE_TO_EXTRACTOR,
+    decode_jobs_action,
+    jobs_action_dedupe_key,
+)
+from app.utils.jobExtractors.UpdateJobsStoreMetrics import update_jobs_store_metrics_batch
+from datadog_logger import log_datadog_event
+
+
+class IgnoredMessage(Exception):
+    """Decodable message that the dashboards do not use (acked, not applied)."""
+
+
+@dataclass(frozen=True)
+class Feed:
+    parse: Callable[[Dict[str, Any]], Dict[str, Any]]         # envelope -> decoded body
+    dedupe_key: Callable[[Dict[str, Any]], Optional[str]]     # body -> job id key
+    build: Callable[[Dict[str, Any]], Dict[str, Any]]         # body -> job_data
+
+
+def _parse_jobs_action(envelope: Dict[str, Any]) -> Dict[str, Any]:
+    return decode_jobs_action(envelope.get("message") or {})
+
+
+def _build_jobs_action(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    job_type = (job_data.get("HIGH_OVER_PROCESS") or "").strip()
+    if job_type not in JOB_TYPE_TO_EXTRACTOR:
+        raise IgnoredMessage(f"Unsupported job type: {job_type}")
+    return job_data
+
+
+def _parse_geek_putaway(envelope: Dict[str, Any]) -> Dict[str, Any]:
+    if not is_pubsub_push(envelope):
+        raise IgnoredMessage("Not a Pub/Sub push envelope")
+    return parse_geek_putaway(envelope)
+
+
+FEEDS: Dict[str, Feed] = {
+    "jobs-action": Feed(_parse_jobs_action, jobs_action_dedupe_key, _build_jobs_action),
+    "geek-putaway": Feed(_parse_geek_putaway, geek_putaway_dedupe_key, build_geek_putaway_job),
+    "geek-pickorder": Feed(parse_geek_pickorder, geek_pickorder_dedupe_key, build_geek_pickorder_job),
+}
+
+
+def _message_id(envelope: Dict[str, Any]) -> Optional[str]:
+    message = envelope.get("message")
+    if isinstance(message, dict):
+        return message.get("messageId") or message.get("message_id")
+    return None
+
+
+async def ingest_envelopes(items: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Decode and apply `(topic, envelope)` pairs. Returns one result per item:
+    `{"ack": bool, "status": "success"|"duplicate"|"ignored"|"error", "job_id", "message_id", "detail"}`.
+    Duplicates (by messageId or job id) are acked without being decoded further.
+    Undecodable messages are nacked so Pub/Sub redelivers them, like a 400 on the push path.
+    """
+    results: List[Dict[str, Any]] = []
+    decoded: List[Dict[str, Any]] = []
+    decoded_at: List[int] = []
+    keys_at: List[Tuple[Optional[str], Optional[str]]] = []
+    in_batch: Set[str] = set()   # duplicates inside this batch
+
+    for index, (topic, envelope) in enumerate(items):
+        result: Dict[str, Any] = {"message_id": _message_id(envelope)}
+        results.append(result)
+        feed = FEEDS.get(topic)
+        msg_key = message_key(envelope.get("message"))
+        if msg_key in in_batch or ingest_dedupe.seen(msg_key, final=False):
+            result.update(ack=True, status="duplicate")
+            continue
+        try:
+            if feed is None:
+                raise ValueError(f"Unknown topic '{topic}'")
+            body = feed.parse(envelope)
+            dedupe_key = feed.dedupe_key(body)
+            if dedupe_key in in_batch or ingest_dedupe.seen(dedupe_key):
+                result.update(ack=True, status="duplicate")
+                continue
+            job_data = feed.build(body)
+        except IgnoredMessage as exc:
+            result.update(ack=True, status="ignored", detail=str(exc))
+        except Exception as exc:  # noqa: BLE001 - reported per message
+            result.update(ack=False, status="error", detail=f"Failed to decode message.data: {exc}")
+        else:
+            decoded.append(job_data)
+            decoded_at.append(index)
+            keys_at.append((msg_key, dedupe_key))
+            in_batch.update(k for k in (msg_key, dedupe_key) if k)
+
+    # Reserved before the await so concurrent batches/pushes see them; released on failure.
+    reserved = [key for keys in keys_at for key in keys]
+    ingest_dedupe.remember(*reserved)
+    try:
+        updates = await update_jobs_store_metrics_batch(decoded)
+    except Exception:
+        ingest_dedupe.forget(*reserved)
+        raise
+    for index, update in zip(decoded_at, updates):
+        ok = update.get("status") == "success"
+        results[index].update(
+            ack=True,   # applied, or no dashboard for it: redelivery would not help
+            status="success" if ok else "error",
+            job_id=update.get("job_id"),
+            detail=update.get("detail"),
+        )
+
+    acked = sum(1 for r in results if r["ack"])
+    log_datadog_event(
+        status="ok" if acked == len(results) else "warning",
+        message=f"Pub/Sub batch processed ({acked}/{len(results)} acked)",
+        event_type="pubsub.batch",
+        function_name="ingest_envelopes",
+        extra={
+            "messages": len(results),
+            "applied": sum(1 for r in results if r["status"] == "success"),
+            "ignored": sum(1 for r in results if r["status"] == "ignored"),
+            "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+            "nacked": len(results) - acked,
+        },
+    )
+    return results
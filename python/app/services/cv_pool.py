@@ -0,0 +1,87 @@
+"""
+Bounded worker pool for the belt analyser's OpenCV work.
+
+OpenCV releases the GIL inside its kernels, so a thread pool gets real
+parallelism for decode/resize/threshold/contours while the event loop keeps
+serving dashboard GETs and Pub/Sub pushes. Admission is bounded: at most
+BELT_MAX_PENDING_FRAMES frames may be queued or in flight, and `admit()`
+raises `PoolBusy` beyond that so the endpoint can answer 503 instead of
+letting a backlog of frames (and their memory) pile up.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from app.services.metrics import histogram
+
+T = TypeVar("T")
+
+CV_WORKERS = int(os.getenv("BELT_CV_WORKERS", str(min(6, os.cpu_count() or 1))))
+MAX_PENDING_FRAMES = int(os.getenv("BELT_MAX_PENDING_FRAMES", "4"))
+RETRY_AFTER_SECONDS = 1
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pending = 0
+_counters = {"admitted": 0, "rejected": 0}
+
+
+class PoolBusy(Exception):
+    """Too many frames queued; the caller should retry later."""
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=CV_WORKERS, thread_name_prefix="belt-cv")
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+@contextmanager
+def admit() -> Iterator[None]:
+    """Hold one frame slot for the duration of the block (event loop only)."""
+    global _pending
+    if _pending >= MAX_PENDING_FRAMES:
+        _counters["rejected"] += 1
+        raise PoolBusy(f"{_pending} frames already pending")
+    _pending += 1
+    _counters["admitted"] += 1
+    try:
+        yield
+    finally:
+        _pending -= 1
+
+
+async def run(stage: str, fn: Callable[..., T], *args: Any) -> T:
+    """Run `fn(*args)` on the pool, recording queue wait and run time for `stage`."""
+    submitted = time.perf_counter()
+
+    def timed() -> T:
+        started = time.perf_counter()
+        histogram("belt.queue_wait").observe(started - submitted)
+        try:
+            return fn(*args)
+        finally:
+            histogram(f"belt.{stage}").observe(time.perf_counter() - started)
+
+    return await asyncio.get_running_loop().run_in_executor(_get_pool(), timed)
+
+
+def pool_stats() -> Dict[str, Any]:
+    return {
+        "workers": CV_WORKERS,
+        "max_pending_frames": MAX_PENDING_FRAMES,
+        "pending_frames": _pending,
+        **_counters,
+    }
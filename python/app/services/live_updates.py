@@ -0,0 +1,105 @@
+"""
+Server-push frames for the dashboard screens (SSE and WebSocket).
+
+Each connection gets a full snapshot first and afterwards only deltas:
+changed top-level fields, changed KPI tiles and changed/removed people rows.
+Frames are *pulled* from the latest snapshot instead of queued per change,
+so bursts coalesce to at most `STREAM_MAX_FPS` frames per second and a slow
+client simply skips intermediate states instead of buffering them.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.data.store import current_version, run_backend, wait_for_change
+
+STREAM_MAX_FPS = float(os.getenv("STREAM_MAX_FPS", "2"))
+IDLE_REFRESH_SECONDS = 1.0    # re-check while operators are shown (idle timers/decay)
+KEEPALIVE_SECONDS = 15.0      # heartbeat when nothing changes
+
+Payload = Dict[str, Any]
+Frame = Tuple[str, Optional[Payload]]   # ("snapshot" | "delta" | "keepalive", data)
+
+
+def diff_payload(old: Payload, new: Payload) -> Optional[Payload]:
+    """Compact delta between two dashboard payloads, or None if nothing changed."""
+    delta: Payload = {}
+
+    changed = {
+        key: value for key, value in new.items()
+        if key not in ("kpis", "people", "version") and old.get(key) != value
+    }
+    if changed:
+        delta["changed"] = changed
+
+    old_kpis, new_kpis = old.get("kpis", []), new.get("kpis", [])
+    kpis = [
+        {"index": i, **kpi} for i, kpi in enumerate(new_kpis)
+        if i >= len(old_kpis) or old_kpis[i] != kpi
+    ]
+    if kpis:
+        delta["kpis"] = kpis
+    if len(new_kpis) < len(old_kpis):
+        delta["kpiCount"] = len(new_kpis)
+
+    old_people = {p["name"]: p for p in old.get("people", [])}
+    new_people = new.get("people", [])
+    upsert = [p for p in new_people if old_people.get(p["name"]) != p]
+    new_names = [p["name"] for p in new_people]
+    removed = [name for name in old_people if name not in set(new_names)]
+    if upsert or removed or new_names != list(old_people):
+        delta["people"] = {"upsert": upsert, "remove": removed, "order": new_names}
+
+    if not delta:
+        return None
+    delta["version"] = new.get("version")
+    return delta
+
+
+async def dashboard_frames(
+    store_key: str,
+    load: Callable[[], Awaitable[Payload]],
+    max_fps: float = STREAM_MAX_FPS,
+) -> AsyncIterator[Frame]:
+    """
+    Yield a snapshot frame, then delta frames whenever the dashboard changes.
+    `load()` returns the current payload (snapshot plus any extra tiles).
+    """
+    min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+    last: Optional[Payload] = None
+    quiet_for = 0.0
+
+    while True:
+        seen_version = await run_backend(current_version, store_key)
+        payload = await load()
+        if last is None:
+            yield "snapshot", payload
+            quiet_for = 0.0
+        else:
+            delta = diff_payload(last, payload)
+            if delta is not None:
+                yield "delta", delta
+                quiet_for = 0.0
+            elif quiet_for >= KEEPALIVE_SECONDS:
+                yield "keepalive", None
+                quiet_for = 0.0
+        last = payload
+
+        # Coalesce bursts: at most one frame per `min_interval`.
+        await asyncio.sleep(min_interval)
+        timeout = IDLE_REFRESH_SECONDS if payload.get("people") else KEEPALIVE_SECONDS
+        if not await wait_for_change(store_key, seen_version, timeout=timeout):
+            quiet_for += timeout + min_interval
+
+
+def encode_sse(frame: Frame, json_dumps: Callable[[Any], str]) -> bytes:
+    kind, data = frame
+    if kind == "keepalive":
+        return b": keepalive\n\n"
+    lines: List[str] = [f"event: {kind}"]
+    if data and data.get("version") is not None:
+        lines.append(f"id: {data['version']}")
+    lines.append(f"data: {json_dumps(data)}")
+    return ("\n".join(lines) + "\n\n").encode()
@@ -1,12 +1,23 @@
+"""
+Manual-finish metrics from the pick-binding service.
+
+The app lifespan starts `run_refresher()`, which keeps `_cache` warm through
+one pooled keep-alive client (stale-while-revalidate): dashboard requests
+read the cache and never wait on the upstream. Consecutive failures open a
+circuit breaker with exponential backoff, and cached data is served until it
+is older than MANUAL_FINISH_MAX_STALE_SECONDS. Without the refresher (scripts,
+one-off tools) `get_manual_finish_metrics()` falls back to fetching on demand.
+"""
 import asyncio
 import logging
 import os
 import time
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import httpx
 from pydantic import BaseModel, ValidationError
 
+from app.services.metrics import counter, histogram
 from datadog_logger import log_datadog_event
 
 logger = logging.getLogger(__name__)
@@ -15,7 +26,12 @@ logger = logging.getLogger(__name__)
 DEFAULT_MANUAL_FINISH_URL = (
     "https://pick-binding-dashboard-api-208732756826.europe-west4.run.app/manual-finish"
 )
-CACHE_TTL_SECONDS = 5
+CACHE_TTL_SECONDS = float(os.getenv("MANUAL_FINISH_REFRESH_SECONDS", "5"))
+MAX_STALE_SECONDS = float(os.getenv("MANUAL_FINISH_MAX_STALE_SECONDS", "300"))
+REQUEST_TIMEOUT_SECONDS = 5.0
+FAILURE_THRESHOLD = 3          # consecutive failures before the circuit opens
+BACKOFF_BASE_SECONDS = 5.0
+BACKOFF_MAX_SECONDS = 120.0
 
 
 class ManualFinishMetrics(BaseModel):
@@ -25,70 +41,159 @@ class ManualFinishMetrics(BaseModel):
     updated_at: Optional[str] = None
 
 
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; backoff doubles per failure."""
+
+    def __init__(self, threshold: int = FAILURE_THRESHOLD,
+                 base: float = BACKOFF_BASE_SECONDS, cap: float = BACKOFF_MAX_SECONDS) -> None:
+        self.threshold = threshold
+        self.base = base
+        self.cap = cap
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.last_error: Optional[str] = None
+
+    def allow(self, now: float) -> bool:
+        return now >= self.open_until
+
+    def retry_in(self, now: float) -> float:
+        return max(0.0, self.open_until - now)
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.last_error = None
+
+    def record_failure(self, error: str, now: float) -> None:
+        self.consecutive_failures += 1
+        self.last_error = error
+        over = self.consecutive_failures - self.threshold
+        if over >= 0:
+            self.open_until = now + min(self.cap, self.base * (2 ** over))
+
+
 _cache: Optional[ManualFinishMetrics] = None
-_cache_expiration: float = 0.0
+_cache_fetched_at: float = 0.0
 _lock = asyncio.Lock()
+_client: Optional[httpx.AsyncClient] = None
+_refresher_running = False
+_breaker = CircuitBreaker()
+_counters = {"refreshes": 0, "failures": 0, "short_circuited": 0}
+_listeners: List[Callable[[ManualFinishMetrics], None]] = []
 
+# Exported on /metrics: how dashboard reads were served and upstream latency.
+_served = {result: counter("manual_finish.reads", result=result) for result in ("hit", "stale", "fetched")}
+_upstream = {outcome: histogram("manual_finish.upstream", outcome=outcome) for outcome in ("ok", "error")}
 
-async def get_manual_finish_metrics(force_refresh: bool = False) -> ManualFinishMetrics:
-    """
-    Fetch metrics from the manual-finish service with a lightweight TTL cache.
-    Returns cached data when possible to keep the upstream endpoint healthy.
-    """
-    global _cache, _cache_expiration
 
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=60.0),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+def on_change(listener: Callable[[ManualFinishMetrics], None]) -> None:
+    """Call `listener(metrics)` whenever a refresh changes the cached counts."""
+    _listeners.append(listener)
+
+
+def _counts(metrics: Optional[ManualFinishMetrics]) -> Optional[Dict[str, Any]]:
+    return metrics.model_dump(exclude={"updated_at"}) if metrics is not None else None
+
+
+def cache_age() -> Optional[float]:
+    return time.monotonic() - _cache_fetched_at if _cache else None
+
+
+def manual_finish_stats() -> Dict[str, Any]:
     now = time.monotonic()
-    if not force_refresh and _cache and _cache_expiration > now:
-        return _cache
+    age = cache_age()
+    return {
+        "has_data": _cache is not None,
+        "cache_age_seconds": round(age, 3) if age is not None else None,
+        "refresher_running": _refresher_running,
+        "circuit_open": not _breaker.allow(now),
+        "retry_in_seconds": round(_breaker.retry_in(now), 3),
+        "consecutive_failures": _breaker.consecutive_failures,
+        "last_error": _breaker.last_error,
+        **_counters,
+    }
+
+
+async def _fetch(url: str) -> ManualFinishMetrics:
+    started = time.perf_counter()
+    try:
+        response = await _get_client().get(url)
+        response.raise_for_status()
+    except httpx.HTTPError as exc:
+        _upstream["error"].observe(time.perf_counter() - started)
+        raise RuntimeError(f"manual-finish request failed: {exc!r}") from exc
+    _upstream["ok"].observe(time.perf_counter() - started)
+
+    try:
+        return ManualFinishMetrics.model_validate(response.json())
+    except (ValueError, ValidationError) as exc:
+        raise RuntimeError(f"manual-finish returned invalid payload: {exc}") from exc
+
+
+async def refresh(*, skip_if_fresh: bool = True, ignore_circuit: bool = False) -> ManualFinishMetrics:
+    """
+    Fetch from upstream and update the cache. Raises RuntimeError on failure
+    or while the circuit is open (unless `ignore_circuit`).
+    """
+    global _cache, _cache_fetched_at
 
     async with _lock:
-        if not force_refresh and _cache and _cache_expiration > time.monotonic():
+        now = time.monotonic()
+        if skip_if_fresh and _cache and now - _cache_fetched_at < CACHE_TTL_SECONDS:
             return _cache
+        if not ignore_circuit and not _breaker.allow(now):
+            _counters["short_circuited"] += 1
+            raise RuntimeError(
+                f"manual-finish circuit open; retry in {_breaker.retry_in(now):.1f}s"
+            )
 
         url = os.getenv("MANUAL_FINISH_URL", DEFAULT_MANUAL_FINISH_URL)
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-        except httpx.HTTPError as exc:
-            if _cache:
-                logger.warning("manual-finish fetch failed (%s); serving cached data", exc)
-                log_datadog_event(
-                    status="warning",
-                    message=f"manual-finish fetch failed; served cached data: {exc}",
-                    event_type="manual_finish.fetch",
-                    function_name="get_manual_finish_metrics",
-                    extra={"url": url, "cache_age": CACHE_TTL_SECONDS},
-                )
-                return _cache
+            metrics = await _fetch(url)
+        except RuntimeError as exc:
+            _counters["failures"] += 1
+            _breaker.record_failure(str(exc), time.monotonic())
             log_datadog_event(
                 status="error",
-                message=f"manual-finish request failed: {exc}",
+                message=str(exc),
                 event_type="manual_finish.fetch",
-                function_name="get_manual_finish_metrics",
-                extra={"url": url},
+                function_name="refresh",
+                extra={
+                    "url": url,
+                    "consecutive_failures": _breaker.consecutive_failures,
+                    "retry_in_seconds": round(_breaker.retry_in(time.monotonic()), 3),
+                    "cache_age": cache_age(),
+                },
             )
-            raise RuntimeError(f"manual-finish request failed: {exc}") from exc
-
-        try:
-            metrics = ManualFinishMetrics.model_validate(response.json())
-        except (ValueError, ValidationError) as exc:
-            log_datadog_event(
-                status="error",
-                message=f"manual-finish invalid payload: {exc}",
-                event_type="manual_finish.fetch",
-                function_name="get_manual_finish_metrics",
-                extra={"url": url},
-            )
-            raise RuntimeError(f"manual-finish returned invalid payload: {exc}") from exc
+            raise
 
+        changed = _counts(_cache) != _counts(metrics)
         _cache = metrics
-        _cache_expiration = time.monotonic() + CACHE_TTL_SECONDS
+        _cache_fetched_at = time.monotonic()
+        _counters["refreshes"] += 1
+        _breaker.record_success()
         log_datadog_event(
             status="ok",
             message="manual-finish metrics refreshed",
             event_type="manual_finish.fetch",
-            function_name="get_manual_finish_metrics",
+            function_name="refresh",
             extra={
                 "url": url,
                 "cache_ttl_seconds": CACHE_TTL_SECONDS,
@@ -97,4 +202,76 @@ async def get_manual_finish_metrics(force_refresh: bool = False) -> ManualFinish
                 "total": metrics.total,
             },
         )
+        if changed:
+            for listener in _listeners:
+                listener(metrics)
         return metrics
+
+
+async def get_manual_finish_metrics(force_refresh: bool = False) -> ManualFinishMetrics:
+    """
+    Return the cached metrics. With the background refresher running this
+    never touches the network; stale data is served up to MAX_STALE_SECONDS.
+    """
+    if force_refresh:
+        return await refresh(skip_if_fresh=False, ignore_circuit=True)
+
+    age = cache_age()
+    if _cache and age is not None and age < CACHE_TTL_SECONDS:
+        _served["hit"].inc()
+        return _cache
+
+    if _refresher_running:
+        if _cache and age is not None and age < MAX_STALE_SECONDS:
+            _served["stale"].inc()
+            return _cache
+        if _cache is None:
+            raise RuntimeError("manual-finish metrics not loaded yet")
+        raise RuntimeError(f"manual-finish metrics stale ({age:.0f}s old)")
+
+    # No refresher (outside the app lifespan): fetch inline.
+    try:
+        metrics = await refresh()
+        _served["fetched"].inc()
+        return metrics
+    except RuntimeError as exc:
+        age = cache_age()
+        if _cache and age is not None and age < MAX_STALE_SECONDS:
+            logger.warning("manual-finish fetch failed (%s); serving cached data", exc)
+            log_datadog_event(
+                status="warning",
+                message=f"manual-finish fetch failed; served cached data: {exc}",
+                event_type="manual_finish.fetch",
+                function_name="get_manual_finish_metrics",
+                extra={"cache_age": round(age, 3)},
+            )
+            _served["stale"].inc()
+            return _cache
+        raise
+
+
+async def run_refresher(interval: float = CACHE_TTL_SECONDS) -> None:
+    """Keep the cache warm; back off while the circuit is open."""
+    global _refresher_running
+    _refresher_running = True
+    try:
+        while True:
+            try:
+                await refresh(skip_if_fresh=False)
+                delay = interval
+            except RuntimeError:
+                delay = max(interval, _breaker.retry_in(time.monotonic()))
+            except Exception as exc:  # pragma: no cover - keep the loop alive
+                logger.exception("manual-finish refresher error: %s", exc)
+                delay = interval
+            await asyncio.sleep(delay)
+    finally:
+        _refresher_running = False
+        await close_client()
+
+
+def start_manual_finish_refresher() -> List["asyncio.Task[None]"]:
+    """Start the background refresher (disable with MANUAL_FINISH_REFRESH=0)."""
+    if os.getenv("MANUAL_FINISH_REFRESH", "1") == "0":
+        return []
+    return [asyncio.create_task(run_refresher(), name="manual-finish-refresher")]
@@ -0,0 +1,263 @@
+"""
+In-process metrics: latency histograms, counters and scrape-time gauges.
+
+`histogram(name, **labels)` / `counter(name, **labels)` return a
+process-wide, thread-safe instrument (created on first use). Recording is a
+bisect plus two adds into the calling thread's own shard, with no lock, so
+instruments can sit on hot paths and in worker threads; hot paths bind their
+instruments once at import instead of looking them up per event (see
+`python -m app.bench.metrics_overhead`). Gauges are callbacks evaluated
+only when scraped, so sizes (people lists, rolling windows) cost nothing
+between scrapes.
+
+`histogram_stats()` gives counts, sums and estimated percentiles for status
+endpoints and benchmarks; `render_prometheus()` is the Prometheus text
+exposition (format 0.0.4) served on /metrics. Dotted names map to
+Prometheus names with underscores; histograms get a `_seconds` suffix and
+counters `_total`.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import math
+import re
+import threading
+from bisect import bisect_left
+from threading import get_ident
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Upper bounds in seconds; the last bucket (+Inf) catches everything above.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+# Sub-millisecond work (decode, extract, store update, snapshot build)
+FAST_BUCKETS: Tuple[float, ...] = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1,
+)
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: "Histogram") -> None:
+        self.histogram = histogram
+
+    def __enter__(self) -> None:
+        self.started = perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.histogram.observe(perf_counter() - self.started)
+
+
+class Histogram:
+    """
+    Bucketed latency histogram. Each thread records into its own shard
+    (bucket counts followed by the running sum), so `observe` takes no lock;
+    readers merge the shards, which may be a few observations apart.
+    """
+
+    __slots__ = ("name", "labels", "bounds", "_shards")
+
+    def __init__(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS, labels: Labels = ()) -> None:
+        self.name = name
+        self.labels = labels
+        self.bounds: Tuple[float, ...] = tuple(sorted(buckets))
+        self._shards: Dict[int, List[float]] = {}
+
+    def observe(self, seconds: float) -> None:
+        try:
+            shard = self._shards[get_ident()]
+        except KeyError:
+            shard = self._shards.setdefault(get_ident(), [0] * (len(self.bounds) + 1) + [0.0])
+        shard[bisect_left(self.bounds, seconds)] += 1
+        shard[-1] += seconds
+
+    def time(self) -> _Timer:
+        """`with h.time(): ...` observes the block's duration (also on exceptions)."""
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        """(bucket counts, count, sum) over all threads."""
+        counts = [0] * (len(self.bounds) + 1)
+        total = 0.0
+        for shard in list(self._shards.values()):
+            for index, n in enumerate(shard[:-1]):
+                counts[index] += n
+            total += shard[-1]
+        return counts, sum(counts), total
+
+    def percentile(self, q: float) -> float:
+        """Bucket-interpolated estimate of the q-quantile (0..1), in seconds."""
+        counts, total, _ = self.snapshot()
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else lower
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+    def stats(self) -> Dict[str, Any]:
+        _, count, total = self.snapshot()
+        return {
+            "count": count,
+            "mean_ms": round(total / count * 1000, 3) if count else 0.0,
+            "p50_ms": round(self.percentile(0.5) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+        }
+
+
+class Counter:
+    """Monotonic counter, sharded per thread like `Histogram`."""
+
+    __slots__ = ("name", "labels", "_shards")
+
+    def __init__(self, name: str, labels: Labels = ()) -> None:
+        self.name = name
+        self.labels = labels
+        self._shards: Dict[int, List[int]] = {}
+
+    def inc(self, amount: int = 1) -> None:
+        try:
+            shard = self._shards[get_ident()]
+        except KeyError:
+            shard = self._shards.setdefault(get_ident(), [0])
+        shard[0] += amount
+
+    @property
+    def value(self) -> int:
+        return sum(shard[0] for shard in list(self._shards.values()))
+
+
+# A gauge callback returns `(labels, value)` pairs when scraped.
+GaugeCallback = Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+
+_histograms: Dict[Tuple[str, Labels], Histogram] = {}
+_counters: Dict[Tuple[str, Labels], Counter] = {}
+_gauges: Dict[str, Tuple[str, GaugeCallback]] = {}
+_registry_lock = threading.Lock()
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def histogram(name: str, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels: Any) -> Histogram:
+    key = (name, _labels(labels))
+    found = _histograms.get(key)
+    if found is None:
+        with _registry_lock:
+            found = _histograms.setdefault(key, Histogram(name, buckets, key[1]))
+    return found
+
+
+def counter(name: str, **labels: Any) -> Counter:
+    key = (name, _labels(labels))
+    found = _counters.get(key)
+    if found is None:
+        with _registry_lock:
+            found = _counters.setdefault(key, Counter(name, key[1]))
+    return found
+
+
+def gauge(name: str, collect: GaugeCallback, help: str = "") -> None:
+    """Register (or replace) a gauge evaluated at scrape time."""
+    with _registry_lock:
+        _gauges[name] = (help, collect)
+
+
+def timed(hist: Histogram):
+    """Decorator for async handlers: observe the call's duration in `hist`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                hist.observe(perf_counter() - started)
+        # Resolved here: FastAPI would look string annotations up in this module.
+        wrapper.__signature__ = inspect.signature(fn, eval_str=True)
+        return wrapper
+    return decorate
+
+
+def _display_name(name: str, labels: Labels) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def histogram_stats(prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    return {
+        _display_name(name, labels): h.stats()
+        for (name, labels), h in sorted(_histograms.items()) if name.startswith(prefix)
+    }
+
+
+# ── Prometheus text exposition ──────────────────────────────────────────────
+_INVALID = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _prom_name(name: str, suffix: str = "") -> str:
+    return _INVALID.sub("_", name) + suffix
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _prom_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = ",".join(f'{_INVALID.sub("_", k)}="{_escape(str(v))}"' for k, v in labels)
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _prom_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    families: Dict[str, List[Histogram]] = {}
+    for (name, _), h in sorted(_histograms.items()):
+        families.setdefault(name, []).append(h)
+    for name, hists in families.items():
+        metric = _prom_name(name, "_seconds")
+        lines.append(f"# TYPE {metric} histogram")
+        for h in hists:
+            counts, count, total = h.snapshot()
+            cumulative = 0
+            for bound, n in zip((*h.bounds, math.inf), counts):
+                cumulative += n
+                lines.append(f"{metric}_bucket{_prom_labels((*h.labels, ('le', _prom_value(float(bound)))))} "
+                             f"{cumulative}")
+            lines.append(f"{metric}_sum{_prom_labels(h.labels)} {_prom_value(total)}")
+            lines.append(f"{metric}_count{_prom_labels(h.labels)} {count}")
+
+    counter_families: Dict[str, List[Counter]] = {}
+    for (name, _), c in sorted(_counters.items()):
+        counter_families.setdefault(name, []).append(c)
+    for name, counters in counter_families.items():
+        metric = _prom_name(name, "_total")
+        lines.append(f"# TYPE {metric} counter")
+        lines.extend(f"{metric}{_prom_labels(c.labels)} {c.value}" for c in counters)
+
+    for name, (help_text, collect) in sorted(_gauges.items()):
+        metric = _prom_name(name)
+        if help_text:
+            lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for labels, value in collect():
+            lines.append(f"{metric}{_prom_labels(sorted(labels.items()))} {_prom_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,289 @@
+"""
+Durable dashboard state: an append-only event journal plus periodic
+compressed snapshots, so a restart (or scale-to-zero) keeps today's totals,
+rolling windows and operator speeds.
+
+Enable with PERSIST_DIR (on Cloud Run, point it at a mounted volume; the
+container filesystem is not durable). Layout:
+
+    snapshot.<gen>.json.gz   full state of every dashboard at generation <gen>
+    journal.<gen>.jsonl      ingest events applied after that snapshot
+
+Startup loads the newest readable snapshot and replays only the journal
+segments from its generation on. Every SNAPSHOT_INTERVAL_SECONDS the journal
+is rotated to a new generation, a snapshot is written (temp file + rename)
+and older files are removed. The journal buffer is flushed every
+JOURNAL_FLUSH_SECONDS, which bounds what a hard crash can lose.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, MutableMapping
+
+from app.data import journal, store
+from app.data.aggregation import JobEvent, apply_event
+from app.data.backends import InMemoryBackend
+from app.data.journal import Journal
+from app.data.operator import OperatorRecord
+from app.data.registry import OperatorRegistry
+from app.data.rolling_window import BucketRing, RollingWindow
+from app.models import Dashboard, Kpi, Person
+from datadog_logger import log_datadog_event
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("PERSIST_SNAPSHOT_SECONDS", "300"))
+JOURNAL_FLUSH_SECONDS = float(os.getenv("PERSIST_FLUSH_SECONDS", "1"))
+JOURNAL_FSYNC = os.getenv("PERSIST_FSYNC", "0") == "1"
+ERROR_BACKOFF_MAX_SECONDS = 60.0   # cap of the doubling wait after failed writes
+
+SNAPSHOT_PREFIX = "snapshot."
+SNAPSHOT_SUFFIX = ".json.gz"
+
+
+# ── Dashboard <-> plain dict ────────────────────────────────────────────────
+def _dump_person(person: OperatorRecord) -> Dict[str, Any]:
+    data = Person.from_record(person).model_dump(mode="json")
+    data["window"] = [[ts, qty] for ts, qty in person.job_times]
+    return data
+
+
+def _load_person(data: Dict[str, Any]) -> OperatorRecord:
+    window = RollingWindow()
+    for ts, qty in data.pop("window", []):
+        window.add(ts, qty)
+    return Person.model_validate(data).to_record(job_times=window)
+
+
+def dump_dashboard(db: Dashboard) -> Dict[str, Any]:
+    state = db.kpi_state
+    if state:
+        state = {
+            "date": state["date"].isoformat(),
+            "total": state["total"],
+            "first_event_time": state["first_event_time"].isoformat(),
+            "recent": state["recent"].to_compact(),
+        }
+    return {
+        "title": db.title,
+        "status": db.status,
+        "kpis": [kpi.model_dump() for kpi in db.kpis],
+        "historyText": db.historyText,
+        "idleThreshold": db.idleThreshold,
+        "kpi_state": state,
+        "people": {
+            "hot": [_dump_person(p) for p in db.people],
+            "cold": [_dump_person(p) for p in db.people.cold()],
+        },
+    }
+
+
+def load_dashboard(data: Dict[str, Any]) -> Dashboard:
+    state = data.get("kpi_state")
+    if state:
+        state = {
+            "date": date.fromisoformat(state["date"]),
+            "total": state["total"],
+            "first_event_time": datetime.fromisoformat(state["first_event_time"]),
+            "recent": BucketRing.from_compact(state["recent"]),
+        }
+    people = OperatorRegistry.restore(
+        [_load_person(p) for p in data["people"]["hot"]],
+        [_load_person(p) for p in data["people"]["cold"]],
+    )
+    return Dashboard(
+        title=data["title"],
+        status=data["status"],
+        kpis=[Kpi.model_validate(k) for k in data["kpis"]],
+        historyText=data["historyText"],
+        idleThreshold=data["idleThreshold"],
+        kpi_state=state,
+        people=people,
+    )
+
+
+# ── Files ───────────────────────────────────────────────────────────────────
+def snapshot_path(directory: Path, generation: int) -> Path:
+    return directory / f"{SNAPSHOT_PREFIX}{generation:06d}{SNAPSHOT_SUFFIX}"
+
+
+def _snapshot_generations(directory: Path) -> List[int]:
+    generations = []
+    for path in directory.glob(f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}"):
+        try:
+            generations.append(int(path.name[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)]))
+        except ValueError:
+            continue
+    return sorted(generations, reverse=True)
+
+
+def _write_snapshot(directory: Path, generation: int, payload: Dict[str, Any]) -> int:
+    """Compress and atomically write a snapshot, then drop older files. Returns bytes written."""
+    target = snapshot_path(directory, generation)
+    tmp = target.with_suffix(".tmp")
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    with open(tmp, "wb") as fh:
+        fh.write(gzip.compress(raw, compresslevel=6))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, target)
+
+    for old in _snapshot_generations(directory):
+        if old < generation:
+            snapshot_path(directory, old).unlink(missing_ok=True)
+    for old, path in journal.segments(directory):
+        if old < generation:
+            path.unlink(missing_ok=True)
+    return target.stat().st_size
+
+
+def take_snapshot(directory: Path) -> tuple[int, Dict[str, Any]]:
+    """
+    Rotate the journal to a new generation and capture the state that goes
+    with it. Runs on the event loop, so no event can land in between; the
+    returned payload is written by `_write_snapshot` (off the loop).
+    """
+    active = journal.active()
+    generation = (active.generation if active else 0) + 1
+    if active:
+        active.rotate(generation)
+    payload = {
+        "generation": generation,
+        "taken_at": datetime.now(timezone.utc).isoformat(),
+        "dashboards": {key: dump_dashboard(db) for key, db in store.get_db().items()},
+    }
+    return generation, payload
+
+
+# ── Restore ─────────────────────────────────────────────────────────────────
+def replay_segment(path: Path, dashboards: MutableMapping[str, Dashboard]) -> int:
+    applied = 0
+    for ts, store_key, *rest in journal.read_segment(path):
+        db = dashboards.get(store_key)
+        if db is None:
+            continue
+        apply_event(db, JobEvent(ts, *rest))
+        applied += 1
+    return applied
+
+
+def restore(directory: Path) -> Dict[str, Any]:
+    """Load the newest snapshot into the store and replay the journal tail."""
+    started = time.perf_counter()
+    dashboards = store.get_db()
+    generation = 0
+    for candidate in _snapshot_generations(directory):
+        try:
+            with gzip.open(snapshot_path(directory, candidate), "rb") as fh:
+                payload = json.loads(fh.read())
+        except (OSError, ValueError) as exc:
+            logger.warning("skipping unreadable snapshot %s: %s", candidate, exc)
+            continue
+        for key, data in payload["dashboards"].items():
+            if key in dashboards:
+                dashboards[key] = load_dashboard(data)
+        generation = candidate
+        break
+
+    snapshot_seconds = time.perf_counter() - started
+    replayed = 0
+    segments = journal.segments(directory, since=generation)
+    for _, path in segments:
+        replayed += replay_segment(path, dashboards)
+
+    for key in dashboards:
+        store.mark_changed(key)
+
+    return {
+        "generation": generation,
+        "last_segment": segments[-1][0] if segments else generation,
+        "replayed_events": replayed,
+        "snapshot_seconds": round(snapshot_seconds, 4),
+        "total_seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+# ── Lifespan task ───────────────────────────────────────────────────────────
+async def run_persistence(directory: Path,
+                          snapshot_interval: float = SNAPSHOT_INTERVAL_SECONDS,
+                          flush_interval: float = JOURNAL_FLUSH_SECONDS) -> None:
+    """
+    Flush the journal periodically and snapshot every `snapshot_interval`;
+    final snapshot on shutdown. A failed write (full or unmounted volume) is
+    logged and retried after a backoff that doubles up to
+    `ERROR_BACKOFF_MAX_SECONDS`; it never ends the task.
+    """
+    next_snapshot = time.monotonic() + snapshot_interval
+    failures = 0
+    try:
+        while True:
+            delay = flush_interval * 2 ** failures
+            await asyncio.sleep(min(delay, ERROR_BACKOFF_MAX_SECONDS) if failures else delay)
+            try:
+                active = journal.active()
+                if active:
+                    await asyncio.to_thread(active.flush)
+                if time.monotonic() >= next_snapshot:
+                    generation, payload = take_snapshot(directory)
+                    size = await asyncio.to_thread(_write_snapshot, directory, generation, payload)
+                    next_snapshot = time.monotonic() + snapshot_interval
+                    log_datadog_event(
+                        status="ok",
+                        message=f"State snapshot {generation} written",
+                        event_type="persistence.snapshot",
+                        function_name="run_persistence",
+                        extra={"generation": generation, "bytes": size},
+                    )
+            except OSError as exc:
+                failures += 1
+                logger.warning("persistence write to %s failed: %s", directory, exc)
+                log_datadog_event(
+                    status="error",
+                    message=f"Persistence write failed: {exc}",
+                    event_type="persistence.error",
+                    function_name="run_persistence",
+                    extra={"directory": str(directory), "consecutive_failures": failures},
+                )
+            else:
+                failures = 0
+    finally:
+        try:
+            generation, payload = take_snapshot(directory)
+            await asyncio.to_thread(_write_snapshot, directory, generation, payload)
+        except Exception as exc:  # noqa: BLE001 - must not mask the cancellation
+            logger.error("final snapshot to %s failed: %s", directory, exc)
+        finally:
+            active = journal.active()
+            journal.activate(None)
+            if active:
+                active.close()
+
+
+def start_persistence() -> List["asyncio.Task[None]"]:
+    """Restore state from PERSIST_DIR and start journaling (no-op when unset)."""
+    raw = os.getenv("PERSIST_DIR")
+    if not raw:
+        return []
+    if not isinstance(store.get_backend(), InMemoryBackend):
+        logger.warning("PERSIST_DIR ignored: the shared state backend persists itself")
+        return []
+    directory = Path(raw)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    stats = restore(directory)
+    journal.activate(Journal(directory, stats["last_segment"], fsync=JOURNAL_FSYNC))
+    log_datadog_event(
+        status="ok",
+        message="Dashboard state restored",
+        event_type="persistence.restore",
+        function_name="start_persistence",
+        extra={"directory": str(directory), **stats},
+    )
+    return [asyncio.create_task(run_persistence(directory), name="persistence")]
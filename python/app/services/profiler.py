@@ -0,0 +1,208 @@
+"""
+Opt-in sampling profiler and slow-request capture.
+
+Both read `sys._current_frames()` from a daemon thread: every `interval` it
+records the Python stack of every other thread (event loop, belt-cv workers,
+the log writer, ...), so nothing runs on the profiled code paths themselves.
+Stacks are in the collapsed format (`thread;outer;...;inner count` per line)
+that flamegraph.pl, speedscope and inferno read.
+
+`profile(seconds)` samples on demand (admin endpoint, one run at a time).
+`slow_requests` is off unless SLOW_REQUEST_MS (or the admin endpoint) sets a
+threshold: `SlowRequestMiddleware` then tracks in-flight HTTP requests, a
+watchdog samples stacks while any of them is past the threshold, and a
+request that ends over it is logged with those samples. While off, the
+middleware costs one attribute check per request and no thread runs.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.services.metrics import counter
+from datadog_logger import log_datadog_event
+
+PROFILE_INTERVAL = 0.005            # seconds between samples (200 Hz)
+PROFILE_MAX_SECONDS = 60.0
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))   # 0 = off
+SLOW_REQUEST_SAMPLES = 10           # stack samples kept per slow request
+MAX_DEPTH = 64                      # frames per stack (innermost kept)
+# Requests that are meant to stay open (SSE streams) or profile on purpose
+_NOT_TRACKED = ("/stream", "/admin/profile")
+
+
+class ProfileBusy(Exception):
+    """A profile is already being captured."""
+
+
+# ── Stack sampling ──────────────────────────────────────────────────────────
+def _collapse(frame: Any, thread_name: str) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        code = frame.f_code
+        labels.append(f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(skip: int) -> Iterator[str]:
+    """One collapsed stack per live thread except `skip` (the sampler's own ident)."""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    for ident, frame in sys._current_frames().items():
+        if ident != skip:
+            yield _collapse(frame, names.get(ident, f"thread-{ident}"))
+
+
+def render_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+_profile_lock = threading.Lock()
+
+
+def profile(seconds: float, interval: float = PROFILE_INTERVAL) -> Tuple[str, int]:
+    """
+    Sample all threads for `seconds`; returns (collapsed stacks, samples taken).
+    Blocks the calling thread, so run it off the event loop (`asyncio.to_thread`).
+    Raises ProfileBusy while another profile is running.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfileBusy("a profile is already being captured")
+    try:
+        seconds = min(max(seconds, interval), PROFILE_MAX_SECONDS)
+        me = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            stacks.update(sample_stacks(me))
+            samples += 1
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+    return render_collapsed(stacks), samples
+
+
+# ── Slow-request capture ────────────────────────────────────────────────────
+class _InFlight:
+    __slots__ = ("method", "path", "started", "sampled", "samples")
+
+    def __init__(self, method: str, path: str) -> None:
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.sampled = 0
+        self.samples: Counter = Counter()
+
+
+class SlowRequestMonitor:
+    """In-flight request registry plus the watchdog thread that samples slow ones."""
+
+    def __init__(self) -> None:
+        self.threshold = 0.0            # seconds; 0 = off
+        self._inflight: Dict[int, _InFlight] = {}
+        self._tokens = itertools.count()
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._slow = counter("http.slow_requests")
+
+    def configure(self, threshold_ms: float) -> None:
+        """Set the threshold (0 turns capture off); starts/stops the watchdog."""
+        self.threshold = max(0.0, threshold_ms) / 1000
+        if self.threshold and self._watchdog is None:
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="slow-request-watchdog", daemon=True)
+            self._watchdog.start()
+        elif not self.threshold and self._watchdog is not None:
+            self._stop.set()
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+            self._inflight.clear()
+
+    def begin(self, method: str, path: str) -> Optional[int]:
+        if path.endswith(_NOT_TRACKED):
+            return None
+        token = next(self._tokens)
+        self._inflight[token] = _InFlight(method, path)
+        return token
+
+    def end(self, token: Optional[int]) -> None:
+        request = self._inflight.pop(token, None) if token is not None else None
+        if request is None:
+            return
+        elapsed = time.perf_counter() - request.started
+        if not self.threshold or elapsed < self.threshold:
+            return
+        self._slow.inc()
+        log_datadog_event(
+            status="warning",
+            message=f"Slow request {request.method} {request.path}: {elapsed * 1000:.0f} ms",
+            event_type="http.slow_request",
+            function_name="SlowRequestMonitor.end",
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "duration_ms": round(elapsed * 1000, 1),
+                "threshold_ms": self.threshold * 1000,
+                "samples": request.sampled,
+                # Collapsed stacks of all threads sampled while the request was over the threshold
+                "stacks": dict(request.samples.most_common()),
+            },
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "watchdog_running": self._watchdog is not None,
+            "in_flight": len(self._inflight),
+            "slow_requests": self._slow.value,
+        }
+
+    def _watch(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.is_set():
+            threshold = self.threshold
+            # Poll at a quarter of the threshold: a request is sampled once it is
+            # at most 25 % past it, then every poll until it ends.
+            self._stop.wait(min(max(threshold / 4, 0.005), 0.05))
+            now = time.perf_counter()
+            slow = [r for r in list(self._inflight.values())
+                    if now - r.started >= threshold and r.sampled < SLOW_REQUEST_SAMPLES]
+            if slow:
+                stacks = list(sample_stacks(me))
+                for request in slow:
+                    request.sampled += 1
+                    request.samples.update(stacks)
+
+
+slow_requests = SlowRequestMonitor()
+
+
+def start_slow_request_capture() -> None:
+    slow_requests.configure(SLOW_REQUEST_MS)
+
+
+def stop_slow_request_capture() -> None:
+    slow_requests.configure(0)
+
+
+class SlowRequestMiddleware:
+    """ASGI middleware feeding `slow_requests`; a pass-through while capture is off."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if not slow_requests.threshold or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = slow_requests.begin(scope["method"], scope["path"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            slow_requests.end(token)
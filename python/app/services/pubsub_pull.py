@@ -0,0 +1,109 @@
+"""
+Optional pull-subscriber mode for local runs against the Pub/Sub emulator
+(or any environment where push delivery is not wanted).
+
+Enable with, for example:
+    PUBSUB_EMULATOR_HOST=localhost:8085
+    PUBSUB_PULL_SUBSCRIPTIONS="jobs-action=projects/demo/subscriptions/jobs,geek-pickorder=projects/demo/subscriptions/picks"
+
+Each subscription is pulled in batches of up to PUBSUB_PULL_MAX_MESSAGES and
+handed to `ingest_envelopes`; acked messages are acknowledged, nacked ones
+get their ack deadline reset to 0 so they are redelivered.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+import os
+from typing import Any, Dict, List
+
+from app.services.batch_ingest import ingest_envelopes
+from datadog_logger import log_datadog_event
+
+logger = logging.getLogger(__name__)
+
+PULL_MAX_MESSAGES = int(os.getenv("PUBSUB_PULL_MAX_MESSAGES", "500"))
+PULL_TIMEOUT_SECONDS = 10.0
+ERROR_BACKOFF_SECONDS = 5.0
+
+
+def configured_subscriptions() -> Dict[str, str]:
+    """Parse PUBSUB_PULL_SUBSCRIPTIONS (`topic=subscription_path,...`)."""
+    raw = os.getenv("PUBSUB_PULL_SUBSCRIPTIONS", "")
+    subscriptions: Dict[str, str] = {}
+    for part in raw.split(","):
+        if "=" in part:
+            topic, path = part.split("=", 1)
+            subscriptions[topic.strip()] = path.strip()
+    return subscriptions
+
+
+def _as_envelope(received: Any) -> Dict[str, Any]:
+    # Same shape as a push request, so the push decoders can be reused as-is.
+    message = received.message
+    return {
+        "message": {
+            "data": base64.b64encode(message.data).decode("ascii"),
+            "messageId": message.message_id,
+            "attributes": dict(message.attributes),
+        },
+        "subscription": "",
+    }
+
+
+async def run_pull_subscriber(topic: str, subscription: str) -> None:
+    """Pull `subscription` forever, feeding each batch to the batch ingest path."""
+    from google.api_core import exceptions as gexc  # optional dependency
+    from google.cloud import pubsub_v1
+
+    subscriber = pubsub_v1.SubscriberClient()
+    try:
+        while True:
+            try:
+                response = await asyncio.to_thread(
+                    subscriber.pull,
+                    request={"subscription": subscription, "max_messages": PULL_MAX_MESSAGES},
+                    timeout=PULL_TIMEOUT_SECONDS,
+                )
+            except gexc.DeadlineExceeded:
+                continue
+            except gexc.GoogleAPICallError as exc:
+                logger.warning("pull from %s failed: %s", subscription, exc)
+                log_datadog_event(
+                    status="error",
+                    message=f"Pub/Sub pull failed: {exc}",
+                    event_type="pubsub.pull",
+                    function_name="run_pull_subscriber",
+                    extra={"subscription": subscription},
+                )
+                await asyncio.sleep(ERROR_BACKOFF_SECONDS)
+                continue
+
+            received = list(response.received_messages)
+            if not received:
+                continue
+
+            results = await ingest_envelopes([(topic, _as_envelope(m)) for m in received])
+            ack_ids = [m.ack_id for m, r in zip(received, results) if r["ack"]]
+            nack_ids = [m.ack_id for m, r in zip(received, results) if not r["ack"]]
+            if ack_ids:
+                await asyncio.to_thread(
+                    subscriber.acknowledge,
+                    request={"subscription": subscription, "ack_ids": ack_ids},
+                )
+            if nack_ids:
+                await asyncio.to_thread(
+                    subscriber.modify_ack_deadline,
+                    request={"subscription": subscription, "ack_ids": nack_ids, "ack_deadline_seconds": 0},
+                )
+    finally:
+        subscriber.close()
+
+
+def start_pull_subscribers() -> List[asyncio.Task]:
+    """Start one pull task per configured subscription (none when unset)."""
+    return [
+        asyncio.create_task(run_pull_subscriber(topic, path), name=f"pubsub-pull-{topic}")
+        for topic, path in configured_subscriptions().items()
+    ]
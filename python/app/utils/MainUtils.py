@@ -1,13 +1,13 @@
 # app/utils.py
-from typing import List, Optional
-from app.models import Person
+from app.data.registry import OperatorRegistry
+from app.data.operator import OperatorRecord
 
-def get_or_create_person(people: List[Person], name: str,category : str , comment:str) -> Person:
-    for p in people:
-        if p.name == name:
-            return p
+def get_or_create_person(people: OperatorRegistry, name: str,category : str , comment:str) -> OperatorRecord:
+    person = people.get(name)  # hot, or promoted back from the cold tier
+    if person is not None:
+        return person
 
     # — new operator —
-    new_person = Person(name=name,category=category,comment=comment, speed=0, idleSeconds=0)
-    people.append(new_person)
-    return new_person
\ No newline at end of file
+    new_person = OperatorRecord(name=name,category=category,comment=comment, speed=0, idleSeconds=0)
+    people.add(new_person)
+    return new_person
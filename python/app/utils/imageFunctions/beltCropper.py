@@ -1,34 +1,34 @@
 import cv2
 import numpy as np
-from typing import Dict
+from typing import Dict, Optional
 
-from app.utils.imageFunctions.maskLoader import FRAME_SIZE, REGION_MASKS
+from app.utils.imageFunctions.maskLoader import MASK_REGISTRY, BeltGeometry
 
-def crop_belts(raw_img_bytes: bytes) -> Dict[str, bytes]:
+def decode_frame(raw_img_bytes: bytes, geometry: Optional[BeltGeometry] = None) -> np.ndarray:
+    geometry = geometry or MASK_REGISTRY.geometry()
     img = cv2.imdecode(np.frombuffer(raw_img_bytes, np.uint8), cv2.IMREAD_COLOR)
-    if img.shape[:2][::-1] != FRAME_SIZE:
-        raise ValueError(f"Incoming frame size mismatch; expected {FRAME_SIZE}, got {img.shape[1::-1]}")
-
+    if img is None:
+        raise ValueError("Incoming frame could not be decoded")
+    if img.shape[:2][::-1] != geometry.frame_size:
+        raise ValueError(f"Incoming frame size mismatch; expected {geometry.frame_size}, got {img.shape[1::-1]}")
+    return img
+
+def crop_belt_array(img: np.ndarray, belt_id: str, geometry: Optional[BeltGeometry] = None) -> np.ndarray:
+    """BGR crop of one belt segment, straight from a decoded frame (no encoding)."""
+    segment = (geometry or MASK_REGISTRY.geometry()).segments[belt_id]
+    # Slice the segment's bounding box (a view) and black out pixels outside the belt
+    roi = img[segment.roi]
+    return cv2.bitwise_and(roi, roi, mask=segment.mask)
+
+def crop_belt_arrays(img: np.ndarray, geometry: Optional[BeltGeometry] = None) -> Dict[str, np.ndarray]:
+    geometry = geometry or MASK_REGISTRY.geometry()
+    return {belt_id: crop_belt_array(img, belt_id, geometry) for belt_id in geometry.segments}
+
+def crop_belts(raw_img_bytes: bytes, geometry: Optional[BeltGeometry] = None) -> Dict[str, bytes]:
+    """PNG-encoded crops; only needed when the crops leave the process (debug output)."""
     crops: Dict[str, bytes] = {}
 
-    for belt_id, bool_mask in REGION_MASKS.items():
-        # Ensure mask is uint8 for bitwise operations
-        m = bool_mask.astype(np.uint8)[:, :, None]
-
-        # Apply mask to isolate belt
-        masked = cv2.bitwise_and(img, img, mask=m[:, :, 0])
-
-        # Get bounding-box coordinates from mask
-        ys, xs = np.where(bool_mask)
-        if len(xs) == 0 or len(ys) == 0:
-            continue  # Skip empty masks
-
-        x0, x1, y0, y1 = xs.min(), xs.max(), ys.min(), ys.max()
-
-        # Crop image to the tight bounding box
-        crop = masked[y0:y1+1, x0:x1+1]
-
-        # Encode the cropped image as PNG
+    for belt_id, crop in crop_belt_arrays(decode_frame(raw_img_bytes, geometry), geometry).items():
         _, buf = cv2.imencode(".png", crop)
         crops[belt_id] = buf.tobytes()
 
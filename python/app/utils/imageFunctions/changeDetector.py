@@ -0,0 +1,90 @@
+import cv2
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.metrics import counter
+from app.utils.imageFunctions.maskLoader import DEFAULT_CAMERA, BeltGeometry
+
+FINGERPRINT_SCALE = 8   # one fingerprint cell per 8x8 block of the segment's box
+
+
+class ChangeDetector:
+    """
+    Per-segment change detection for belt frames.
+
+    A segment's fingerprint is its grayscale bounding box averaged down to
+    8x8-pixel cells. A segment counts as changed when any cell inside the
+    belt differs from the fingerprint its cached count was computed from by
+    more than `threshold` gray levels: a single label entering or leaving
+    moves a cell by far more than sensor/JPEG noise does once averaged. The
+    reference is only replaced on recompute, so slow drift still adds up to
+    a recount. `threshold <= 0` disables skipping.
+
+    Frames/segments seen and skipped are also counted on /metrics as
+    `belt.frames`, `belt.frames_skipped`, `belt.segments` and
+    `belt.segments_skipped`, labelled with the camera.
+    """
+
+    def __init__(self, geometry: BeltGeometry, threshold: float, camera_id: str = DEFAULT_CAMERA) -> None:
+        self.geometry = geometry
+        self.threshold = threshold
+        self._cells: Dict[str, np.ndarray] = {}     # belt_id -> bool mask of cells on the belt
+        self._reference: Dict[str, Tuple[np.ndarray, int]] = {}
+        self._counters = {"frames": 0, "frames_skipped": 0, "segments": 0, "segments_skipped": 0}
+        self._metrics = {name: counter(f"belt.{name}", camera=camera_id) for name in self._counters}
+
+    def _cell_mask(self, belt_id: str, shape: Tuple[int, int]) -> np.ndarray:
+        cells = self._cells.get(belt_id)
+        if cells is None:
+            mask = self.geometry.segments[belt_id].mask.astype(np.float32)
+            cells = cv2.resize(mask, shape[::-1], interpolation=cv2.INTER_AREA) > 0.5
+            self._cells[belt_id] = cells
+        return cells
+
+    def fingerprint(self, img: np.ndarray, belt_id: str) -> np.ndarray:
+        segment = self.geometry.segments[belt_id]
+        gray = cv2.cvtColor(img[segment.roi], cv2.COLOR_BGR2GRAY)
+        h, w = gray.shape
+        size = (max(1, w // FINGERPRINT_SCALE), max(1, h // FINGERPRINT_SCALE))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+    def fingerprints(self, img: np.ndarray) -> Dict[str, np.ndarray]:
+        return {belt_id: self.fingerprint(img, belt_id) for belt_id in self.geometry.segments}
+
+    def cached_count(self, belt_id: str, fingerprint: np.ndarray) -> Optional[int]:
+        """The cached count if `belt_id` is unchanged since it was computed, else None."""
+        reference = self._reference.get(belt_id)
+        if self.threshold <= 0 or reference is None or reference[0].shape != fingerprint.shape:
+            return None
+        diff = cv2.absdiff(fingerprint, reference[0])[self._cell_mask(belt_id, fingerprint.shape)]
+        if diff.size and diff.max() > self.threshold:
+            return None
+        return reference[1]
+
+    def split(self, fingerprints: Dict[str, np.ndarray]) -> Tuple[List[str], Dict[str, int]]:
+        """(segments to recompute, cached counts for the rest); updates the skip counters."""
+        changed: List[str] = []
+        cached: Dict[str, int] = {}
+        for belt_id, fingerprint in fingerprints.items():
+            count = self.cached_count(belt_id, fingerprint)
+            if count is None:
+                changed.append(belt_id)
+            else:
+                cached[belt_id] = count
+        for name, amount in (("frames", 1), ("frames_skipped", int(not changed)),
+                             ("segments", len(fingerprints)), ("segments_skipped", len(cached))):
+            self._counters[name] += amount
+            self._metrics[name].inc(amount)
+        return changed, cached
+
+    def remember(self, belt_id: str, fingerprint: np.ndarray, count: int) -> None:
+        self._reference[belt_id] = (fingerprint, count)
+
+    def stats(self) -> Dict[str, Any]:
+        c = self._counters
+        return {
+            "threshold": self.threshold,
+            **c,
+            "frame_skip_ratio": round(c["frames_skipped"] / c["frames"], 4) if c["frames"] else 0.0,
+            "segment_skip_ratio": round(c["segments_skipped"] / c["segments"], 4) if c["segments"] else 0.0,
+        }
@@ -1,15 +1,21 @@
+import json
+import os
+import threading
 import cv2
 import numpy as np
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from skimage.measure import label
 
 APP_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_MASK_FILE = str(APP_DIR)[:-5]+ "assets/belt_mask.png"
 
 
 EXPECTED_SEGMENTS = 6
 
-def load_region_masks():
-    MASK_FILE = str(APP_DIR)[:-5]+ "assets/belt_mask.png"
+def load_region_masks(mask_file: str = DEFAULT_MASK_FILE):
+    MASK_FILE = mask_file
     mask_img = cv2.imread(str(MASK_FILE))
     if mask_img is None:
         raise FileNotFoundError(
@@ -43,4 +49,127 @@ def load_region_masks():
         "Please verify the mask image manually."
     )
 
-REGION_MASKS, FRAME_SIZE = load_region_masks()
+@dataclass(frozen=True)
+class SegmentGeometry:
+    """Tight bounding box of one belt segment and its mask cropped to it."""
+    x0: int
+    y0: int
+    x1: int     # exclusive
+    y1: int     # exclusive
+    mask: np.ndarray    # uint8 (0/1), shape (y1 - y0, x1 - x0)
+
+    @property
+    def roi(self) -> Tuple[slice, slice]:
+        return slice(self.y0, self.y1), slice(self.x0, self.x1)
+
+
+@dataclass(frozen=True)
+class BeltGeometry:
+    """Per-segment geometry derived once from the full-frame region masks."""
+    frame_size: Tuple[int, int]     # (width, height)
+    segments: Dict[str, SegmentGeometry]
+
+
+def build_belt_geometry(region_masks, frame_size) -> BeltGeometry:
+    segments: Dict[str, SegmentGeometry] = {}
+    for belt_id, bool_mask in region_masks.items():
+        ys, xs = np.nonzero(bool_mask)
+        if len(xs) == 0:
+            continue  # empty masks never produce a crop
+        x0, x1, y0, y1 = int(xs.min()), int(xs.max()) + 1, int(ys.min()), int(ys.max()) + 1
+        mask = np.ascontiguousarray(bool_mask[y0:y1, x0:x1], dtype=np.uint8)
+        mask.setflags(write=False)
+        segments[belt_id] = SegmentGeometry(x0, y0, x1, y1, mask)
+    return BeltGeometry(frame_size=frame_size, segments=segments)
+
+
+# ── Camera profiles ─────────────────────────────────────────────────────────
+DEFAULT_CAMERA = "default"
+# Belt segments of the default mask, ordered physically from left to right
+DEFAULT_BELT_ORDER = ["segment_6", "segment_4", "segment_2", "segment_1", "segment_3", "segment_5"]
+
+
+@dataclass(frozen=True)
+class CameraProfile:
+    """One belt camera: its mask, the dashboard it feeds and how its belts are laid out."""
+    camera_id: str
+    mask_file: str = DEFAULT_MASK_FILE
+    dashboard: str = "default"
+    belt_order: List[str] = field(default_factory=lambda: list(DEFAULT_BELT_ORDER))
+    error_belt: str = "segment_6"
+
+
+class MaskRegistry:
+    """
+    Camera id -> profile, with each profile's masks loaded on first use and
+    cached. Loading runs the HSV search over the mask image, so it happens
+    once per camera, under a lock (pool threads may ask concurrently).
+    """
+
+    def __init__(self, profiles: List[CameraProfile]) -> None:
+        self._profiles: Dict[str, CameraProfile] = {p.camera_id: p for p in profiles}
+        self._loaded: Dict[str, Tuple[Dict[str, np.ndarray], BeltGeometry]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, profile: CameraProfile) -> None:
+        with self._lock:
+            self._profiles[profile.camera_id] = profile
+            self._loaded.pop(profile.camera_id, None)
+
+    def profile(self, camera_id: str) -> CameraProfile:
+        """Raises KeyError for unknown cameras."""
+        return self._profiles[camera_id]
+
+    def cameras(self) -> List[str]:
+        return list(self._profiles)
+
+    def is_loaded(self, camera_id: str) -> bool:
+        return camera_id in self._loaded
+
+    def _load(self, camera_id: str) -> Tuple[Dict[str, np.ndarray], BeltGeometry]:
+        loaded = self._loaded.get(camera_id)
+        if loaded is None:
+            with self._lock:
+                loaded = self._loaded.get(camera_id)
+                if loaded is None:
+                    region_masks, frame_size = load_region_masks(self._profiles[camera_id].mask_file)
+                    loaded = (region_masks, build_belt_geometry(region_masks, frame_size))
+                    self._loaded[camera_id] = loaded
+        return loaded
+
+    def region_masks(self, camera_id: str = DEFAULT_CAMERA) -> Dict[str, np.ndarray]:
+        return self._load(camera_id)[0]
+
+    def geometry(self, camera_id: str = DEFAULT_CAMERA) -> BeltGeometry:
+        return self._load(camera_id)[1]
+
+
+def load_camera_profiles(path: Optional[str]) -> List[CameraProfile]:
+    """
+    The default camera plus the profiles in `path` (BELT_CAMERAS_FILE), a JSON
+    list of CameraProfile fields; relative mask files resolve against the
+    JSON file's directory.
+    """
+    profiles = [CameraProfile(DEFAULT_CAMERA)]
+    if path:
+        base = Path(path).resolve().parent
+        with open(path) as fh:
+            for entry in json.load(fh):
+                if "mask_file" in entry:
+                    entry["mask_file"] = str(base / entry["mask_file"])
+                profiles.append(CameraProfile(**entry))
+    return profiles
+
+
+MASK_REGISTRY = MaskRegistry(load_camera_profiles(os.getenv("BELT_CAMERAS_FILE")))
+
+
+def __getattr__(name):
+    # The default camera's masks, loaded on first access rather than at import
+    if name == "REGION_MASKS":
+        return MASK_REGISTRY.region_masks(DEFAULT_CAMERA)
+    if name == "FRAME_SIZE":
+        return MASK_REGISTRY.geometry(DEFAULT_CAMERA).frame_size
+    if name == "BELT_GEOMETRY":
+        return MASK_REGISTRY.geometry(DEFAULT_CAMERA)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
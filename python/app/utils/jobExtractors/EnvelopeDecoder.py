@@ -0,0 +1,60 @@
+"""
+Shared decoding of Pub/Sub push envelopes for the jobs-action, geek-putaway
+and geek-pickorder feeds (push routers and batch/pull ingestion alike).
+
+`message.data` is decoded in a single pass: base64 straight to bytes, bytes
+straight to JSON (no intermediate str), with orjson when it is installed and
+the stdlib json module otherwise. The decoded body is only an input for the
+feed's job_data builder; builders copy out the fields a dashboard uses and
+the body is dropped with the request.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from time import perf_counter
+from typing import Any, Dict
+
+from app.services.metrics import FAST_BUCKETS, histogram
+
+try:
+    import orjson  # optional, faster JSON backend
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+# bytes/str -> object; orjson.JSONDecodeError subclasses json.JSONDecodeError (a ValueError)
+loads = orjson.loads if orjson is not None else json.loads
+
+_decode_time = histogram("ingest.phase", FAST_BUCKETS, phase="decode")
+
+
+def decode_message_data(message: Dict[str, Any]) -> Any:
+    """base64 JSON `message.data` of a Pub/Sub push message -> decoded body."""
+    encoded = message.get("data")
+    if not encoded:
+        raise ValueError("Missing 'message.data' field in Pub/Sub envelope")
+    started = perf_counter()
+    body = loads(base64.b64decode(encoded))
+    _decode_time.observe(perf_counter() - started)
+    return body
+
+
+def decode_nested(value: Any) -> Any:
+    """
+    A nested `data` field that may be decoded already, JSON text, or base64
+    JSON (CloudEvents double encoding). The form is picked from the first
+    character (base64 never starts with `{` or `[`), so the value is parsed
+    once; anything that is neither is returned unchanged.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return loads(value)
+    if not isinstance(value, str):
+        return value
+    text = value.strip()
+    try:
+        if text[:1] in ("{", "["):
+            return loads(text)
+        return loads(base64.b64decode(text, validate=True))
+    except ValueError:  # includes binascii.Error
+        return value
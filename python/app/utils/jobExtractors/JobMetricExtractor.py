@@ -1,84 +1,227 @@
-from typing import Dict, Any
+"""
+Per-job-type metrics of a jobs-action message (logged with every processed job).
 
-async def extract_fma_metrics(job_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Extracts metrics specific to the FMA job type."""
-    return {
-        "comment": job_data.get("comment", ""),  # Extract the comment
-        "category": job_data.get("category", ""),  # Extract the category
-        "employee_code": job_data.get("EMPLOYEE_CODE", ""),  # Extract employee code
-        "total_cartons": job_data.get("LINE_COUNT", 0),  # Total cartons processed
-        "total_handling_units": job_data.get("HANDLING_UNIT_COUNT", 0),  # Number of handling units
-        "net_weight": job_data.get("NET_WEIGHT_DURATION", 0),  # Total net weight
-        "gross_weight": job_data.get("GROSS_WEIGHT_DURATION", 0),  # Total gross weight
-        "volume": job_data.get("VOLUME_DURATION", 0),  # Volume of stored items
-        "duration_seconds": job_data.get("DURATION_SECONDS", 0),  # Total duration of job
-    }
-
-
-async def extract_monopicking_metrics(job_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Extracts metrics specific to the MonoPicking job type."""
+The built-in job types have hand-written extractors (plain functions, one dict
+literal each). Job types can be added or overridden without code changes
+through JOB_METRICS_FILE, a JSON object {job_type: {output: field}}, where a
+field is
+    {"source": KEY, "default": ..., "type": "any"|"number"|"str"}
+        job_data.get(KEY, default); with "number"/"str", values of another type
+        (None included) are replaced by the default
+    {"derive": "ratio", "of": [a, b]}
+        a / b, or 0 when b == 0
+    {"derive": "equals", "of": [a], "value": ..., "ignore_case": bool}
+        a == value
+Operands are inline fields or the names of fields defined earlier in the spec.
+Every configured job type starts with COMMON_FIELDS. Specs are validated at
+import and compiled into a table of (output, source, default, type) entries
+read by one small loop; derived fields are small closures over their operands.
+"""
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-    # Ensure that 'DURATION_SECONDS' and 'LINE_COUNT' are valid numbers, otherwise set them to default values.
-    duration_seconds = job_data.get("DURATION_SECONDS", 0)
-    line_count = job_data.get("NUMBER_OF_LINES", 1)  # Default to 1 to avoid division by zero.
+Extractor = Callable[[Dict[str, Any]], Dict[str, Any]]
+# (job_data, metrics extracted so far) -> value of one field
+Getter = Callable[[Dict[str, Any], Dict[str, Any]], Any]
 
-    # If either value is None or not a valid number, handle accordingly
-    if duration_seconds is None or not isinstance(duration_seconds, (int, float)):
-        duration_seconds = 0  # Default to 0 if invalid
+COMMON_FIELDS: Dict[str, Any] = {
+    "comment": {"source": "comment", "default": ""},
+    "category": {"source": "category", "default": ""},
+    "employee_code": {"source": "EMPLOYEE_CODE", "default": ""},
+}
 
-    if line_count is None or not isinstance(line_count, (int, float)):
-        line_count = 1  # Default to 1 if invalid
+# ── Built-in job types ──────────────────────────────────────────────────────
+def extract_fma_metrics(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extracts metrics specific to the FMA (Replenishment) job type."""
+    get = job_data.get
+    return {
+        "comment": get("comment", ""),
+        "category": get("category", ""),
+        "employee_code": get("EMPLOYEE_CODE", ""),
+        "total_cartons": get("LINE_COUNT", 0),
+        "total_handling_units": get("HANDLING_UNIT_COUNT", 0),
+        "net_weight": get("NET_WEIGHT_DURATION", 0),
+        "gross_weight": get("GROSS_WEIGHT_DURATION", 0),
+        "volume": get("VOLUME_DURATION", 0),
+        "duration_seconds": get("DURATION_SECONDS", 0),
+    }
 
-    # Calculate picking speed, avoid division by zero
-    picking_speed = duration_seconds / line_count if line_count != 0 else 0
 
+def extract_monopicking_metrics(job_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extracts metrics specific to the MonoPicking (Pick) job type."""
+    get = job_data.get
+    duration_seconds = get("DURATION_SECONDS", 0)
+    line_count = get("NUMBER_OF_LINES", 1)   # defaults to 1 to avoid division by zero
+    if not isinstance(duration_seconds, (int, float)):
+        duration_seconds = 0
+    if not isinstance(line_count, (int, float)):
+        line_count = 1
     return {
-        "comment": job_data.get("comment", ""),  # Extract the comment
-        "category": job_data.get("category", ""),  # Extract the category
-        "employee_code": job_data.get("EMPLOYEE_CODE", ""),  # Extract employee code
-        "total_items_processed": job_data.get("NUMBER_OF_LINES", 0),  # Number of items processed
-        "pick_duration": duration_seconds,  # Time spent picking items
-        "picking_speed": picking_speed,  # Time per item picked
-        "total_cartons_picked": job_data.get("CARTON_COUNT", 0),  # Cartons picked
-        "total_handling_units": job_data.get("HANDLING_UNIT_COUNT", 0),  # Handling units involved
+        "comment": get("comment", ""),
+        "category": get("category", ""),
+        "employee_code": get("EMPLOYEE_CODE", ""),
+        "total_items_processed": get("NUMBER_OF_LINES", 0),
+        "pick_duration": duration_seconds,
+        "picking_speed": duration_seconds / line_count if line_count != 0 else 0,   # time per line
+        "total_cartons_picked": get("CARTON_COUNT", 0),
+        "total_handling_units": get("HANDLING_UNIT_COUNT", 0),
     }
 
 
-async def extract_inbound_and_bulk_metrics(job_data: Dict[str, Any]) -> Dict[str, Any]:
+def extract_inbound_and_bulk_metrics(job_data: Dict[str, Any]) -> Dict[str, Any]:
     """Extracts metrics specific to the InboundAndBulk job type."""
+    get = job_data.get
     return {
-        "comment": job_data.get("comment", ""),  # Extract the comment
-        "category": job_data.get("category", ""),  # Extract the category
-        "employee_code": job_data.get("EMPLOYEE_CODE", ""),  # Extract employee code
-        "total_units_processed": job_data.get("LINE_COUNT", 0),  # Units processed
-        "inbound_duration": job_data.get("DURATION_SECONDS", 0),  # Time spent in inbound processing
-        "bulk_processing_time": job_data.get("QTY_LEVEL_1_DURATION", 0),  # Time for bulk processing
-        "volume": job_data.get("VOLUME_DURATION", 0),  # Volume of processed items
-        "weight": job_data.get("NET_WEIGHT_DURATION", 0),  # Weight of processed items
+        "comment": get("comment", ""),
+        "category": get("category", ""),
+        "employee_code": get("EMPLOYEE_CODE", ""),
+        "total_units_processed": get("LINE_COUNT", 0),
+        "inbound_duration": get("DURATION_SECONDS", 0),
+        "bulk_processing_time": get("QTY_LEVEL_1_DURATION", 0),
+        "volume": get("VOLUME_DURATION", 0),
+        "weight": get("NET_WEIGHT_DURATION", 0),
     }
 
-async def extract_returns_metrics(job_data: Dict[str, Any]) -> Dict[str, Any]:
+
+def extract_returns_metrics(job_data: Dict[str, Any]) -> Dict[str, Any]:
     """Extracts metrics specific to the Returns job type."""
+    get = job_data.get
+    comment = get("comment", "")
     return {
-        "comment": job_data.get("comment", ""),  # Extract the comment
-        "category": job_data.get("category", ""),  # Extract the category
-        "employee_code": job_data.get("EMPLOYEE_CODE", ""),  # Extract employee code
-        "total_returns": job_data.get("LINE_COUNT", 0),  # Number of items returned
-        "return_duration": job_data.get("DURATION_SECONDS", 0),  # Time spent processing returns
-        "return_weight": job_data.get("NET_WEIGHT_DURATION", 0),  # Weight of returned items
-        "return_volume": job_data.get("VOLUME_DURATION", 0),  # Volume of returned items
-        "return_receipts": job_data.get("comment", "").lower() == "return receipts",  # Check for return receipts
+        "comment": comment,
+        "category": get("category", ""),
+        "employee_code": get("EMPLOYEE_CODE", ""),
+        "total_returns": get("LINE_COUNT", 0),
+        "return_duration": get("DURATION_SECONDS", 0),
+        "return_weight": get("NET_WEIGHT_DURATION", 0),
+        "return_volume": get("VOLUME_DURATION", 0),
+        "return_receipts": isinstance(comment, str) and comment.lower() == "return receipts",
     }
 
-async def extract_errorlanes_metrics(job_data: Dict[str, Any]) -> Dict[str, Any]:
+
+def extract_errorlanes_metrics(job_data: Dict[str, Any]) -> Dict[str, Any]:
     """Extracts metrics specific to the ErrorLanes job type."""
+    get = job_data.get
     return {
-        "comment": job_data.get("comment", ""),  # Extract the comment
-        "category": job_data.get("category", ""),  # Extract the category
-        "employee_code": job_data.get("EMPLOYEE_CODE", ""),  # Extract employee code
-        "error_actions": job_data.get("LINE_COUNT", 0),  # Number of error actions processed
-        "error_duration": job_data.get("DURATION_SECONDS", 0),  # Time spent on error lanes
-        "error_weight": job_data.get("NET_WEIGHT_DURATION", 0),  # Weight related to error lanes
-        "error_volume": job_data.get("VOLUME_DURATION", 0),  # Volume related to error lanes
-        "error_handling_units": job_data.get("HANDLING_UNIT_COUNT", 0),  # Handling units in error lanes
+        "comment": get("comment", ""),
+        "category": get("category", ""),
+        "employee_code": get("EMPLOYEE_CODE", ""),
+        "error_actions": get("LINE_COUNT", 0),
+        "error_duration": get("DURATION_SECONDS", 0),
+        "error_weight": get("NET_WEIGHT_DURATION", 0),
+        "error_volume": get("VOLUME_DURATION", 0),
+        "error_handling_units": get("HANDLING_UNIT_COUNT", 0),
     }
+
+
+# Job type (HIGH_OVER_PROCESS) -> built-in metric extractor
+BUILTIN_EXTRACTORS: Dict[str, Extractor] = {
+    "Replenishment": extract_fma_metrics,
+    "Pick": extract_monopicking_metrics,
+    "Inbound": extract_inbound_and_bulk_metrics,
+    "Returns": extract_returns_metrics,
+    "Error lane": extract_errorlanes_metrics,
+}
+
+
+# ── Configured job types (JOB_METRICS_FILE) ─────────────────────────────────
+_TYPES = {"number": (int, float), "str": str}
+
+
+def _source(job_type: str, field: Dict[str, Any]) -> Getter:
+    source, default = field["source"], field.get("default")
+    kind = field.get("type", "any")
+    if kind == "any":
+        return lambda job_data, metrics: job_data.get(source, default)
+    if kind not in _TYPES:
+        raise ValueError(f"{job_type}: unknown field type '{kind}'")
+    types = _TYPES[kind]
+
+    def typed(job_data: Dict[str, Any], metrics: Dict[str, Any]) -> Any:
+        value = job_data.get(source, default)
+        return value if isinstance(value, types) else default
+    return typed
+
+
+def _operand(job_type: str, field: Any, defined: Dict[str, Getter]) -> Getter:
+    """An earlier output name (read back from the metrics) or an inline field."""
+    if isinstance(field, str):
+        if field not in defined:
+            raise ValueError(f"{job_type}: '{field}' is not defined before it is used")
+        return lambda job_data, metrics: metrics[field]
+    return _field(job_type, field, defined)
+
+
+def _derived(job_type: str, field: Dict[str, Any], defined: Dict[str, Getter]) -> Getter:
+    operands = [_operand(job_type, op, defined) for op in field.get("of", [])]
+    derive = field["derive"]
+    if derive == "ratio" and len(operands) == 2:
+        numerator, denominator = operands
+
+        def ratio(job_data: Dict[str, Any], metrics: Dict[str, Any]) -> Any:
+            b = denominator(job_data, metrics)
+            return numerator(job_data, metrics) / b if b != 0 else 0
+        return ratio
+    if derive == "equals" and len(operands) == 1:
+        (operand,) = operands
+        if field.get("ignore_case"):
+            value = field["value"].lower()
+            return lambda job_data, metrics: operand(job_data, metrics).lower() == value
+        value = field["value"]
+        return lambda job_data, metrics: operand(job_data, metrics) == value
+    raise ValueError(f"{job_type}: unsupported derived field {field!r}")
+
+
+def _field(job_type: str, field: Dict[str, Any], defined: Dict[str, Getter]) -> Getter:
+    return _derived(job_type, field, defined) if "derive" in field else _source(job_type, field)
+
+
+def compile_extractor(job_type: str, fields: Dict[str, Any]) -> Extractor:
+    """Compile COMMON_FIELDS + `fields` into `extract(job_data) -> metrics`."""
+    # (output name, source key, default, accepted types or None, derived getter or None)
+    entries: List[Tuple[str, Any, Any, Any, Optional[Getter]]] = []
+    defined: Dict[str, Getter] = {}
+    for name, field in {**COMMON_FIELDS, **fields}.items():
+        defined[name] = _field(job_type, field, defined)
+        if "derive" in field:
+            entries.append((name, None, None, None, defined[name]))
+        else:
+            entries.append((name, field["source"], field.get("default"),
+                            _TYPES.get(field.get("type", "any")), None))
+    table = tuple(entries)
+
+    def extract(job_data: Dict[str, Any]) -> Dict[str, Any]:
+        get = job_data.get
+        metrics: Dict[str, Any] = {}
+        for name, source, default, types, derived in table:
+            if derived is not None:
+                metrics[name] = derived(job_data, metrics)
+                continue
+            value = get(source, default)
+            metrics[name] = value if types is None or isinstance(value, types) else default
+        return metrics
+
+    extract.__name__ = extract.__qualname__ = f"extract_{job_type.lower().replace(' ', '_')}_metrics"
+    extract.__doc__ = f"Metrics of a '{job_type}' job (compiled from its field spec)."
+    return extract
+
+
+def load_job_metric_specs(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """Field specs of the job types configured in `path` (JOB_METRICS_FILE); {} when unset."""
+    if not path:
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def build_extractors(specs: Dict[str, Dict[str, Any]]) -> Dict[str, Extractor]:
+    """The built-in extractors, with the job types in `specs` added or replaced."""
+    extractors = dict(BUILTIN_EXTRACTORS)
+    for job_type, fields in specs.items():
+        extractors[job_type] = compile_extractor(job_type, fields)
+    return extractors
+
+
+# Job type (HIGH_OVER_PROCESS) -> metric extractor
+JOB_TYPE_TO_EXTRACTOR: Dict[str, Extractor] = build_extractors(load_job_metric_specs(os.getenv("JOB_METRICS_FILE")))
@@ -1,113 +1,102 @@
-from collections import deque
-from datetime import datetime, timedelta
-from typing import Dict, Any
-
-from app.utils.MainUtils import get_or_create_person
-from app.data.store import get_db, MAX_PEOPLE
+from collections import defaultdict
+from datetime import datetime
+from time import perf_counter
+from typing import Dict, Any, List, Optional
+
+from app.data.aggregation import JobEvent, add_kpi_quantity
+from app.data.store import get_db, mark_changed, run_backend
+from app.services.metrics import FAST_BUCKETS, histogram
+from app.utils.jobExtractors.EnvelopeDecoder import decode_nested
 from datetime import timezone
 
-# ── Parameters ───────────────────────────────────────────────────────────────
-ROLLING_WINDOW = timedelta(minutes=60)   # size of the rolling KPI window
-JOB_TIMES_MAXLEN = 6000                  # keep enough events to cover the hour
-MAX_RECENT_EVENTS = 6000                 # keep enough events for the last hour
-
 # ── KPI Update Function ──────────────────────────────────────────────────────
 
-def calc_kpi_based_on_event(job_data: Dict[str, Any], dashboard: Any) -> None:
+def ipg_quantity(payload: Dict[str, Any]) -> int:
+    """
+    KPI quantity of a decoded Geek payload: sum of data.ipg_list[*].base_lv_quantity
+    (fallback 1). Computed when job_data is built so the payload need not be kept.
     """
-    Increments dashboard KPIs by the quantity in job_data:
+    inner = decode_nested(payload.get("data") or {})
+    ipg_list = inner.get("ipg_list", []) if isinstance(inner, dict) else []
+    if isinstance(ipg_list, list) and ipg_list:
+        def safe_int(x, default=1):
+            try:
+                return int(x)
+            except (ValueError, TypeError):
+                return default
+
+        return sum(safe_int(item.get("base_lv_quantity", 1)) for item in ipg_list)
+    return 1  # fallback if ipg_list missing/empty
+
+
+def kpi_quantity(job_data: Dict[str, Any]) -> int:
+    """
+    Quantity a job event adds to the dashboard KPIs:
     - For Pick jobs: use NUMBER_OF_LINES (fallback 1), but only when PICKBATCH_CONFIRMED == 1
     - For GeekPicking: use NUMBER_OF_LINES (fallback 1)
-    - Else: use RAW_GEEK.data.ipg_list[*].base_lv_quantity (fallback 1)
+    - Else: use IPG_QUANTITY, precomputed from the Geek payload by `ipg_quantity` (fallback 1)
     """
-    now = datetime.now(timezone.utc)
-
     job_type = job_data.get("job_type")
 
-    # ----- Determine qty -----
     if job_type == "Pick" and job_data.get("PICKBATCH_CONFIRMED") == 1:
         # Dynamic quantity based on NUMBER_OF_LINES (or NUMBER_OF_HANDING_UNITS if you prefer)
         raw_val = job_data.get("NUMBER_OF_LINES")  # or "NUMBER_OF_HANDING_UNITS"
         try:
-            qty = int(raw_val)
+            return int(raw_val)
         except (ValueError, TypeError):
-            qty = 0
+            return 0
 
-    elif job_type == "GeekPicking":
+    if job_type == "GeekPicking":
         # Geek picking jobs: also count NUMBER_OF_LINES
         raw_val = job_data.get("NUMBER_OF_LINES")
         try:
-            qty = int(raw_val)
+            return int(raw_val)
         except (ValueError, TypeError):
-            qty = 0
-
-    else:
-        # Original RAW_GEEK-based logic as fallback for other job types
-        inner = job_data.get("RAW_GEEK", {}).get("data", {})
-        ipg_list = inner.get("ipg_list", [])
-        if isinstance(ipg_list, list) and ipg_list:
-            def safe_int(x, default=1):
-                try:
-                    return int(x)
-                except (ValueError, TypeError):
-                    return default
-
-            qty = sum(safe_int(item.get("base_lv_quantity", 1)) for item in ipg_list)
-        else:
-            qty = 1  # fallback if ipg_list missing/empty
-
-    # ----- Initialise KPI state if needed -----
-    if getattr(dashboard, "kpi_state", None) is None:
-        dashboard.kpi_state = {
-            "date": now.date(),
-            "total": 0,
-            "first_event_time": now,
-            "recent": [],
-        }
-
-    state = dashboard.kpi_state
-
-    # ----- Reset for a new day -----
-    if state.get("date") != now.date():
-        state["date"] = now.date()
-        state["total"] = 0
-        state["first_event_time"] = now
-        state["recent"] = []
-
-    # ----- Update totals -----
-    state["total"] += qty
-
-    # ----- Maintain rolling one-hour window -----
-    recent_events = state.get("recent") or []
-    recent = deque(
-        (
-            (float(event.get("ts", 0)), int(event.get("qty", 0)))
-            for event in recent_events
-            if isinstance(event, dict)
-        ),
-        maxlen=MAX_RECENT_EVENTS,
-    )
-    recent.append((now.timestamp(), qty))
-
-    cutoff_ts = (now - ROLLING_WINDOW).timestamp()
-    while recent and recent[0][0] < cutoff_ts:
-        recent.popleft()
-
-    window_total = sum(amount for _, amount in recent)
-    per_hour = window_total * (3600 / ROLLING_WINDOW.total_seconds())
-
-    # Persist recent events in a JSON-friendly format
-    state["recent"] = [{"ts": ts, "qty": amount} for ts, amount in recent]
-
-    # Assume [0] = per hour, [1] = total today
-    dashboard.kpis[0].value = round(per_hour, 0)
-    dashboard.kpis[1].value = state["total"]
+            return 0
+
+    # Geek ipg_list quantity as fallback for other job types
+    return job_data.get("IPG_QUANTITY", 1)
+
+
+def calc_kpi_based_on_event(job_data: Dict[str, Any], dashboard: Any, now: Optional[datetime] = None) -> None:
+    """Increments dashboard KPIs by the quantity in job_data (see `kpi_quantity`)."""
+    add_kpi_quantity(dashboard, kpi_quantity(job_data), now or datetime.now(timezone.utc))
 
 # ── Main Update Function ─────────────────────────────────────────────────────
+def _coerce_lines(val, default=1) -> int:
+    # Prefer LINE_COUNT, then amount_of_lines; keep default=1 to mimic old +1 behavior when missing
+    try:
+        if val is None:
+            return default
+        num = int(float(val))  # allow strings like "7"
+        return max(0, num)  # no negative increments
+    except Exception:
+        return default
+
+
+def _job_event(job_data: Dict[str, Any], now: datetime) -> JobEvent:
+    """Normalise one job payload into the event applied to the dashboard."""
+    comment = (job_data.get("comment") or "").strip()
+    operator_name = (job_data.get("EMPLOYEE_CODE") or "").strip() or "Unknown"
+
+    # Determine how many lines to add
+    amount_of_lines = _coerce_lines(job_data.get("NUMBER_OF_LINES", None), default=1)
+    return JobEvent(now.timestamp(), operator_name, job_data["job_type"], comment,
+                    amount_of_lines, kpi_quantity(job_data))
+
+
+# Phase timings on /metrics (decode is timed in EnvelopeDecoder); batches per dashboard group
+_phase = {phase: histogram("ingest.phase", FAST_BUCKETS, phase=phase) for phase in ("extract", "update")}
+_batch_phase = {phase: histogram("ingest.batch_phase", FAST_BUCKETS, phase=phase) for phase in ("extract", "update")}
+
+
+def _finish_dashboard_update(store_key: str) -> None:
+    # 7) Publish the change (recency order is kept by the operator registry)
+    mark_changed(store_key)
+
+
 async def update_jobs_store_metric(job_data: Dict[str, Any]) -> Dict[str, Any]:
-    # Extract required information
     job_id = job_data.get("HEADER_ID")
-    comment = (job_data.get("comment") or "").strip()
     operator_name = (job_data.get("EMPLOYEE_CODE") or "").strip() or "Unknown"
     job_type = (job_data.get("HIGH_OVER_PROCESS") or "").strip()
     now = datetime.now(timezone.utc)
@@ -115,77 +104,58 @@ async def update_jobs_store_metric(job_data: Dict[str, Any]) -> Dict[str, Any]:
     job_data["job_type"] = job_type  # keep for downstream KPI calculation, etc.
 
     # 1) Get dashboard
-    db = get_db().get(job_type.lower())
-    if not db:
+    store_key = job_type.lower()
+    dashboards = get_db()
+    if store_key not in dashboards:
         return {"status": "error", "detail": f"Dashboard for job type '{job_type}' not found."}
 
-    # 2) Get/create operator
-    person = get_or_create_person(db.people, operator_name, job_type, comment)
-
-    # 3) Determine how many lines to add
-    def _coerce_lines(val, default=1) -> int:
-        # Prefer LINE_COUNT, then amount_of_lines; keep default=1 to mimic old +1 behavior when missing
-        try:
-            if val is None:
-                return default
-            num = int(float(val))  # allow strings like "7"
-            return max(0, num)  # no negative increments
-        except Exception:
-            return default
-
-    amount_of_lines = _coerce_lines(
-        job_data.get("NUMBER_OF_LINES", None) if "NUMBER_OF_LINES" in job_data else job_data.get("NUMBER_OF_LINES", None),
-        default=1,
-    )
-
-    # 4) Ensure rolling window (store [timestamp, qty] pairs) and speed
-    existing_times = getattr(person, "job_times", None)
-    normalized_times = deque(maxlen=JOB_TIMES_MAXLEN)
-    if existing_times:
-        for entry in existing_times:
-            if isinstance(entry, (list, tuple)) and len(entry) == 2:
-                ts, qty = entry
-            else:
-                ts, qty = entry, 1
-            try:
-                normalized_times.append((float(ts), int(qty)))
-            except (TypeError, ValueError):
-                continue
-    person.job_times = normalized_times  # type: ignore[attr-defined]
-    job_times: deque = person.job_times  # type: ignore[attr-defined]
-    job_times.append((now.timestamp(), amount_of_lines))
-
-    cutoff = (now - ROLLING_WINDOW).timestamp()
-    while job_times and job_times[0][0] < cutoff:
-        job_times.popleft()
-
-    window_lines = sum(max(qty, 0) for ts, qty in job_times if ts >= cutoff)
-    window_hours = ROLLING_WINDOW.total_seconds() / 3600 or 1
-    person.speed = int(round(window_lines / window_hours))
-
-    # 5) Activity & metadata
-    person.jobs = (getattr(person, "jobs", 0) or 0) + amount_of_lines  # ✅ add number of lines
-    person.last_seen = now
-    person.idleSeconds = 0
-    person.category = job_type
-    person.comment = comment
-
-    # 6) Update idleSeconds for others
-    for p in db.people:
-        if p is person or not getattr(p, "last_seen", None):
-            continue
-        p.idleSeconds = int((datetime.now(timezone.utc) - p.last_seen).total_seconds())
-
-    # 7) Trim people list (most recent activity first)
-    db.people.sort(
-        key=lambda p: (getattr(p, "last_seen", None) or datetime.min.replace(tzinfo=timezone.utc)),
-        reverse=True,
-    )
-    db.people = db.people[:MAX_PEOPLE]
-
-    # 8) KPI update
-    calc_kpi_based_on_event(job_data, db)
+    started = perf_counter()
+    event = _job_event(job_data, now)
+    extracted = perf_counter()
+    await run_backend(dashboards.apply_events, store_key, [event])
+    _finish_dashboard_update(store_key)
+    _phase["extract"].observe(extracted - started)
+    _phase["update"].observe(perf_counter() - extracted)
+    amount_of_lines = event.lines
 
     print(f"✅ Dashboard updated: {operator_name} ran '{job_type}' (#{job_id}) — +{amount_of_lines} lines")
 
     return {"status": "success", "job_id": job_id}
+
+
+async def update_jobs_store_metrics_batch(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Apply many job events at once: events are grouped per dashboard and each
+    dashboard is marked changed once per batch instead of per event. Returns one result per input job, in input order.
+    """
+    now = datetime.now(timezone.utc)
+    results: List[Dict[str, Any]] = [{} for _ in jobs]
+    by_dashboard: Dict[str, List[int]] = defaultdict(list)
+
+    for index, job_data in enumerate(jobs):
+        job_type = (job_data.get("HIGH_OVER_PROCESS") or "").strip()
+        job_data["job_type"] = job_type
+        by_dashboard[job_type.lower()].append(index)
+
+    dashboards = get_db()
+    for store_key, indexes in by_dashboard.items():
+        if store_key not in dashboards:
+            for index in indexes:
+                results[index] = {
+                    "status": "error",
+                    "detail": f"Dashboard for job type '{jobs[index]['job_type']}' not found.",
+                }
+            continue
+        started = perf_counter()
+        events = [_job_event(jobs[index], now) for index in indexes]
+        extracted = perf_counter()
+        # One backend call per dashboard (one pipelined round-trip for Redis).
+        await run_backend(dashboards.apply_events, store_key, events)
+        _finish_dashboard_update(store_key)
+        _batch_phase["extract"].observe(extracted - started)
+        _batch_phase["update"].observe(perf_counter() - extracted)
+        for index in indexes:
+            results[index] = {"status": "success", "job_id": jobs[index].get("HEADER_ID")}
+        print(f"✅ Dashboard '{store_key}' updated with {len(indexes)} events")
+
+    return results
@@ -1,16 +1,28 @@
 """
 Utilities to emit Datadog-friendly JSON logs with consistent metadata.
+
+By default every call serialises and writes its line synchronously. Once
+`start_log_writer()` has been called (the FastAPI lifespan does this), calls
+only enqueue the entry: a background thread serialises entries and writes
+them in batches. Per-`event_type` sampling (DATADOG_LOG_SAMPLE_RATES) drops
+routine "ok"/"info" events before any work is done; errors and warnings are
+never sampled. When the queue is full entries are dropped and counted.
 """
 from __future__ import annotations
 
+import atexit
 import base64
 import json
 import logging
+import os
+import queue
+import random
 import sys
+import threading
 from dataclasses import dataclass, field
 from datetime import date, datetime, timezone
 from decimal import Decimal
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 DATADOG_LOGGER_NAME = "datadog"
 _logger = logging.getLogger(DATADOG_LOGGER_NAME)
@@ -66,14 +78,158 @@ class DatadogLog:
         payload.update(self.extra)
         return {key: value for key, value in payload.items() if value is not None}
 
-    def log(self) -> str:
-        payload = self.to_payload()
-        serialized = json.dumps(payload, default=_default_serializer, separators=(",", ":"))
+    def serialize(self) -> str:
+        try:
+            return json.dumps(self.to_payload(), default=_default_serializer, separators=(",", ":"))
+        except (TypeError, ValueError) as exc:
+            # e.g. non-string keys or a circular reference in `extra`: keep the event, drop `extra`
+            fallback = {
+                "status": self.status,
+                "message": self.message,
+                "event_type": self.event_type,
+                "function_name": self.function_name,
+                "event_time": self.event_time.isoformat(),
+                "serialization_error": repr(exc),
+            }
+            return json.dumps(fallback, separators=(",", ":"))
+
+    def log(self) -> Optional[str]:
+        writer = _writer
+        if writer is not None:
+            writer.enqueue(self)
+            return None
+        serialized = self.serialize()
         logger = logging.getLogger(DATADOG_LOGGER_NAME)
         logger.info(serialized)
         return serialized
 
 
+# ── Sampling ────────────────────────────────────────────────────────────────
+SAMPLED_STATUSES = frozenset({"ok", "info"})   # errors/warnings are always kept
+
+
+def _parse_sample_rates(raw: str) -> Dict[str, float]:
+    """`"dashboard.fetch=0.01,manual_finish.tile=0.1"` -> {event_type: rate}."""
+    rates: Dict[str, float] = {}
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        event_type, rate = part.split("=", 1)
+        try:
+            rates[event_type.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+SAMPLE_RATES: Dict[str, float] = _parse_sample_rates(os.getenv("DATADOG_LOG_SAMPLE_RATES", ""))
+
+
+def set_sample_rate(event_type: str, rate: float) -> None:
+    SAMPLE_RATES[event_type] = min(1.0, max(0.0, rate))
+
+
+# ── Background writer ───────────────────────────────────────────────────────
+LOG_QUEUE_SIZE = int(os.getenv("DATADOG_LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("DATADOG_LOG_BATCH_SIZE", "256"))
+
+_STOP = object()
+
+
+class _LogWriter:
+    """Daemon thread draining a bounded queue and writing lines in batches."""
+
+    def __init__(self, maxsize: int = LOG_QUEUE_SIZE, batch_size: int = LOG_BATCH_SIZE) -> None:
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._batch_size = batch_size
+        self._thread = threading.Thread(target=self._run, daemon=True, name="datadog-log-writer")
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def enqueue(self, entry: DatadogLog) -> None:
+        try:
+            self._queue.put_nowait(entry)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self, timeout: float = 2.0) -> None:
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return   # writer stuck; it is a daemon thread, don't hang shutdown
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        logger = logging.getLogger(DATADOG_LOGGER_NAME)
+        while True:
+            batch: List[DatadogLog] = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            lines: List[str] = []
+            for entry in batch:
+                if entry is _STOP:
+                    stop = True
+                    continue
+                try:
+                    lines.append(entry.serialize())
+                except Exception:  # noqa: BLE001 - one bad entry must not kill the writer
+                    self.failed += 1
+            if lines:
+                logger.info("\n".join(lines))
+                self.written += len(lines)
+            if stop:
+                return
+
+
+_writer: Optional[_LogWriter] = None
+_sampled_out = 0
+
+
+def start_log_writer() -> None:
+    """Switch to queue-backed logging (no-op if DATADOG_LOG_ASYNC=0 or already started)."""
+    global _writer
+    if _writer is not None or os.getenv("DATADOG_LOG_ASYNC", "1") == "0":
+        return
+    writer = _LogWriter()
+    writer.start()
+    _writer = writer
+    atexit.register(stop_log_writer)
+
+
+def stop_log_writer() -> None:
+    """Flush pending entries and go back to synchronous logging."""
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+
+
+def get_log_stats() -> Dict[str, Any]:
+    writer = _writer
+    return {
+        "mode": "queue" if writer else "sync",
+        "enqueued": writer.enqueued if writer else 0,
+        "written": writer.written if writer else 0,
+        "dropped": writer.dropped if writer else 0,
+        "failed": writer.failed if writer else 0,
+        "queue_depth": writer._queue.qsize() if writer else 0,
+        "sampled_out": _sampled_out,
+    }
+
+
 def log_datadog_event(
     *,
     status: str,
@@ -85,10 +241,17 @@ def log_datadog_event(
     work_mode_code: Optional[str] = None,
     trace_id: Optional[str] = None,
     extra: Optional[Dict[str, Any]] = None,
-) -> str:
+) -> Optional[str]:
     """
     Helper to quickly emit Datadog structured logs.
+    Returns the serialised line when written synchronously, else None.
     """
+    global _sampled_out
+    rate = SAMPLE_RATES.get(event_type)
+    if rate is not None and status in SAMPLED_STATUSES and random.random() >= rate:
+        _sampled_out += 1
+        return None
+
     log_entry = DatadogLog(
         status=status,
         message=message,
@@ -98,6 +261,8 @@ def log_datadog_event(
         variant_id=variant_id,
         work_mode_code=work_mode_code,
         trace_id=trace_id,
-        extra=extra or {},
+        # Copied: the entry may be serialised later by the writer thread while
+        # the caller keeps using its dict.
+        extra=dict(extra) if extra else {},
     )
     return log_entry.log()